@@ -0,0 +1,236 @@
+"""Pipeline Benchmark
+
+Benchmarks ingest_and_process_data and check_output_data_validity on synthetic application data
+(see generate_data.py) at one or more scales, and compares the results with stored baselines.
+
+Each benchmark runs in a fresh process, so its peak memory (peak RSS) is not inflated by earlier
+runs. For each scale, a synthetic file of that many rows is generated into a work directory and:
+    - ingest: ingest_and_process_data over the file (with its per-stage metrics, see metrics module).
+    - validity_summary: check_output_data_validity from the validation summaries of the run.
+    - validity_full: check_output_data_validity re-reading every output file.
+
+Results are compared with the baselines in BASELINE_PATH: a benchmark regresses if its throughput
+drops, or its peak memory grows, by more than the tolerance. The exit code is 1 if any benchmark
+regressed, so the harness can gate changes.
+
+Execute this command inside the airflow-scheduler container (from /opt/airflow):
+    python benchmarks/bench_pipeline.py [--rows 10000 1000000] [--update-baseline] [--tolerance 0.2]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+PLUGINS_DIR = os.path.join(BENCHMARK_DIR, "..", "plugins")
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baselines.json")
+
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, PLUGINS_DIR)
+
+import generate_data
+
+BENCHMARKS = ["ingest", "validity_summary", "validity_full"]
+
+
+# =============================================
+# Main
+# =============================================
+def main(rows=(10_000, 1_000_000), workdir=None, baseline_path=BASELINE_PATH, update_baseline=False, tolerance=0.2):
+    """Run the benchmarks at each scale, report them and compare them with the baselines.
+
+    Args:
+        rows (list): number of rows of the synthetic input file of each scale.
+        workdir (str): directory for the synthetic data and outputs. Defaults to None (a temporary directory).
+        baseline_path (str): path of the baselines JSON file. Defaults to BASELINE_PATH.
+        update_baseline (bool): store the results as the new baselines. Defaults to False.
+        tolerance (float): allowed relative drop in throughput or growth in peak memory. Defaults to 0.2.
+
+    Returns:
+        int: 0 if no benchmark regressed, else 1.
+    """
+    baselines = _read_baselines(baseline_path)
+    results = {}
+    cleanup = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="bench_pipeline_")
+    try:
+        for num_rows in rows:
+            scale_dir = os.path.join(workdir, str(num_rows))
+            _prepare_workdir(scale_dir, num_rows)
+            print("\nBenchmark ({:,d} rows):".format(num_rows))
+            for benchmark in BENCHMARKS:
+                result = _run_isolated(benchmark, scale_dir)
+                key = "{}@{}".format(benchmark, num_rows)
+                results[key] = result
+                print("- {}: {:.2f} s, {:,.0f} rows/sec, peak RSS {:.1f} MB{}".format(
+                    benchmark, result["wall_time_s"], result["rows_per_sec"], result["peak_rss_mb"],
+                    _compare(result, baselines.get(key), tolerance)))
+                for name, stage in result.get("stages", {}).items():
+                    print("  - {}: {:.2f} s, {}".format(name, stage["wall_time_s"],
+                        "{:,.0f} rows/sec".format(stage["rows_per_sec"]) if stage["rows_per_sec"] else "-"))
+    finally:
+        if cleanup:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if update_baseline:
+        baselines.update(results)
+        with open(baseline_path, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print("\nBaselines written to {}".format(baseline_path))
+        return 0
+
+    regressions = sorted(key for key, result in results.items() if _is_regression(result, baselines.get(key), tolerance))
+    if regressions:
+        print("\nRegressions (more than {:.0f}% worse than baseline): {}".format(tolerance*100, regressions))
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+# =============================================
+# Private Functions
+# =============================================
+def _prepare_workdir(scale_dir, num_rows):
+    """Create a work directory with a synthetic input file of num_rows rows.
+
+    Args:
+        scale_dir (str): work directory of the scale (recreated if it exists).
+        num_rows (int): number of rows of the input file.
+    """
+    shutil.rmtree(scale_dir, ignore_errors=True)
+    os.makedirs(os.path.join(scale_dir, "raw"))
+    generate_data.main(os.path.join(scale_dir, "raw", "applications_bench.csv"), num_rows)
+
+def _run_isolated(benchmark, scale_dir):
+    """Run a benchmark in a fresh (spawned) process.
+
+    Args:
+        benchmark (str): one of BENCHMARKS.
+        scale_dir (str): work directory of the scale.
+
+    Returns:
+        dict: wall time, rows/sec, peak RSS and (for ingest) per-stage metrics.
+    """
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_run_benchmark, (benchmark, scale_dir))
+
+def _run_benchmark(benchmark, scale_dir):
+    """Run a benchmark (in the process of _run_isolated), with the pipeline configured to use scale_dir.
+
+    Args:
+        benchmark (str): one of BENCHMARKS.
+        scale_dir (str): work directory of the scale.
+
+    Returns:
+        dict: wall time, rows/sec, peak RSS and (for ingest) per-stage metrics.
+    """
+    import dataproc_config as cfg
+    cfg.INPUT_DATA_DIR = os.path.join(scale_dir, "raw")
+    cfg.SUCCESS_DATA_DIR = os.path.join(scale_dir, "successful")
+    cfg.FAIL_DATA_DIR = os.path.join(scale_dir, "failed")
+    cfg.SUMMARY_DATA_DIR = os.path.join(scale_dir, "summaries")
+    cfg.METRICS_DATA_DIR = os.path.join(scale_dir, "metrics")
+    cfg.MANIFEST_PATH = os.path.join(scale_dir, "manifest.json")
+    cfg.MEMBER_INDEX_PATH = os.path.join(scale_dir, "member_index.db")
+    cfg.FORCE_REPROCESS = True
+    import preprocess
+
+    with open(os.path.join(cfg.INPUT_DATA_DIR, "applications_bench.csv")) as f:
+        num_rows = sum(1 for _ in f) - 1
+    stages = {}
+    start = time.perf_counter()
+    if benchmark == "ingest":
+        summary_paths = preprocess.ingest_and_process_data()
+        wall_time = time.perf_counter() - start
+        with open(os.path.join(scale_dir, "summary_paths.json"), "w") as f:
+            json.dump(summary_paths, f)
+        metrics_files = sorted(os.listdir(cfg.METRICS_DATA_DIR))
+        with open(os.path.join(cfg.METRICS_DATA_DIR, metrics_files[-1])) as f:
+            stages = json.load(f)["stages"]
+    elif benchmark == "validity_summary":
+        with open(os.path.join(scale_dir, "summary_paths.json")) as f:
+            summary_paths = json.load(f)
+        preprocess.check_output_data_validity(ti=_SummaryTaskInstance(summary_paths))
+        wall_time = time.perf_counter() - start
+    else:
+        preprocess.check_output_data_validity()
+        wall_time = time.perf_counter() - start
+
+    return {
+        "wall_time_s": wall_time,
+        "rows_per_sec": num_rows/wall_time,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024,
+        "stages": stages,
+    }
+
+class _SummaryTaskInstance:
+    """Stands in for the Airflow task instance, returning the summary paths of the ingest run from xcom_pull."""
+    def __init__(self, summary_paths):
+        self.summary_paths = summary_paths
+
+    def xcom_pull(self, task_ids=None):
+        return self.summary_paths
+
+def _read_baselines(baseline_path):
+    """Read the stored baselines.
+
+    Args:
+        baseline_path (str): path of the baselines JSON file.
+
+    Returns:
+        dict: baseline of each "<benchmark>@<rows>" (empty if there are none yet).
+    """
+    if not os.path.exists(baseline_path):
+        return {}
+    with open(baseline_path) as f:
+        return json.load(f)
+
+def _is_regression(result, baseline, tolerance):
+    """Check whether a result is worse than its baseline by more than the tolerance.
+
+    Args:
+        result (dict): benchmark result.
+        baseline (dict): baseline result, or None.
+        tolerance (float): allowed relative drop in throughput or growth in peak memory.
+
+    Returns:
+        bool: True if throughput or peak memory regressed.
+    """
+    if baseline is None:
+        return False
+    return (result["rows_per_sec"] < baseline["rows_per_sec"]*(1-tolerance)
+            or result["peak_rss_mb"] > baseline["peak_rss_mb"]*(1+tolerance))
+
+def _compare(result, baseline, tolerance):
+    """Describe a result relative to its baseline.
+
+    Args:
+        result (dict): benchmark result.
+        baseline (dict): baseline result, or None.
+        tolerance (float): allowed relative drop in throughput or growth in peak memory.
+
+    Returns:
+        str: change in throughput and peak memory, flagged if regressed.
+    """
+    if baseline is None:
+        return " (no baseline)"
+    return " ({:+.1f}% rows/sec, {:+.1f}% peak RSS vs baseline){}".format(
+        (result["rows_per_sec"]/baseline["rows_per_sec"]-1)*100,
+        (result["peak_rss_mb"]/baseline["peak_rss_mb"]-1)*100,
+        " REGRESSION" if _is_regression(result, baseline, tolerance) else "")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the data pipeline on synthetic application data.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 1_000_000], help="rows of each scale (1e4 to 1e8)")
+    parser.add_argument("--workdir", default=None, help="directory for synthetic data and outputs (default: temporary)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="path of the baselines JSON file")
+    parser.add_argument("--update-baseline", action="store_true", help="store the results as the new baselines")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+    sys.exit(main(args.rows, args.workdir, args.baseline, args.update_baseline, args.tolerance))
@@ -0,0 +1,164 @@
+"""Synthetic Application Data Generator
+
+Generates raw application data files with the same columns and messy formats as data/raw, at any
+scale (written in chunks, so memory does not grow with the number of rows):
+    - name: first and last name, some with a prefix (Mr., Dr., ...) or suffix (MD, III, ...), a few empty.
+    - email: <first>_<last>@<company>.<tld>, with .com, .net, .org, .info and .biz domains.
+    - date_of_birth: YYYY/MM/DD, YYYY-MM-DD, MM/DD/YYYY or DD-MM-YYYY.
+    - mobile_no: 5 to 8 digits, some 8-digit numbers spaced as "dddd dddd".
+    - exact duplicate rows.
+
+Execute this command inside the airflow-scheduler container (from /opt/airflow):
+    python benchmarks/generate_data.py <output csv> [num_rows] [seed]
+"""
+import sys
+import numpy as np
+import pandas as pd
+
+FIRST_NAMES = ["William", "Kristen", "Kimberly", "Mary", "Benjamin", "Cathy", "Brandon", "Paul", "Sarah",
+               "Caroline", "Carl", "Scott", "Kaylee", "Charles", "Deanna", "Douglas", "Ashley", "Thomas",
+               "Larry", "Jeffrey", "Arthur", "John", "Gregory", "Samuel", "Rhonda", "Sean", "Jennifer",
+               "Michael", "Jessica", "David", "Emily", "Daniel", "Laura", "James", "Linda", "Robert"]
+LAST_NAMES = ["Dixon", "Horn", "Chang", "Ball", "Craig", "Werner", "Bell", "Farley", "Mcdaniel", "Anderson",
+              "Jones", "Lee", "Coleman", "Parker", "Sherman", "Francis", "Rocha", "Jacobson", "Martinez",
+              "Wang", "Rivera", "Grimes", "Spencer", "Hall", "Porter", "Hill", "Thompson", "Moss", "Smith",
+              "Johnson", "Williams", "Brown", "Garcia", "Miller", "Davis", "Wilson", "Taylor", "Clark"]
+PREFIXES = ["Mr.", "Mrs.", "Ms.", "Miss", "Dr."]
+SUFFIXES = ["MD", "DDS", "PhD", "DVM", "Jr.", "II", "III", "IV"]
+TLDS = ["com", "com", "com", "com", "com", "com", "net", "org", "info", "biz"]
+DOB_FORMATS = ["YYYY/MM/DD", "YYYY-MM-DD", "MM/DD/YYYY", "DD-MM-YYYY"]
+
+# fraction of rows with a name prefix/suffix, an empty name, a spaced mobile number, and duplicated
+PREFIX_FRACT = 0.04
+SUFFIX_FRACT = 0.03
+EMPTY_NAME_FRACT = 0.005
+SPACED_MOBILE_FRACT = 0.02
+DUPLICATE_FRACT = 0.01
+
+DOB_START = pd.Timestamp("1940-01-01")
+DOB_END = pd.Timestamp("2021-12-31")
+
+
+# =============================================
+# Main
+# =============================================
+def main(filepath, num_rows=1_000_000, seed=0, chunk_size=1_000_000):
+    """Generate a synthetic raw application data file.
+
+    Args:
+        filepath (str): path of the output csv file (overwritten if it exists).
+        num_rows (int): number of rows (including duplicates).
+        seed (int): random seed, so the same file is generated for the same arguments.
+        chunk_size (int): number of rows generated and written at a time.
+    """
+    rng = np.random.default_rng(seed)
+    num_written = 0
+    with open(filepath, "w", newline="") as f:
+        while num_written < num_rows:
+            df = generate_chunk(rng, min(chunk_size, num_rows-num_written))
+            df.to_csv(f, index=False, header=(num_written == 0))
+            num_written += len(df)
+    print("Generated {:,d} rows in {}".format(num_written, filepath))
+
+def generate_chunk(rng, num_rows):
+    """Generate a chunk of synthetic raw application data.
+
+    Args:
+        rng (numpy Generator): random number generator.
+        num_rows (int): number of rows (including duplicates).
+
+    Returns:
+        pandas dataframe: with columns name, email, date_of_birth and mobile_no.
+    """
+    num_unique = num_rows - int(num_rows*DUPLICATE_FRACT)
+    first = _choice(rng, FIRST_NAMES, num_unique)
+    last = _choice(rng, LAST_NAMES, num_unique)
+
+    name = first + " " + last
+    has_prefix = rng.random(num_unique) < PREFIX_FRACT
+    name[has_prefix] = _choice(rng, PREFIXES, has_prefix.sum()) + " " + name[has_prefix]
+    has_suffix = rng.random(num_unique) < SUFFIX_FRACT
+    name[has_suffix] = name[has_suffix] + " " + _choice(rng, SUFFIXES, has_suffix.sum())
+    name[rng.random(num_unique) < EMPTY_NAME_FRACT] = ""
+
+    companies = [last_name.lower() for last_name in LAST_NAMES]
+    company = _choice(rng, companies, num_unique)
+    has_partner = rng.random(num_unique) < 0.5
+    company[has_partner] = company[has_partner] + "-" + _choice(rng, companies, has_partner.sum())
+    email = first + "_" + last + "@" + company + "." + _choice(rng, TLDS, num_unique)
+
+    df = pd.DataFrame({
+        "name": name,
+        "email": email,
+        "date_of_birth": _dates_of_birth(rng, num_unique),
+        "mobile_no": _mobile_numbers(rng, num_unique),
+    })
+
+    # duplicate some rows and shuffle them in
+    duplicates = df.iloc[rng.integers(0, num_unique, num_rows-num_unique)]
+    df = pd.concat([df, duplicates], ignore_index=True)
+    return df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+
+
+# =============================================
+# Private Functions
+# =============================================
+def _choice(rng, values, size):
+    """Pick random values.
+
+    Args:
+        rng (numpy Generator): random number generator.
+        values (list): values to pick from.
+        size (int): number of values picked.
+
+    Returns:
+        numpy array: picked values (strings, object dtype, so they can be concatenated with +).
+    """
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), size)]
+
+def _dates_of_birth(rng, size):
+    """Generate dates of birth in a random mix of DOB_FORMATS.
+
+    Args:
+        rng (numpy Generator): random number generator.
+        size (int): number of dates.
+
+    Returns:
+        pandas series: date of birth strings.
+    """
+    days = rng.integers(0, (DOB_END-DOB_START).days+1, size)
+    dates = pd.Series(DOB_START + pd.to_timedelta(days, unit="D"))
+    year = dates.dt.year.astype(str)
+    month = dates.dt.month.astype(str).str.zfill(2)
+    day = dates.dt.day.astype(str).str.zfill(2)
+    formatted = [
+        year + "/" + month + "/" + day,
+        year + "-" + month + "-" + day,
+        month + "/" + day + "/" + year,
+        day + "-" + month + "-" + year,
+    ]
+    fmt = rng.integers(0, len(DOB_FORMATS), size)
+    return pd.Series(np.select([fmt == i for i in range(len(DOB_FORMATS))], [s.to_numpy() for s in formatted]))
+
+def _mobile_numbers(rng, size):
+    """Generate mobile numbers of 5 to 8 digits, some 8-digit numbers spaced as "dddd dddd".
+
+    Args:
+        rng (numpy Generator): random number generator.
+        size (int): number of mobile numbers.
+
+    Returns:
+        pandas series: mobile number strings.
+    """
+    num_digits = rng.integers(5, 9, size)
+    numbers = pd.Series(rng.integers(10**(num_digits-1), 10**num_digits)).astype(str)
+    # spaced numbers are a SPACED_MOBILE_FRACT of all numbers (a quarter of the numbers have 8 digits)
+    spaced = (num_digits == 8) & (rng.random(size) < SPACED_MOBILE_FRACT*4)
+    numbers[spaced] = numbers[spaced].str[:4] + " " + numbers[spaced].str[4:]
+    return numbers
+
+
+if __name__ == "__main__":
+    main(sys.argv[1],
+         int(sys.argv[2]) if len(sys.argv) > 2 else 1_000_000,
+         int(sys.argv[3]) if len(sys.argv) > 3 else 0)
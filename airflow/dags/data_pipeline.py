@@ -1,38 +1,66 @@
 """Airflow Data Pipeline
 
 Defines the directed acyclic graph (DAG) for scheduling the batch execution of the data pipeline via Airflow.
+
+Input files are discovered by one task, then processed and validated by tasks mapped over the files (one task
+instance per file), so files are spread across the workers and retried independently. A file that fails does not
+stop the other files from being processed, validated and loaded, but fails the DAG run.
 """
 import os
 from airflow import DAG
 from airflow.operators.empty import EmptyOperator
 from airflow.operators.python import PythonOperator
 
-from plugins.preprocess import ingest_and_process_data, check_output_data_validity
+from plugins.preprocess import discover_input_files, process_input_file, check_file_validity
+from plugins.db_loader import load_members
+from plugins.dataproc_config import WATCH_MODE
 
-from datetime import datetime
+from datetime import datetime, timedelta
 
 with DAG(
     dag_id="data_pipeline_dag",
     start_date=datetime(2022, 12, 22),
-    schedule="15 * * * *" #None
+    schedule=None if WATCH_MODE else "15 * * * *", # in watch mode, files are processed by data_pipeline_watch_dag
+    params={"force_reprocess": False, "full_rescan": False, "reload_members": False, "profile": False},
 ) as dag:
 
     start_task = EmptyOperator(
         task_id="start"
     )
 
-    ingest_and_preprocess = PythonOperator(
-        task_id="ingest_and_process",
-        python_callable=ingest_and_process_data
+    discover_files = PythonOperator(
+        task_id="discover_files",
+        python_callable=discover_input_files
     )
 
-    validity_check = PythonOperator(
+    process_file = PythonOperator.partial(
+        task_id="process_file",
+        python_callable=process_input_file,
+        retries=2,
+        retry_delay=timedelta(minutes=1)
+    ).expand(op_kwargs=discover_files.output.map(lambda filename: {"filename": filename}))
+
+    # mapped over the files that were processed; runs even if some files failed
+    validity_check = PythonOperator.partial(
         task_id="validity_check",
-        python_callable=check_output_data_validity
+        python_callable=check_file_validity,
+        trigger_rule="all_done"
+    ).expand(op_kwargs=process_file.output.map(lambda summary_path: {"summary_path": summary_path}))
+
+    # loads the files that passed the validity check
+    load_members_task = PythonOperator(
+        task_id="load_members",
+        python_callable=load_members,
+        op_kwargs={"ingest_task_id": "validity_check"},
+        trigger_rule="all_done"
     )
 
     stop_task = EmptyOperator(
         task_id='stop'
     )
 
-start_task >> ingest_and_preprocess >> validity_check >> stop_task
\ No newline at end of file
+# discover_files >> process_file >> validity_check follow from the mapped task inputs
+start_task >> discover_files
+validity_check >> load_members_task >> stop_task
+# the run fails if any file failed to be processed or validated
+[process_file, validity_check] >> stop_task
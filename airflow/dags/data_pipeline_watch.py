@@ -0,0 +1,70 @@
+"""Airflow Data Pipeline (Watch Mode)
+
+Defines the directed acyclic graph (DAG) for event-driven execution of the data pipeline via Airflow: each run
+waits in the triggerer for new input files to arrive (see plugins.file_watch), then processes just those files.
+
+The first run is scheduled once, and every run ends by triggering the next one (whether it succeeded or failed),
+which starts as soon as it finishes (one run at a time), so files are processed seconds after they are written.
+Files that fail to be processed are not picked up again until they change (see plugins.manifest). Enabled by
+WATCH_MODE in plugins.dataproc_config (which disables the hourly data_pipeline_dag).
+"""
+from airflow import DAG
+from airflow.operators.empty import EmptyOperator
+from airflow.operators.python import PythonOperator
+from airflow.operators.trigger_dagrun import TriggerDagRunOperator
+
+from plugins.preprocess import ingest_and_process_data, check_output_data_validity
+from plugins.db_loader import load_members
+from plugins.file_watch import FileArrivalSensor
+from plugins.dataproc_config import WATCH_MODE
+
+from datetime import datetime
+
+with DAG(
+    dag_id="data_pipeline_watch_dag",
+    start_date=datetime(2022, 12, 22),
+    schedule="@once" if WATCH_MODE else None,
+    catchup=False,
+    max_active_runs=1,
+    render_template_as_native_obj=True,
+    params={"force_reprocess": False, "full_rescan": False, "reload_members": False, "profile": False},
+) as dag:
+
+    start_task = EmptyOperator(
+        task_id="start"
+    )
+
+    wait_for_files = FileArrivalSensor(
+        task_id="wait_for_files"
+    )
+
+    ingest_and_preprocess = PythonOperator(
+        task_id="ingest_and_process",
+        python_callable=ingest_and_process_data,
+        op_kwargs={"filenames": "{{ ti.xcom_pull(task_ids='wait_for_files') }}"}
+    )
+
+    validity_check = PythonOperator(
+        task_id="validity_check",
+        python_callable=check_output_data_validity
+    )
+
+    load_members_task = PythonOperator(
+        task_id="load_members",
+        python_callable=load_members
+    )
+
+    stop_task = EmptyOperator(
+        task_id='stop'
+    )
+
+    if WATCH_MODE:
+        # also runs after a failure, so the watch continues (stop stays upstream_failed, so the run is still failed)
+        retrigger_task = TriggerDagRunOperator(
+            task_id="retrigger",
+            trigger_dag_id="data_pipeline_watch_dag",
+            trigger_rule="all_done",
+        )
+        load_members_task >> retrigger_task
+
+start_task >> wait_for_files >> ingest_and_preprocess >> validity_check >> load_members_task >> stop_task
@@ -0,0 +1,39 @@
+"""Airflow Sales Analytics Refresh
+
+Defines the directed acyclic graph (DAG) that refreshes the materialized views of the sales database
+(spending per member and quantity sold per item, see database/setup.sql) via Airflow.
+
+The views are refreshed concurrently (see plugins.db_loader), so the analytics queries on them are not
+blocked. Scheduled by ANALYTICS_REFRESH_SCHEDULE in plugins.dataproc_config, one run at a time.
+"""
+from airflow import DAG
+from airflow.operators.empty import EmptyOperator
+from airflow.operators.python import PythonOperator
+
+from plugins.db_loader import refresh_analytics_views
+from plugins.dataproc_config import ANALYTICS_REFRESH_SCHEDULE
+
+from datetime import datetime
+
+with DAG(
+    dag_id="sales_analytics_refresh_dag",
+    start_date=datetime(2022, 12, 22),
+    schedule=ANALYTICS_REFRESH_SCHEDULE,
+    catchup=False,
+    max_active_runs=1,
+) as dag:
+
+    start_task = EmptyOperator(
+        task_id="start"
+    )
+
+    refresh_views = PythonOperator(
+        task_id="refresh_analytics_views",
+        python_callable=refresh_analytics_views
+    )
+
+    stop_task = EmptyOperator(
+        task_id='stop'
+    )
+
+start_task >> refresh_views >> stop_task
@@ -0,0 +1,44 @@
+"""Airflow Sales Partition Maintenance
+
+Defines the directed acyclic graph (DAG) that maintains the monthly partitions of the transactions and txn_details
+tables of the sales database (see database/setup.sql) via Airflow: partitions are created ahead of time, then the
+partitions past their retention are archived to Parquet and dropped (see plugins.partitions).
+
+Scheduled by PARTITION_MAINTENANCE_SCHEDULE in plugins.dataproc_config, one run at a time.
+"""
+from airflow import DAG
+from airflow.operators.empty import EmptyOperator
+from airflow.operators.python import PythonOperator
+
+from plugins.partitions import create_partitions, archive_partitions
+from plugins.dataproc_config import PARTITION_MAINTENANCE_SCHEDULE
+
+from datetime import datetime
+
+with DAG(
+    dag_id="sales_partition_maintenance_dag",
+    start_date=datetime(2022, 12, 22),
+    schedule=PARTITION_MAINTENANCE_SCHEDULE,
+    catchup=False,
+    max_active_runs=1,
+) as dag:
+
+    start_task = EmptyOperator(
+        task_id="start"
+    )
+
+    create_partitions_task = PythonOperator(
+        task_id="create_partitions",
+        python_callable=create_partitions
+    )
+
+    archive_partitions_task = PythonOperator(
+        task_id="archive_partitions",
+        python_callable=archive_partitions
+    )
+
+    stop_task = EmptyOperator(
+        task_id='stop'
+    )
+
+start_task >> create_partitions_task >> archive_partitions_task >> stop_task
@@ -0,0 +1,233 @@
+"""Members Database Loader
+
+Bulk-loads successful applications from the pipeline outputs into the members table of the sales
+database (see database/setup.sql).
+
+Each output file is read in batches of cfg.DB_LOAD_BATCH_SIZE rows. Every batch is copied into a
+temporary staging table, then upserted into members on member_id, so reruns over the same outputs
+leave the table unchanged. Each file is loaded in a single transaction.
+
+The database is set by cfg.SALES_DB_DSN:
+    - postgresql://...: PostgreSQL, loaded with COPY through a pooled connection (requires psycopg2).
+    - sqlite:///<path>: SQLite stand-in for local testing (members table is created if missing).
+
+The materialized views of the sales database (cfg.ANALYTICS_VIEWS) are refreshed with REFRESH MATERIALIZED
+VIEW CONCURRENTLY, so analytics queries keep reading the previous contents during a refresh.
+
+Public Functions (called in dags.data_pipeline and dags.sales_analytics_refresh modules):
+    - load_members
+    - refresh_analytics_views
+
+Private Functions:
+    - _load_members_file
+    - _get_connection
+    - _release_connection
+    - _copy_batch_postgres
+    - _copy_batch_sqlite
+"""
+import io
+import os
+import time
+import sqlite3
+import dataproc_config as cfg
+import outputs
+import summaries
+
+MEMBERS_COLUMNS = ["member_id","first_name","last_name","date_of_birth","email","mobile_no"]
+
+MEMBERS_DDL = """
+CREATE TABLE IF NOT EXISTS members (
+    member_id text PRIMARY KEY,
+    first_name text NOT NULL,
+    last_name text NOT NULL,
+    date_of_birth text NOT NULL,
+    email text NOT NULL,
+    mobile_no text NOT NULL
+)
+"""
+
+# upsert from staging table (DISTINCT ON so that no member_id is updated twice in one statement)
+UPSERT_POSTGRES = """
+INSERT INTO members ({columns})
+SELECT DISTINCT ON (member_id) {columns} FROM members_staging ORDER BY member_id
+ON CONFLICT (member_id) DO UPDATE SET {updates}
+"""
+UPSERT_SQLITE = """
+INSERT INTO members ({columns})
+SELECT {columns} FROM members_staging WHERE true
+ON CONFLICT (member_id) DO UPDATE SET {updates}
+"""
+
+# pooled PostgreSQL connections (created on first use)
+_POOL = None
+
+
+# =============================================
+# Public Functions
+# =============================================
+def load_members(ti=None, params=None, ingest_task_id="ingest_and_process"):
+    """Load successful applications into the members table.
+
+    Loads the successful outputs of the files processed in this DAG run (from the validation summaries
+    pushed by the ingest task), or every successful output if the "reload_members" DAG param is set or
+    there is no task instance.
+
+    Args:
+        ti (TaskInstance): Airflow task instance (passed in by Airflow). Defaults to None.
+        params (dict): DAG run params (passed in by Airflow). Defaults to None.
+        ingest_task_id (str): task ID of the task that pushed the validation summaries, e.g. ingest_and_process_data,
+            or the mapped check_file_validity task (one summary per file that passed). Defaults to "ingest_and_process".
+
+    Returns:
+        int: number of rows loaded.
+    """
+    summary_paths = None
+    if ti is not None and not (params or {}).get("reload_members", False):
+        # nothing is loaded if no summaries were pushed (e.g. every mapped task failed or was skipped)
+        summary_paths = ti.xcom_pull(task_ids=ingest_task_id, default=[])
+
+    if summary_paths is None:
+        filepaths = [
+            os.path.join(cfg.SUCCESS_DATA_DIR,filename) for filename in sorted(os.listdir(cfg.SUCCESS_DATA_DIR))
+            if filename.endswith(tuple(outputs.OUTPUT_EXTENSIONS.values()))
+        ]
+    else:
+        filepaths = [summaries.read_summary(path)["outputs"]["successful"]["path"] for path in summary_paths]
+
+    conn = _get_connection()
+    try:
+        num_rows = 0
+        for filepath in filepaths:
+            print("- load {} into members...".format(filepath))
+            num_rows += _load_members_file(conn, filepath)
+    finally:
+        _release_connection(conn)
+
+    print("Loaded {:d} rows from {:d} files into members.".format(num_rows, len(filepaths)))
+    return num_rows
+
+def refresh_analytics_views(ti=None, params=None):
+    """Refresh the materialized views of the sales database concurrently, each in its own transaction.
+
+    Args:
+        ti (TaskInstance): Airflow task instance (passed in by Airflow). Defaults to None.
+        params (dict): DAG run params (passed in by Airflow). Defaults to None.
+
+    Returns:
+        dict: refresh time (seconds) of each view (empty for SQLite, which has no materialized views).
+    """
+    conn = _get_connection()
+    try:
+        if isinstance(conn, sqlite3.Connection):
+            print("SQLite database has no materialized views to refresh.")
+            return {}
+
+        refresh_times = {}
+        for view in cfg.ANALYTICS_VIEWS:
+            started_at = time.perf_counter()
+            cur = conn.cursor()
+            try:
+                cur.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY {}".format(view))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+            refresh_times[view] = time.perf_counter() - started_at
+            print("- refreshed {} in {:.2f} s".format(view, refresh_times[view]))
+    finally:
+        _release_connection(conn)
+    return refresh_times
+
+
+# =============================================
+# Private Functions
+# =============================================
+def _load_members_file(conn, filepath):
+    """Load one successful applications output file into members, in a single transaction.
+
+    Args:
+        conn (connection): psycopg2 or sqlite3 connection.
+        filepath (str): path of the successful applications output file.
+
+    Returns:
+        int: number of rows loaded.
+    """
+    is_sqlite = isinstance(conn, sqlite3.Connection)
+    columns = ",".join(MEMBERS_COLUMNS)
+    updates = ",".join("{0} = EXCLUDED.{0}".format(col) for col in MEMBERS_COLUMNS[1:])
+    upsert = (UPSERT_SQLITE if is_sqlite else UPSERT_POSTGRES).format(columns=columns, updates=updates)
+
+    num_rows = 0
+    cur = conn.cursor()
+    try:
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS members_staging AS SELECT * FROM members WHERE false")
+        for df in outputs.iter_output(filepath, cfg.DB_LOAD_BATCH_SIZE):
+            df = df[MEMBERS_COLUMNS]
+            if is_sqlite:
+                _copy_batch_sqlite(cur, df)
+            else:
+                _copy_batch_postgres(cur, df)
+            cur.execute(upsert)
+            cur.execute("DELETE FROM members_staging")
+            num_rows += len(df)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    return num_rows
+
+def _copy_batch_postgres(cur, df):
+    """Copy a batch of rows into the staging table with COPY.
+
+    Args:
+        cur (cursor): psycopg2 cursor.
+        df (pandas dataframe): batch of rows with MEMBERS_COLUMNS.
+    """
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+    cur.copy_expert("COPY members_staging ({}) FROM STDIN WITH (FORMAT csv)".format(",".join(MEMBERS_COLUMNS)), buffer)
+
+def _copy_batch_sqlite(cur, df):
+    """Copy a batch of rows into the staging table (SQLite has no COPY, so executemany is used).
+
+    Args:
+        cur (cursor): sqlite3 cursor.
+        df (pandas dataframe): batch of rows with MEMBERS_COLUMNS.
+    """
+    cur.executemany(
+        "INSERT INTO members_staging ({}) VALUES ({})".format(",".join(MEMBERS_COLUMNS), ",".join("?"*len(MEMBERS_COLUMNS))),
+        df.itertuples(index=False, name=None),
+    )
+
+def _get_connection():
+    """Get a connection to the sales database at cfg.SALES_DB_DSN.
+
+    Returns:
+        connection: psycopg2 connection from the pool, or sqlite3 connection.
+    """
+    global _POOL
+    if cfg.SALES_DB_DSN.startswith("sqlite:///"):
+        conn = sqlite3.connect(cfg.SALES_DB_DSN[len("sqlite:///"):])
+        conn.execute(MEMBERS_DDL)
+        return conn
+
+    if _POOL is None:
+        from psycopg2.pool import ThreadedConnectionPool
+        _POOL = ThreadedConnectionPool(1, cfg.DB_POOL_SIZE, cfg.SALES_DB_DSN)
+    return _POOL.getconn()
+
+def _release_connection(conn):
+    """Return a connection to the pool (or close it, for SQLite).
+
+    Args:
+        conn (connection): connection from _get_connection.
+    """
+    if isinstance(conn, sqlite3.Connection):
+        conn.close()
+    else:
+        _POOL.putconn(conn)
@@ -0,0 +1,184 @@
+"""Input File Watcher
+
+Event-driven ingestion: waits for new raw application data files to arrive in cfg.INPUT_DATA_DIR, so
+that they are processed seconds after they are written instead of on the next hourly run.
+
+A file has arrived once it is a .csv file that is not recorded in the processing manifest (see manifest
+module), neither as processed nor as failed (a failed file is retried once its size or modification
+time changes), and it is fully written: its size and modification time have not changed for cfg.WATCH_DEBOUNCE
+seconds. Hidden files (e.g. ".applications.csv.part") are ignored, so writers can also write to a hidden
+temporary file and rename it when done. Bursts of files are batched: once the first file has arrived,
+files arriving within the next cfg.WATCH_BATCH_WINDOW seconds are processed with it, up to
+cfg.WATCH_MAX_BATCH files.
+
+The wait runs in the Airflow triggerer (FileArrivalTrigger), so it does not hold a worker slot. The
+directory is polled every cfg.WATCH_POKE_INTERVAL seconds rather than watched with inotify, which does
+not see changes made through Docker bind mounts on every host.
+
+Classes (used in dags.data_pipeline_watch module):
+    - FileArrivalSensor
+    - FileArrivalTrigger
+    - FileTracker
+
+Public Functions:
+    - pending_files
+"""
+import os
+import time
+import asyncio
+from airflow.sensors.base import BaseSensorOperator
+from airflow.triggers.base import BaseTrigger, TriggerEvent
+import dataproc_config as cfg
+import manifest
+
+
+class FileArrivalSensor(BaseSensorOperator):
+    """Waits (deferred to the triggerer) for new input files, and returns the names of a batch of arrived files.
+
+    The returned filenames are pushed to XCom, for ingest_and_process_data (see preprocess module).
+
+    Args:
+        directory (str): directory of the input files. Defaults to cfg.INPUT_DATA_DIR.
+        manifest_path (str): path of the processing manifest. Defaults to cfg.MANIFEST_PATH.
+        poke_interval (float): seconds between scans of the directory. Defaults to cfg.WATCH_POKE_INTERVAL.
+        debounce (float): seconds a file must be unchanged to be fully written. Defaults to cfg.WATCH_DEBOUNCE.
+        batch_window (float): seconds to wait for more files after the first. Defaults to cfg.WATCH_BATCH_WINDOW.
+        max_batch (int): maximum number of files in a batch. Defaults to cfg.WATCH_MAX_BATCH.
+    """
+    def __init__(self, directory=None, manifest_path=None, poke_interval=None, debounce=None, batch_window=None,
+                 max_batch=None, **kwargs):
+        poke_interval = cfg.WATCH_POKE_INTERVAL if poke_interval is None else poke_interval
+        super().__init__(poke_interval=poke_interval, **kwargs)
+        self.directory = directory or cfg.INPUT_DATA_DIR
+        self.manifest_path = manifest_path or cfg.MANIFEST_PATH
+        self.debounce = cfg.WATCH_DEBOUNCE if debounce is None else debounce
+        self.batch_window = cfg.WATCH_BATCH_WINDOW if batch_window is None else batch_window
+        self.max_batch = max_batch or cfg.WATCH_MAX_BATCH
+
+    def execute(self, context):
+        """Defer to FileArrivalTrigger until a batch of files has arrived."""
+        self.defer(
+            trigger=FileArrivalTrigger(
+                directory=self.directory,
+                manifest_path=self.manifest_path,
+                poke_interval=self.poke_interval,
+                debounce=self.debounce,
+                batch_window=self.batch_window,
+                max_batch=self.max_batch,
+            ),
+            method_name="execute_complete",
+        )
+
+    def execute_complete(self, context, event=None):
+        """Resume after FileArrivalTrigger fired.
+
+        Returns:
+            list: names of the arrived files.
+        """
+        filenames = event["filenames"]
+        self.log.info("Files arrived: %s", filenames)
+        return filenames
+
+
+class FileArrivalTrigger(BaseTrigger):
+    """Fires once a batch of new input files has been fully written (see module docstring).
+
+    Args:
+        directory (str): directory of the input files.
+        manifest_path (str): path of the processing manifest.
+        poke_interval (float): seconds between scans of the directory.
+        debounce (float): seconds a file must be unchanged to be fully written.
+        batch_window (float): seconds to wait for more files after the first.
+        max_batch (int): maximum number of files in a batch.
+    """
+    def __init__(self, directory, manifest_path, poke_interval, debounce, batch_window, max_batch):
+        super().__init__()
+        self.directory = directory
+        self.manifest_path = manifest_path
+        self.poke_interval = poke_interval
+        self.debounce = debounce
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+
+    def serialize(self):
+        # the plugins folder is on sys.path of every Airflow component, including the triggerer
+        return ("file_watch.FileArrivalTrigger", {
+            "directory": self.directory,
+            "manifest_path": self.manifest_path,
+            "poke_interval": self.poke_interval,
+            "debounce": self.debounce,
+            "batch_window": self.batch_window,
+            "max_batch": self.max_batch,
+        })
+
+    async def run(self):
+        tracker = FileTracker(self.directory, self.manifest_path, self.debounce)
+        first_arrived_at = None
+        while True:
+            # scan in a thread: checking the manifest may hash a file whose modification time changed
+            arrived = await asyncio.to_thread(tracker.scan)
+            if arrived and first_arrived_at is None:
+                first_arrived_at = time.monotonic()
+            if arrived and (len(arrived) >= self.max_batch or time.monotonic()-first_arrived_at >= self.batch_window):
+                yield TriggerEvent({"filenames": arrived[:self.max_batch]})
+                return
+            await asyncio.sleep(self.poke_interval)
+
+
+class FileTracker:
+    """Tracks the pending files of a directory across scans, to find the files that are fully written.
+
+    Args:
+        directory (str): directory of the input files.
+        manifest_path (str): path of the processing manifest.
+        debounce (float): seconds a file must be unchanged to be fully written.
+    """
+    def __init__(self, directory, manifest_path, debounce):
+        self.directory = directory
+        self.manifest_path = manifest_path
+        self.debounce = debounce
+        # (size, mtime_ns) of each pending file, and when it was first seen with them
+        self._seen = {}
+
+    def scan(self):
+        """Scan the directory for pending files.
+
+        Returns:
+            list: names of the pending files that are fully written, in order of arrival.
+        """
+        now = time.monotonic()
+        pending = pending_files(self.directory, manifest.Manifest(self.manifest_path))
+        seen = {}
+        for filename, stat_key in pending.items():
+            previous = self._seen.get(filename)
+            seen[filename] = previous if previous is not None and previous[0] == stat_key else (stat_key, now)
+        self._seen = seen
+        arrived = [filename for filename, (stat_key, since) in seen.items()
+                   if stat_key[0] > 0 and now-since >= self.debounce]
+        return sorted(arrived, key=lambda filename: seen[filename][1])
+
+
+def pending_files(directory, processing_manifest):
+    """Get the input files that have not been processed or failed to be processed (or have changed since).
+
+    Args:
+        directory (str): directory of the input files.
+        processing_manifest (manifest.Manifest): processing manifest.
+
+    Returns:
+        dict: (size, mtime_ns) of each pending .csv file, by filename.
+    """
+    pending = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.name.endswith(".csv") or not entry.is_file():
+                continue
+            try:
+                if processing_manifest.is_processed(entry.name, entry.path) or processing_manifest.is_failed(entry.name, entry.path):
+                    continue
+                stat = entry.stat()
+            except FileNotFoundError:
+                # removed or renamed since the directory was listed
+                continue
+            pending[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    return pending
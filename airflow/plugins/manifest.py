@@ -0,0 +1,197 @@
+"""Processing Manifest
+
+Persistent record of the raw application data files that have been processed, used to skip files
+that have not changed since they were last processed.
+
+Each entry records the input file's name, size, modification time and SHA256 content hash, along with
+its output files and when it was processed. Files that failed to be processed are recorded with their
+size, modification time and error instead, so that the watch-mode DAG (see file_watch module) does not
+retry them until they change. The manifest is a JSON file that is updated under a file
+lock and replaced atomically, so concurrent writers and interrupted runs cannot corrupt it.
+
+Classes (used in preprocess module):
+    - Manifest
+
+Public Functions:
+    - fingerprint
+    - stat_fingerprint
+"""
+import os
+import json
+import fcntl
+import hashlib
+import contextlib
+from datetime import datetime, timezone
+
+HASH_BLOCK_SIZE = 1024**2
+
+
+class Manifest:
+    """Processing manifest stored as a JSON file.
+
+    Args:
+        filepath (str): path of the manifest JSON file (created on first update).
+    """
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._entries = None
+
+    def entries(self, reload=False):
+        """Load all manifest entries (cached after the first load).
+
+        Args:
+            reload (bool): reload entries from the manifest file. Defaults to False.
+
+        Returns:
+            dict: manifest entry of each processed input filename.
+        """
+        if self._entries is None or reload:
+            if os.path.exists(self.filepath):
+                with open(self.filepath) as f:
+                    self._entries = json.load(f)
+            else:
+                self._entries = {}
+        return self._entries
+
+    def is_processed(self, filename, filepath):
+        """Check if an input file has been processed before and has not changed since.
+
+        The file is unchanged if its size and modification time match the manifest entry. If only the
+        modification time differs (e.g. the file was copied again), its content hash is compared instead,
+        and if it matches the new modification time is recorded, so that the file is not hashed again on
+        the next check (e.g. the next poll of the watch-mode DAG). Files whose outputs are missing are
+        treated as not processed.
+
+        Args:
+            filename (str): name of the input file.
+            filepath (str): path of the input file.
+
+        Returns:
+            bool: True if the input file does not need to be processed again, else False.
+        """
+        entry = self.entries().get(filename)
+        if entry is None or "failed_at" in entry:
+            return False
+        if not all(os.path.exists(output) for output in entry["outputs"]):
+            return False
+
+        stat = os.stat(filepath)
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime == entry["mtime"]:
+            return True
+        file_fingerprint = fingerprint(filepath)
+        if file_fingerprint["sha256"] != entry["sha256"]:
+            return False
+        self._update_mtime(filename, file_fingerprint)
+        return True
+
+    def is_failed(self, filename, filepath):
+        """Check if an input file failed to be processed and has not changed since.
+
+        The file is unchanged if its size and modification time match the failure entry.
+
+        Args:
+            filename (str): name of the input file.
+            filepath (str): path of the input file.
+
+        Returns:
+            bool: True if the input file failed to be processed and has not changed since, else False.
+        """
+        entry = self.entries().get(filename)
+        if entry is None or "failed_at" not in entry:
+            return False
+        return stat_fingerprint(filepath) == {"size": entry["size"], "mtime": entry["mtime"]}
+
+    def record(self, filename, file_fingerprint, outputs):
+        """Record that an input file has been processed.
+
+        Args:
+            filename (str): name of the input file.
+            file_fingerprint (dict): size, mtime and sha256 of the input file when it was processed (see fingerprint).
+            outputs (list): paths of the output files produced from the input file.
+        """
+        self._update(filename, dict(
+            name=filename,
+            **file_fingerprint,
+            outputs=list(outputs),
+            processed_at=datetime.now(timezone.utc).isoformat(),
+        ))
+
+    def record_failure(self, filename, file_stat, error):
+        """Record that an input file failed to be processed (replacing any earlier entry of the file).
+
+        Args:
+            filename (str): name of the input file.
+            file_stat (dict): size and mtime of the input file before it was processed (see stat_fingerprint).
+            error (str): error message or traceback of the failure.
+        """
+        self._update(filename, dict(
+            name=filename,
+            **file_stat,
+            error=error,
+            failed_at=datetime.now(timezone.utc).isoformat(),
+        ))
+
+    def _update(self, filename, entry):
+        """Replace the entry of an input file in the manifest file."""
+        with self._lock():
+            entries = self.entries(reload=True)
+            entries[filename] = entry
+            self._write(entries)
+
+    def _update_mtime(self, filename, file_fingerprint):
+        """Record the new modification time of an unchanged processed input file (unless its entry was replaced since)."""
+        with self._lock():
+            entries = self.entries(reload=True)
+            entry = entries.get(filename)
+            if entry is None or "failed_at" in entry or entry["sha256"] != file_fingerprint["sha256"]:
+                return
+            entry["mtime"] = file_fingerprint["mtime"]
+            self._write(entries)
+
+    def _write(self, entries):
+        """Write all entries to the manifest file (atomically, with the lock held)."""
+        tmp_filepath = self.filepath + ".tmp"
+        with open(tmp_filepath, "w") as f:
+            json.dump(entries, f, indent=2, sort_keys=True)
+        os.replace(tmp_filepath, self.filepath)
+
+    @contextlib.contextmanager
+    def _lock(self):
+        """Exclusive lock on the manifest for read-modify-write updates."""
+        with open(self.filepath + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def fingerprint(filepath):
+    """Get the size, modification time and SHA256 content hash of a file.
+
+    Args:
+        filepath (str): path of the file.
+
+    Returns:
+        dict: size (bytes), mtime (seconds since epoch) and sha256 (hex digest) of the file.
+    """
+    file_stat = stat_fingerprint(filepath)
+    sha256 = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            sha256.update(block)
+    return {**file_stat, "sha256": sha256.hexdigest()}
+
+def stat_fingerprint(filepath):
+    """Get the size and modification time of a file.
+
+    Args:
+        filepath (str): path of the file.
+
+    Returns:
+        dict: size (bytes) and mtime (seconds since epoch) of the file.
+    """
+    stat = os.stat(filepath)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
@@ -0,0 +1,228 @@
+"""Member ID Index
+
+Persistent index of issued member IDs, used to detect and resolve member ID collisions.
+
+A base member ID (<last_name>_<first 5 digits of SHA256(date_of_birth)>) only has 16^5 values per
+last name, so different applicants can share one. Each applicant is identified by their last name,
+date of birth, first name and email. The first applicant issued a base ID keeps it; every other
+applicant with the same base ID gets <base_id>-<n>, where n counts the applicants issued that base ID
+before them. Applicants already in the index always get back their issued member ID, so reprocessing
+a file gives the same member IDs.
+
+New applicants are numbered once per batch, in sorted order of (base ID, identity), so the result does
+not depend on row order. The preprocess module uses one batch per input file (see MemberIdBatch): the
+applicants of every chunk are staged, and numbered together once the whole file has been read, so a
+file gets the same member IDs whether it is processed whole, in streaming mode or in parallel chunks.
+
+Limitation: across files, the numbering follows the order in which their batches are committed. When
+files are processed in parallel (e.g. mapped tasks, or several DAG runs), applicants new in different
+files that share a base ID are numbered in whichever order their files reach the index, so which of
+them keeps the base ID, and the suffixes of the others, can differ between two fresh runs over the
+same files. Once issued, a member ID never changes.
+
+The index is a SQLite database. A batch is staged in a temporary table (on disk, so its memory does
+not grow with the file), and numbered and recorded with set-based SQL in one write transaction, so
+parallel workers can share the index.
+
+Classes (used in preprocess module):
+    - MemberIndex
+    - MemberIdBatch
+"""
+import sqlite3
+import contextlib
+import pandas as pd
+
+INDEX_DDL = [
+    """CREATE TABLE IF NOT EXISTS issued (
+        member_id text PRIMARY KEY,
+        base_id text NOT NULL,
+        identity text NOT NULL UNIQUE
+    )""",
+    "CREATE INDEX IF NOT EXISTS issued_base_id ON issued (base_id)",
+]
+
+IDENTITY_COLUMNS = ["last_name","date_of_birth","first_name","email"]
+
+
+class MemberIndex:
+    """Index of issued member IDs stored in a SQLite database.
+
+    Args:
+        filepath (str): path of the SQLite database (created if it does not exist).
+        timeout (float): seconds to wait for other writers to release the database. Defaults to 300.
+    """
+    def __init__(self, filepath, timeout=300):
+        self.filepath = filepath
+        self.timeout = timeout
+        with contextlib.closing(self._connect()) as conn:
+            for ddl in INDEX_DDL:
+                conn.execute(ddl)
+
+    def assign(self, df, base_ids):
+        """Assign collision-free member IDs to a batch of applicants (see MemberIdBatch).
+
+        Args:
+            df (pandas dataframe): applicants, with IDENTITY_COLUMNS.
+            base_ids (pandas series): base member ID of each applicant (same index as df).
+
+        Returns:
+            tuple: member ID of each applicant (pandas series, same index as df), and collision statistics (dict)
+                with the number of rows, existing and new applicants, and new applicants given a suffixed member ID.
+        """
+        with self.batch() as batch:
+            batch.add(df, base_ids)
+            stats = batch.assign()
+            return batch.member_ids(df), stats
+
+    def batch(self):
+        """Start a batch of applicants, staged over several calls and numbered together (see MemberIdBatch).
+
+        Returns:
+            MemberIdBatch: batch, to use as a context manager.
+        """
+        return MemberIdBatch(self._connect())
+
+    def collision_report(self):
+        """Check the whole index for collisions in bulk.
+
+        Returns:
+            dict: number of issued member IDs, base IDs shared by more than one applicant, and applicants given a suffixed member ID.
+        """
+        with contextlib.closing(self._connect()) as conn:
+            num_issued, num_suffixed = conn.execute("SELECT COUNT(*), SUM(member_id != base_id) FROM issued").fetchone()
+            num_shared = conn.execute(
+                "SELECT COUNT(*) FROM (SELECT base_id FROM issued GROUP BY base_id HAVING COUNT(*) > 1)").fetchone()[0]
+        return {"num_issued": num_issued, "num_shared_base_ids": num_shared, "num_collisions": num_suffixed or 0}
+
+    def _connect(self):
+        """Open a connection to the index (transactions are managed explicitly)."""
+        return sqlite3.connect(self.filepath, timeout=self.timeout, isolation_level=None)
+
+
+class MemberIdBatch:
+    """Batch of applicants whose new member IDs are numbered together, in sorted order of (base ID, identity).
+
+    Use as a context manager: add the applicants of each chunk, assign once all are added, then look up
+    the member IDs of each chunk, e.g.
+        with MemberIndex(filepath).batch() as batch:
+            for df, base_ids in chunks:
+                batch.add(df, base_ids)
+            stats = batch.assign()
+            member_ids = batch.member_ids(df)
+
+    Args:
+        conn (sqlite3 connection): connection to the index (closed with the batch).
+    """
+    def __init__(self, conn):
+        self.conn = conn
+        self.num_rows = 0
+        conn.execute("PRAGMA temp_store = FILE")
+        conn.execute("""CREATE TEMP TABLE batch (
+            identity text PRIMARY KEY,
+            base_id text NOT NULL,
+            member_id text,
+            new integer NOT NULL DEFAULT 0
+        )""")
+        conn.execute("CREATE TEMP TABLE lookup (identity text NOT NULL)")
+
+    def add(self, df, base_ids):
+        """Stage applicants (applicants already staged are ignored).
+
+        Args:
+            df (pandas dataframe): applicants, with IDENTITY_COLUMNS.
+            base_ids (pandas series): base member ID of each applicant (same index as df).
+        """
+        batch = pd.DataFrame({"identity": _identity(df), "base_id": base_ids})
+        with self._transaction():
+            self.conn.executemany("INSERT OR IGNORE INTO batch (identity, base_id) VALUES (?, ?)",
+                                  batch.itertuples(index=False, name=None))
+        self.num_rows += len(df)
+
+    def assign(self):
+        """Look up the member IDs of staged applicants in the index, and issue member IDs to the new ones.
+
+        Returns:
+            dict: collision statistics, with the number of rows added, existing and new applicants, and new
+                applicants given a suffixed member ID.
+        """
+        conn = self.conn
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("""UPDATE batch SET member_id = (SELECT member_id FROM issued WHERE issued.identity = batch.identity)""")
+            # n = applicants issued the base ID before + rank of the applicant among the new ones with that base ID
+            conn.execute("""INSERT INTO issued (member_id, base_id, identity)
+                SELECT CASE WHEN n = 0 THEN base_id ELSE base_id || '-' || n END, base_id, identity FROM (
+                    SELECT b.base_id, b.identity,
+                        ROW_NUMBER() OVER (PARTITION BY b.base_id ORDER BY b.identity) - 1
+                            + (SELECT COUNT(*) FROM issued i WHERE i.base_id = b.base_id) AS n
+                    FROM batch b WHERE b.member_id IS NULL
+                )""")
+            conn.execute("""UPDATE batch SET new = 1, member_id = (SELECT member_id FROM issued WHERE issued.identity = batch.identity)
+                WHERE member_id IS NULL""")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        num_existing, num_new, num_suffixed = conn.execute(
+            "SELECT COALESCE(SUM(new = 0), 0), COALESCE(SUM(new), 0), COALESCE(SUM(new AND member_id != base_id), 0) FROM batch").fetchone()
+        return {
+            "num_rows": self.num_rows,
+            "num_existing": num_existing,
+            "num_new": num_new,
+            "num_collisions": num_suffixed,
+        }
+
+    def member_ids(self, df):
+        """Get the member IDs of staged applicants (after assign).
+
+        Args:
+            df (pandas dataframe): applicants, with IDENTITY_COLUMNS.
+
+        Returns:
+            pandas series: member ID of each applicant (same index as df).
+        """
+        identity = _identity(df)
+        with self._transaction():
+            self.conn.execute("DELETE FROM lookup")
+            self.conn.executemany("INSERT INTO lookup VALUES (?)", ((value,) for value in identity.tolist()))
+            rows = self.conn.execute(
+                "SELECT b.identity, b.member_id FROM batch b WHERE b.identity IN (SELECT identity FROM lookup)").fetchall()
+        member_ids = pd.Series(dict(rows), dtype=object)
+        return identity.map(member_ids)
+
+    def close(self):
+        """Drop the staged applicants."""
+        self.conn.close()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Transaction on the staging tables (the connection is in autocommit mode)."""
+        self.conn.execute("BEGIN")
+        try:
+            yield
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+def _identity(df):
+    """Get the identity of each applicant: their IDENTITY_COLUMNS joined with "|".
+
+    Args:
+        df (pandas dataframe): applicants, with IDENTITY_COLUMNS.
+
+    Returns:
+        pandas series: identity of each applicant (same index as df).
+    """
+    identity = df[IDENTITY_COLUMNS[0]].astype(str)
+    for col in IDENTITY_COLUMNS[1:]:
+        identity = identity + "|" + df[col].astype(str)
+    return identity
@@ -0,0 +1,108 @@
+"""Memoization Helpers
+
+Bounded caches for per-value computations that repeat across rows (e.g. the same date of birth
+string appearing for many applicants), so each distinct value is only computed once per run.
+
+Classes (used in preprocess module):
+    - LRUCache
+
+Public Functions:
+    - memoized_map
+"""
+import collections
+import numpy as np
+import pandas as pd
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Bounded mapping with least-recently-used eviction and hit/miss counters.
+
+    Args:
+        maxsize (int): maximum number of entries kept.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = collections.OrderedDict()
+
+    def get(self, key, default=None):
+        """Get a cached value and mark it as recently used.
+
+        Args:
+            key (hashable): cache key.
+            default (object): returned if key is not cached. Defaults to None.
+
+        Returns:
+            object: cached value, or default.
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Cache a value, evicting the least recently used entry if the cache is full.
+
+        Args:
+            key (hashable): cache key.
+            value (object): value to cache.
+        """
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries and reset the hit/miss counters."""
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __str__(self):
+        lookups = self.hits + self.misses
+        return "{:d} hits, {:d} misses ({:.2f}% hit rate), {:d} entries".format(
+            self.hits, self.misses, self.hits/lookups*100 if lookups else 0.0, len(self))
+
+
+def memoized_map(values, func, cache):
+    """Map a series through a function, computing each distinct value at most once.
+
+    The series is factorized into its distinct values. Values already in the cache are reused, the
+    rest are computed in a single call of func, cached, and the results are mapped back to every row.
+    Null values are not cached, and are passed to func as is.
+
+    Args:
+        values (pandas series): input values.
+        func (function): maps a pandas series of values to a pandas series of results (same length and order).
+        cache (LRUCache): cache of results from earlier calls.
+
+    Returns:
+        pandas series: result for each row of values.
+    """
+    codes, uniques = pd.factorize(values)
+    keys = list(uniques)
+    results = [cache.get(key, _MISSING) for key in keys]
+
+    missing = [i for i, result in enumerate(results) if result is _MISSING]
+    if missing:
+        computed = func(pd.Series([keys[i] for i in missing], dtype=object))
+        for i, result in zip(missing, computed.tolist()):
+            results[i] = result
+            cache.put(keys[i], result)
+
+    # null values have code -1, which picks the placeholder at the end of the results
+    mapped = pd.Series(np.array(results + [None], dtype=object)[codes], index=values.index, dtype=object)
+    null_mask = codes == -1
+    if null_mask.any():
+        mapped[null_mask] = func(values[null_mask]).to_numpy(dtype=object)
+    return mapped.infer_objects()
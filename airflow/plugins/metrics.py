@@ -0,0 +1,240 @@
+"""Pipeline Metrics
+
+Per-stage instrumentation of the data pipeline, to see where time and memory go and to track
+regressions across runs.
+
+Each stage of processing a file (e.g. read, clean, validate, member_id, write) records its wall time,
+rows in and out, rows/sec and, if cfg.METRICS_TRACEMALLOC is set, the peak memory allocated during the
+stage as traced by tracemalloc (slower). A stage that runs once per chunk accumulates over the chunks.
+The peak resident set size of the process (ru_maxrss) cannot be attributed to a stage, as it only ever
+grows: it is reported per file (the peak of the process so far) and per run.
+
+The metrics of a run are written as JSON to cfg.METRICS_DATA_DIR (see write_run_metrics), and can be
+profiled with cProfile (see profiled).
+
+Classes (used in preprocess module):
+    - FileMetrics
+
+Public Functions:
+    - write_run_metrics
+    - send_stats
+    - traced
+    - profiled
+"""
+import os
+import json
+import time
+import cProfile
+import resource
+import tracemalloc
+import contextlib
+from datetime import datetime, timezone
+import dataproc_config as cfg
+
+
+class FileMetrics:
+    """Accumulates the per-stage metrics of processing one input file.
+
+    Use stage as a context manager around each stage, setting the rows out on the yielded run, e.g.
+        with file_metrics.stage("clean", rows_in=len(df)) as run:
+            df = _clean_data(df)
+            run.rows_out = len(df)
+
+    Args:
+        filename (str): name of the raw application data file.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.stages = {}
+        self._started_at = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name, rows_in=0):
+        """Time one run of a stage (context manager).
+
+        Args:
+            name (str): name of the stage.
+            rows_in (int): number of rows into the stage. Defaults to 0.
+
+        Yields:
+            StageRun: run of the stage, whose rows_out is set by the caller (defaults to rows_in).
+        """
+        run = StageRun(rows_in)
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        started_at = time.perf_counter()
+        try:
+            yield run
+        finally:
+            wall_time = time.perf_counter() - started_at
+            peak_traced = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+            self._add(name, run, wall_time, peak_traced)
+
+    def iter_stage(self, name, iterable):
+        """Time reading each item of an iterable (e.g. chunks of a csv reader) as runs of a stage.
+
+        Args:
+            name (str): name of the stage.
+            iterable (iterable): items to read, with len() the number of rows of each item.
+
+        Yields:
+            object: each item of iterable.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name) as run:
+                item = next(iterator, None)
+                run.rows_out = len(item) if item is not None else 0
+            if item is None:
+                return
+            yield item
+
+    def merge_stages(self, stages):
+        """Add the stage metrics recorded for part of the file elsewhere (e.g. a chunk in a worker process).
+
+        Args:
+            stages (dict): stages of another FileMetrics.
+        """
+        for name, other in stages.items():
+            stage = self.stages.setdefault(name, dict(other, calls=0, wall_time_s=0.0, rows_in=0, rows_out=0))
+            for key in ["calls","wall_time_s","rows_in","rows_out"]:
+                stage[key] += other[key]
+            if other["peak_traced_mb"] is not None:
+                stage["peak_traced_mb"] = max(stage["peak_traced_mb"] or 0.0, other["peak_traced_mb"])
+
+    def to_dict(self):
+        """Get the metrics of the file.
+
+        Returns:
+            dict: filename, total wall time, rows read, peak RSS of the process so far and the metrics of each stage.
+        """
+        stages = {}
+        for name, stage in self.stages.items():
+            stages[name] = dict(stage, rows_per_sec=_rows_per_sec(stage))
+        read = self.stages.get("read", {})
+        return {
+            "filename": self.filename,
+            "wall_time_s": time.perf_counter() - self._started_at,
+            "rows_in": read.get("rows_out", 0),
+            "peak_rss_mb": _peak_rss_mb(),
+            "stages": stages,
+        }
+
+    def _add(self, name, run, wall_time, peak_traced):
+        """Add a run of a stage to its accumulated metrics."""
+        stage = self.stages.setdefault(name, {
+            "calls": 0, "wall_time_s": 0.0, "rows_in": 0, "rows_out": 0, "peak_traced_mb": None,
+        })
+        stage["calls"] += 1
+        stage["wall_time_s"] += wall_time
+        stage["rows_in"] += int(run.rows_in)
+        stage["rows_out"] += int(run.rows_in if run.rows_out is None else run.rows_out)
+        if peak_traced is not None:
+            stage["peak_traced_mb"] = max(stage["peak_traced_mb"] or 0.0, peak_traced/1024**2)
+
+
+class StageRun:
+    """Rows into and out of one run of a stage (see FileMetrics.stage).
+
+    Args:
+        rows_in (int): number of rows into the stage.
+    """
+    def __init__(self, rows_in):
+        self.rows_in = rows_in
+        self.rows_out = None
+
+
+def write_run_metrics(file_metrics, run_id=None):
+    """Write the metrics of the files processed in a run as JSON to cfg.METRICS_DATA_DIR.
+
+    Args:
+        file_metrics (list): metrics of each processed file (see FileMetrics.to_dict).
+        run_id (str): ID of the run, used in the filename. Defaults to None (the current UTC time).
+
+    Returns:
+        tuple: path of the metrics file and the run metrics (dict).
+    """
+    created_at = datetime.now(timezone.utc)
+    run_id = run_id or created_at.strftime("%Y%m%dT%H%M%S")
+    stages = {}
+    for metrics in file_metrics:
+        for name, stage in metrics["stages"].items():
+            total = stages.setdefault(name, {"wall_time_s": 0.0, "rows_in": 0, "rows_out": 0, "peak_traced_mb": None})
+            for key in ["wall_time_s","rows_in","rows_out"]:
+                total[key] += stage[key]
+            if stage["peak_traced_mb"] is not None:
+                total["peak_traced_mb"] = max(total["peak_traced_mb"] or 0.0, stage["peak_traced_mb"])
+    for total in stages.values():
+        total["rows_per_sec"] = _rows_per_sec(total)
+
+    run_metrics = {
+        "run_id": run_id,
+        "created_at": created_at.isoformat(),
+        "num_files": len(file_metrics),
+        "rows_in": sum(metrics["rows_in"] for metrics in file_metrics),
+        "wall_time_s": sum(metrics["wall_time_s"] for metrics in file_metrics),
+        "peak_rss_mb": max([metrics["peak_rss_mb"] for metrics in file_metrics], default=_peak_rss_mb()),
+        "stages": stages,
+        "files": file_metrics,
+    }
+    os.makedirs(cfg.METRICS_DATA_DIR, exist_ok=True)
+    filepath = os.path.join(cfg.METRICS_DATA_DIR, "metrics_{}.json".format(run_id.replace(":","").replace("/","_")))
+    with open(filepath, "w") as f:
+        json.dump(run_metrics, f, indent=2)
+    return filepath, run_metrics
+
+def send_stats(run_metrics, prefix="data_pipeline"):
+    """Send the stage totals of a run to Airflow's metrics (StatsD, if enabled in the Airflow config).
+
+    Args:
+        run_metrics (dict): run metrics (see write_run_metrics).
+        prefix (str): prefix of the metric names. Defaults to "data_pipeline".
+    """
+    from airflow.stats import Stats
+    for name, stage in run_metrics["stages"].items():
+        Stats.timing("{}.{}.wall_time_ms".format(prefix, name), stage["wall_time_s"]*1000)
+        Stats.gauge("{}.{}.rows_in".format(prefix, name), stage["rows_in"])
+        if stage["rows_per_sec"] is not None:
+            Stats.gauge("{}.{}.rows_per_sec".format(prefix, name), stage["rows_per_sec"])
+    Stats.gauge("{}.peak_rss_mb".format(prefix), run_metrics["peak_rss_mb"])
+
+@contextlib.contextmanager
+def traced():
+    """Trace memory allocations with tracemalloc if cfg.METRICS_TRACEMALLOC is set (context manager)."""
+    if not cfg.METRICS_TRACEMALLOC or tracemalloc.is_tracing():
+        yield
+        return
+    tracemalloc.start()
+    try:
+        yield
+    finally:
+        tracemalloc.stop()
+
+@contextlib.contextmanager
+def profiled(filepath=None):
+    """Profile a block with cProfile and dump the stats to a file (context manager).
+
+    Args:
+        filepath (str): path of the stats file (view with pstats or snakeviz). Defaults to None (not profiled).
+    """
+    if filepath is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        profiler.dump_stats(filepath)
+        print("- profile written to {}".format(filepath))
+
+def _rows_per_sec(stage):
+    """Get the throughput of a stage, in rows in (or rows out, for stages that only produce rows such as read) per second."""
+    rows = stage["rows_in"] or stage["rows_out"]
+    return rows/stage["wall_time_s"] if stage["wall_time_s"] else None
+
+def _peak_rss_mb():
+    """Get the peak resident set size of this process (MB)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss/1024
@@ -0,0 +1,204 @@
+"""Output Files
+
+Writing and reading of the successful and failed applications output files, in the format set by
+cfg.OUTPUT_FORMAT:
+    - "csv": all columns as text, as in the original outputs.
+    - "parquet": columnar, compressed with cfg.PARQUET_COMPRESSION, with explicit column types
+      (date_of_birth as a date, above_18 as a boolean, the rest as strings).
+
+Parquet support requires pyarrow, which is only imported when the parquet format is used.
+
+Classes (used in preprocess module):
+    - OutputWriter
+
+Public Functions:
+    - output_filename
+    - read_output
+    - iter_output
+"""
+import io
+import os
+import pandas as pd
+import dataproc_config as cfg
+
+OUTPUT_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet"}
+
+# column types of the parquet outputs (names of pyarrow type factories)
+PARQUET_TYPES = {
+    "member_id": "string",
+    "first_name": "string",
+    "last_name": "string",
+    "email": "string",
+    "date_of_birth": "date32",
+    "mobile_no": "string",
+    "above_18": "bool_",
+}
+
+
+class OutputWriter:
+    """Writes an output file, either in one go or one processed chunk at a time.
+
+    Use as a context manager so that the file is completed when done, e.g.
+        with OutputWriter(filepath, columns) as writer:
+            writer.write(df)
+
+    Args:
+        filepath (str): path of the output file (overwritten if it exists).
+        columns (list): output columns, in order.
+        output_format (str): "csv" or "parquet". Defaults to cfg.OUTPUT_FORMAT.
+    """
+    def __init__(self, filepath, columns, output_format=None):
+        self.filepath = filepath
+        self.columns = columns
+        self.output_format = output_format or cfg.OUTPUT_FORMAT
+        self.num_rows = 0
+        if self.output_format == "csv":
+            self._parquet_writer = None
+            pd.DataFrame(columns=columns).to_csv(filepath, index=False)
+        elif self.output_format == "parquet":
+            import pyarrow.parquet as pq
+            self._parquet_writer = pq.ParquetWriter(filepath, _parquet_schema(columns), compression=cfg.PARQUET_COMPRESSION)
+        else:
+            raise ValueError("Invalid output format: {}".format(self.output_format))
+
+    def write(self, df, read_back=False):
+        """Append the output columns of processed application data.
+
+        Args:
+            df (pandas dataframe): processed application data (not copied if it only has the output columns, in order).
+            read_back (bool): also return the written rows as read_output reads them back. Defaults to False.
+
+        Returns:
+            pandas dataframe: the written rows with the dtypes and values of read_output (e.g. empty strings
+                as NaN in csv outputs) if read_back is set, else None.
+        """
+        if list(df.columns) != self.columns:
+            df = df[self.columns]
+        written = None
+        if self._parquet_writer is None:
+            if read_back:
+                # serialize once, and parse the same text as read_output would
+                buffer = io.StringIO()
+                df.to_csv(buffer, header=False, index=False)
+                with open(self.filepath, "a", newline="") as f:
+                    f.write(buffer.getvalue())
+                buffer.seek(0)
+                written = pd.read_csv(buffer, header=None, names=self.columns, dtype=str) if len(df) > 0 else df.astype(str)
+            else:
+                df.to_csv(self.filepath, mode="a", header=False, index=False)
+        else:
+            table = _to_arrow(df, self.columns)
+            self._parquet_writer.write_table(table)
+            if read_back:
+                written = _from_parquet(table.to_pandas())
+        self.num_rows += len(df)
+        return written
+
+    def close(self):
+        """Complete the output file."""
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+def output_filename(prefix, filename, output_format=None):
+    """Get the name of an output file for a raw application data file.
+
+    Args:
+        prefix (str): "successful" or "failed".
+        filename (str): name of the raw application data file (.csv).
+        output_format (str): "csv" or "parquet". Defaults to cfg.OUTPUT_FORMAT.
+
+    Returns:
+        str: output filename, e.g. successful_applications_dataset_1.parquet
+    """
+    name = os.path.splitext(filename)[0]
+    return "{}_{}{}".format(prefix, name, OUTPUT_EXTENSIONS[output_format or cfg.OUTPUT_FORMAT])
+
+def read_output(filepath):
+    """Read an output file in either format, with all columns as strings as in the csv outputs.
+
+    Args:
+        filepath (str): path of the output file (.csv or .parquet).
+
+    Returns:
+        pandas dataframe: output data.
+    """
+    if filepath.endswith(OUTPUT_EXTENSIONS["parquet"]):
+        return _from_parquet(pd.read_parquet(filepath))
+    return pd.read_csv(filepath, dtype=str)
+
+def iter_output(filepath, batch_size):
+    """Read an output file in either format in batches of rows (see read_output).
+
+    Args:
+        filepath (str): path of the output file (.csv or .parquet).
+        batch_size (int): maximum number of rows per batch.
+
+    Yields:
+        pandas dataframe: batch of output data.
+    """
+    if filepath.endswith(OUTPUT_EXTENSIONS["parquet"]):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(filepath).iter_batches(batch_size=batch_size):
+            yield _from_parquet(batch.to_pandas())
+    else:
+        yield from pd.read_csv(filepath, dtype=str, chunksize=batch_size)
+
+
+# =============================================
+# Private Functions
+# =============================================
+def _from_parquet(df):
+    """Convert output data read from parquet to the string date of birth format of the csv outputs.
+
+    Args:
+        df (pandas dataframe): output data read from parquet.
+
+    Returns:
+        pandas dataframe: output data with date_of_birth in YYYYMMDD format.
+    """
+    if "date_of_birth" in df.columns:
+        df["date_of_birth"] = pd.to_datetime(df["date_of_birth"]).dt.strftime("%Y%m%d")
+    return df
+
+def _parquet_schema(columns):
+    """Get the pyarrow schema of the output columns.
+
+    Args:
+        columns (list): output columns, in order.
+
+    Returns:
+        pyarrow schema: schema of the parquet output file.
+    """
+    import pyarrow as pa
+    return pa.schema([(col, getattr(pa, PARQUET_TYPES[col])()) for col in columns])
+
+def _to_arrow(df, columns):
+    """Convert the output columns of processed application data to a pyarrow table with the output column types.
+
+    Args:
+        df (pandas dataframe): processed application data.
+        columns (list): output columns, in order.
+
+    Returns:
+        pyarrow table: output data.
+    """
+    import pyarrow as pa
+    schema = _parquet_schema(columns)
+    arrays = []
+    for col in columns:
+        if col == "date_of_birth":
+            values = pd.to_datetime(df[col], format="%Y%m%d").to_numpy().astype("datetime64[D]")
+        elif col == "above_18":
+            values = df[col].to_numpy(dtype=bool)
+        else:
+            values = df[col]
+        arrays.append(pa.array(values, type=schema.field(col).type, from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=schema)
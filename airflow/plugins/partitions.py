@@ -0,0 +1,246 @@
+"""Sales Transactions Partitions
+
+Maintains the monthly range partitions of the transactions and txn_details tables of the sales database
+(see database/setup.sql), e.g. transactions_y2023m01 and txn_details_y2023m01 for January 2023 (UTC):
+    - partitions are created cfg.PARTITION_MONTHS_AHEAD months ahead (with the create_monthly_partitions
+      database function), so that new transactions always have a partition to go to.
+    - partitions of the months before the last cfg.PARTITION_RETENTION_MONTHS months are archived: exported
+      to Parquet files in cfg.ARCHIVE_DATA_DIR/<table>/<partition>.parquet, then detached and dropped.
+
+Each month is archived in a single transaction: its partitions are locked against writes, exported (the
+row counts of the files are checked against the partitions), then detached and dropped. The files are
+written under a temporary name and renamed before the commit, so a failed archival leaves the partitions
+in place and is retried on the next run. The materialized views keep the aggregates of archived months
+until their next refresh (see db_loader.refresh_analytics_views).
+
+Requires psycopg2 and pyarrow (imported when used). The SQLite stand-in of the sales database (see
+db_loader module) has no partitions, so both tasks do nothing there.
+
+Public Functions (called in dags.sales_partition_maintenance module):
+    - create_partitions
+    - archive_partitions
+
+Private Functions:
+    - _get_connection
+    - _monthly_partitions
+    - _archive_month
+    - _export_partition
+    - _archive_schema
+"""
+import os
+import re
+import datetime
+import dataproc_config as cfg
+
+PARTITIONED_TABLES = ["txn_details", "transactions"] # txn_details first, as it references transactions
+
+# column types of the archive files (names of pyarrow types, see _archive_schema)
+ARCHIVE_TYPES = {
+    "transactions": {
+        "txn_id": "string",
+        "txn_timestamp": "timestamp",
+        "member_id": "string",
+        "total_items_price": "decimal",
+        "total_items_weight": "decimal",
+        "txn_status": "string",
+    },
+    "txn_details": {
+        "id": "int64",
+        "txn_id": "string",
+        "txn_timestamp": "timestamp",
+        "item_id": "string",
+        "quantity": "decimal",
+    },
+}
+# scale of the decimal columns (numeric values with more decimals fail the export, so no data is lost)
+ARCHIVE_DECIMAL_SCALE = 6
+
+
+# =============================================
+# Public Functions
+# =============================================
+def create_partitions(ti=None, params=None):
+    """Create the monthly partitions of the current month and the next cfg.PARTITION_MONTHS_AHEAD months.
+
+    Args:
+        ti (TaskInstance): Airflow task instance (passed in by Airflow). Defaults to None.
+        params (dict): DAG run params (passed in by Airflow). Defaults to None.
+
+    Returns:
+        int: number of partitions created (0 if they all exist, or for SQLite).
+    """
+    conn = _get_connection()
+    if conn is None:
+        print("SQLite database has no partitions to create.")
+        return 0
+    try:
+        with conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT create_monthly_partitions((now() AT TIME ZONE 'UTC')::date, %s)", (cfg.PARTITION_MONTHS_AHEAD+1,))
+                num_created = cur.fetchone()[0]
+    finally:
+        conn.close()
+
+    print("Created {:d} partitions ({:d} months ahead).".format(num_created, cfg.PARTITION_MONTHS_AHEAD))
+    return num_created
+
+def archive_partitions(ti=None, params=None):
+    """Archive the monthly partitions older than cfg.PARTITION_RETENTION_MONTHS months to Parquet, and drop them.
+
+    Args:
+        ti (TaskInstance): Airflow task instance (passed in by Airflow). Defaults to None.
+        params (dict): DAG run params (passed in by Airflow). Defaults to None.
+
+    Returns:
+        list: paths of the archive files written (empty if no partition is past its retention, or for SQLite).
+    """
+    conn = _get_connection()
+    if conn is None:
+        print("SQLite database has no partitions to archive.")
+        return []
+
+    today = datetime.datetime.now(datetime.timezone.utc).date()
+    # months are numbered year*12 + month-1, so that the cutoff is a subtraction
+    cutoff = today.year*12 + today.month-1 - cfg.PARTITION_RETENTION_MONTHS
+    archive_paths = []
+    try:
+        with conn.cursor() as cur:
+            partitions = {table: _monthly_partitions(cur, table) for table in PARTITIONED_TABLES}
+        conn.rollback() # ends the transaction of the catalog query (each month is archived in its own transaction)
+        months = sorted({month for table in PARTITIONED_TABLES for month in partitions[table] if month < cutoff})
+        for month in months:
+            names = {table: partitions[table][month] for table in PARTITIONED_TABLES if month in partitions[table]}
+            print("- archive {}...".format(", ".join(names.values())))
+            archive_paths += _archive_month(conn, names)
+    finally:
+        conn.close()
+
+    print("Archived {:d} partitions older than {:d} months to {}.".format(len(archive_paths), cfg.PARTITION_RETENTION_MONTHS, cfg.ARCHIVE_DATA_DIR))
+    return archive_paths
+
+
+# =============================================
+# Private Functions
+# =============================================
+def _get_connection():
+    """Get a new connection to the sales database at cfg.SALES_DB_DSN, with UTC as its time zone.
+
+    Returns:
+        connection: psycopg2 connection, or None for the SQLite stand-in.
+    """
+    if cfg.SALES_DB_DSN.startswith("sqlite:///"):
+        return None
+    import psycopg2
+    return psycopg2.connect(cfg.SALES_DB_DSN, options="-c TimeZone=UTC")
+
+def _monthly_partitions(cur, table):
+    """Get the monthly partitions of a partitioned table.
+
+    Args:
+        cur (cursor): psycopg2 cursor.
+        table (str): partitioned table, one of PARTITIONED_TABLES.
+
+    Returns:
+        dict: partition name by month (numbered year*12 + month-1).
+    """
+    cur.execute("""
+        SELECT child.relname FROM pg_inherits
+        INNER JOIN pg_class child ON pg_inherits.inhrelid = child.oid
+        WHERE pg_inherits.inhparent = %s::regclass
+    """, (table,))
+    pattern = re.compile(r"^{}_y(\d{{4}})m(\d{{2}})$".format(table))
+    partitions = {}
+    for (name,) in cur.fetchall():
+        match = pattern.match(name)
+        if match:
+            partitions[int(match.group(1))*12 + int(match.group(2))-1] = name
+    return partitions
+
+def _archive_month(conn, names):
+    """Export the partitions of a month to Parquet, then detach and drop them, in a single transaction.
+
+    Args:
+        conn (connection): psycopg2 connection.
+        names (dict): partition name by table, in the order of PARTITIONED_TABLES.
+
+    Returns:
+        list: paths of the archive files written.
+    """
+    files = {}
+    try:
+        with conn.cursor() as cur:
+            cur.execute("LOCK TABLE {} IN SHARE MODE".format(", ".join(names.values())))
+            for table, name in names.items():
+                archive_dir = os.path.join(cfg.ARCHIVE_DATA_DIR, table)
+                os.makedirs(archive_dir, exist_ok=True)
+                filepath = os.path.join(archive_dir, name + ".parquet")
+                files[filepath] = os.path.join(archive_dir, "." + name + ".parquet.tmp")
+                num_rows = _export_partition(conn, table, name, files[filepath])
+
+                cur.execute("SELECT count(*) FROM {}".format(name))
+                num_partition_rows = cur.fetchone()[0]
+                if num_rows != num_partition_rows:
+                    raise RuntimeError("Archive of {} has {:d} rows instead of {:d}".format(name, num_rows, num_partition_rows))
+                print("  - {}: {:d} rows exported to {}".format(name, num_rows, filepath))
+
+            for table, name in names.items():
+                cur.execute("ALTER TABLE {} DETACH PARTITION {}".format(table, name))
+            cur.execute("DROP TABLE {}".format(", ".join(names.values())))
+        for filepath, tmp_path in files.items():
+            os.replace(tmp_path, filepath)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        for tmp_path in files.values():
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        raise
+    return list(files)
+
+def _export_partition(conn, table, name, filepath):
+    """Export the rows of a partition to a Parquet file, in batches of cfg.ARCHIVE_BATCH_SIZE rows.
+
+    Args:
+        conn (connection): psycopg2 connection (in the transaction of the archival).
+        table (str): partitioned table of the partition, one of PARTITIONED_TABLES.
+        name (str): partition name.
+        filepath (str): path of the Parquet file (overwritten if it exists).
+
+    Returns:
+        int: number of rows exported.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _archive_schema(table)
+    num_rows = 0
+    # server-side cursor, so the partition is not read into memory at once
+    with conn.cursor(name="archive_" + name) as cur, pq.ParquetWriter(filepath, schema, compression=cfg.PARQUET_COMPRESSION) as writer:
+        cur.itersize = cfg.ARCHIVE_BATCH_SIZE
+        cur.execute("SELECT {} FROM {}".format(", ".join(schema.names), name))
+        while True:
+            rows = cur.fetchmany(cfg.ARCHIVE_BATCH_SIZE)
+            if not rows:
+                break
+            columns = list(zip(*rows))
+            writer.write_table(pa.table([pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema))
+            num_rows += len(rows)
+    return num_rows
+
+def _archive_schema(table):
+    """Get the pyarrow schema of the archive files of a table (see ARCHIVE_TYPES).
+
+    Args:
+        table (str): partitioned table, one of PARTITIONED_TABLES.
+
+    Returns:
+        pyarrow schema: archive columns and types.
+    """
+    import pyarrow as pa
+    types = {
+        "string": pa.string(),
+        "int64": pa.int64(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+        "decimal": pa.decimal128(38, ARCHIVE_DECIMAL_SCALE),
+    }
+    return pa.schema([(column, types[type_name]) for column, type_name in ARCHIVE_TYPES[table].items()])
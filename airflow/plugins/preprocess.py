@@ -2,29 +2,83 @@
 
 Handles data ingestion, cleaning, transformation, validation and output.
 
-Public Functions (called in dags.data_pipeline module):
+Public Functions (called in dags.data_pipeline and dags.data_pipeline_watch modules):
     - ingest_and_process_data
     - check_output_data_validity
+    - discover_input_files
+    - process_input_file
+    - check_file_validity
 
 Private Functions:
-    - _get_processed_list
+    - _prepare_run
+    - _pending_input_files
+    - _process_files
+    - _process_files_parallel
+    - _process_file_worker
+    - _process_file_chunks_parallel
+    - _process_chunk
+    - _process_chunk_stages
+    - _write_chunk
+    - _member_id_staging
+    - _write_or_stage_chunk
+    - _write_staged
+    - _process_file_with_metrics
+    - _process_file
+    - _process_file_streaming
+    - _read_input
+    - _write_outputs
+    - _write_output
+    - _write_summary
+    - _check_summaries
+    - _check_output_file
+    - _record_processed
+    - _record_failed
+    - _output_paths
+    - _summary_path
     - _clean_dob
     - _validate_email
     - _validate_mobile_number
     - _clean_data
     - _validate_data
+    - _add_member_id
+    - _add_base_member_id
     - _generate_member_id
+    - _hash_dob
+    - _hash_dobs
+    - _print_cache_stats
+    - _report_metrics
+    - _profile_path
 """
 import os
+import io
 import hashlib
+import traceback
+import collections
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pandas as pd
 import dataproc_config as cfg
+import streaming
+import manifest
+import memo
+import outputs
+import summaries
+import member_index
+import metrics
 from airflow.exceptions import AirflowFailException
 
+# output columns for successful and failed applications
+SUCCESS_COLUMNS = ["member_id","first_name","last_name","email","date_of_birth","mobile_no","above_18"]
+FAIL_COLUMNS = ["first_name","last_name","email","date_of_birth","mobile_no","above_18"]
+
+# cleaned date of birth and date of birth hash of each distinct date of birth string (cleared at the start of each run)
+DOB_CACHE = memo.LRUCache(cfg.DOB_CACHE_SIZE)
+DOB_HASH_CACHE = memo.LRUCache(cfg.DOB_CACHE_SIZE)
+
 # =============================================
 # Public Functions
 # =============================================
-def ingest_and_process_data():
+def ingest_and_process_data(ti=None, params=None, filenames=None):
     """Ingest and process raw data.
 
     Steps include:
@@ -34,85 +88,72 @@ def ingest_and_process_data():
         - generate member ID for successful applications
         - output successful and failed applications
 
-    Returns:
-        int: 0 if function is completed successfully, else 1.
-    """
-    # Check for existence of output directories
-    for datair in [cfg.SUCCESS_DATA_DIR, cfg.FAIL_DATA_DIR]:
-        if not os.path.exists(datair):
-            os.mkdir(datair)
-    
-    # Get processed list
-    processed_list = _get_processed_list()
-    print("Processed files: {}\n".format(processed_list))
-
-    for filename in os.listdir(cfg.INPUT_DATA_DIR):
-        # skip over filenames that have been processed before
-        # if filename in processed_list:
-        #     print("{} already processed.\n".format(filename))
-        #     continue    
-        if filename.endswith(".csv"):
-            print("{}:".format(filename))
-            filepath = os.path.join(cfg.INPUT_DATA_DIR,filename)
-            print("- ingest data from {}...".format(filepath))
-            df = pd.read_csv(filepath)
+    Files are processed one at a time, or across a pool of cfg.NUM_WORKERS processes if it is > 1.
+    Files recorded in the processing manifest (cfg.MANIFEST_PATH) that have not changed since are skipped,
+    unless cfg.FORCE_REPROCESS or the "force_reprocess" DAG param is set. If filenames is set (e.g. the files
+    that arrived in the watch folder, see file_watch module), only those files are considered.
 
-            print("- clean data...")
-            df = _clean_data(df)
+    A validation summary of each processed file is written to cfg.SUMMARY_DATA_DIR (see check_output_data_validity).
+    Per-stage metrics of the run are written to cfg.METRICS_DATA_DIR, pushed to XCom (key "metrics") and
+    sent to Airflow's metrics (see metrics module). If cfg.PROFILE_MODE or the "profile" DAG param is set,
+    each file is also profiled with cProfile.
 
-            print("- validate data...")
-            df = _validate_data(df)
-            success_mask = df["success"]==True
+    Args:
+        ti (TaskInstance): Airflow task instance (passed in by Airflow). Defaults to None.
+        params (dict): DAG run params (passed in by Airflow). Defaults to None.
+        filenames (list): names of the input files to consider. Defaults to None (all files in cfg.INPUT_DATA_DIR).
 
-            print("- generate member id for successful applications")
-            df["member_id"] = df[["last_name","date_of_birth"]].apply(lambda x: _generate_member_id(x["last_name"], x["date_of_birth"]), axis=1)
+    Returns:
+        list: paths of the validation summaries of the files processed in this run.
+    """
+    _prepare_run()
 
-            print("- output successful applications...")
-            relevant_columns = ["member_id","first_name","last_name","email","date_of_birth","mobile_no","above_18"]
-            df[success_mask][relevant_columns].to_csv(os.path.join(cfg.SUCCESS_DATA_DIR,"successful_"+filename), index=False)
+    processing_manifest = manifest.Manifest(cfg.MANIFEST_PATH)
+    profile = cfg.PROFILE_MODE or bool((params or {}).get("profile", False))
 
-            print("- output failed applications...")
-            relevant_columns = ["first_name","last_name","email","date_of_birth","mobile_no","above_18"]
-            df[~success_mask][relevant_columns].to_csv(os.path.join(cfg.FAIL_DATA_DIR,"failed_"+filename), index=False)
+    filenames, invalid_filenames = _pending_input_files(processing_manifest, params, filenames)
+    if invalid_filenames:
+        raise AirflowFailException("Invalid input filename")
 
-            print("- Done!\n")
-        else:
-            print("invalid filename: {}".format(filename))
-            raise AirflowFailException("Invalid input filename")
+    file_metrics = _process_files(filenames, processing_manifest, profile)
+    _report_metrics(file_metrics, ti)
     
-    return 0
+    return [_summary_path(filename) for filename in filenames]
 
-def check_output_data_validity():
+def check_output_data_validity(ti=None, params=None, ingest_task_id="ingest_and_process"):
     """Check validity of output data (all in successful output folder are success).
 
     Checks that:
         - all in successul output folder are valid applications.
         - all in failed output folder are non-valid applications.
 
+    By default (cfg.VALIDATION_MODE = "summary"), only the validation summaries of the files processed
+    in this DAG run are checked. A full re-scan of every output file is done instead if
+    cfg.VALIDATION_MODE = "full", the "full_rescan" DAG param is set, or there is no task instance.
+
+    Args:
+        ti (TaskInstance): Airflow task instance (passed in by Airflow). Defaults to None.
+        params (dict): DAG run params (passed in by Airflow). Defaults to None.
+        ingest_task_id (str): task ID of the ingest_and_process_data task. Defaults to "ingest_and_process".
+
     Returns:
         int: 0 if function is completed successfully.
     """
+    full_rescan = cfg.VALIDATION_MODE == "full" or bool((params or {}).get("full_rescan", False))
+    if not full_rescan and ti is not None:
+        summary_paths = ti.xcom_pull(task_ids=ingest_task_id)
+        if summary_paths is not None:
+            return _check_summaries(summary_paths)
+        print("No validation summaries from {}, doing a full re-scan.\n".format(ingest_task_id))
+
     pass_check = True
     for datadir in [cfg.SUCCESS_DATA_DIR, cfg.FAIL_DATA_DIR]:
         print(datadir)
         for filename in os.listdir(datadir):
-            if filename.endswith(".csv"):
+            if filename.endswith(tuple(outputs.OUTPUT_EXTENSIONS.values())):
                 filepath = os.path.join(datadir,filename)
-                print("- ingest and check {}...".format(filepath))
-                df = pd.read_csv(filepath, dtype=str)
-                df = _validate_data(df)
-
-                if "successful" in datadir:
-                    num_success = df["success"].sum()
-                    fract_success = num_success/len(df)
-                    print("  - Successful applications = {0:d} out of {1:d} ({2:.2f}%)".format(num_success, len(df), fract_success*100))
-                    print("  - All successful = {}".format(df["success"].all()==True))
-                    pass_check = pass_check and (df["success"].all()==True)
-                elif "failed" in datadir:
-                    num_fail = (~df["success"]).sum()
-                    print("  - Failed applications = {0:d} out of {1:d} ({2:.2f}%)".format(num_fail, len(df), num_fail/len(df)*100))
-                    print("  - All failed = {}".format(df["success"].all()==False))
-                    pass_check = pass_check and (df["success"].all()==False)
+                output = "successful" if "successful" in datadir else "failed"
+                pass_check = _check_output_file(filepath, output) and pass_check
             else:
                 print("invalid filename: {}".format(filename))
         print("")
@@ -122,20 +163,645 @@ def check_output_data_validity():
     else:
         raise AirflowFailException("Output data fail validity check")
 
+def discover_input_files(params=None):
+    """Discover the raw data files to process in this DAG run, as a list for the per-file mapped tasks.
+
+    Files recorded in the processing manifest that have not changed since are skipped, unless
+    cfg.FORCE_REPROCESS or the "force_reprocess" DAG param is set. Invalid filenames are reported and
+    skipped, so that they do not fail the processing of the other files.
+
+    Args:
+        params (dict): DAG run params (passed in by Airflow). Defaults to None.
+
+    Returns:
+        list: names of the raw application data files in cfg.INPUT_DATA_DIR to process.
+    """
+    _prepare_run()
+    filenames, invalid_filenames = _pending_input_files(manifest.Manifest(cfg.MANIFEST_PATH), params)
+    if invalid_filenames:
+        print("Skipped {:d} invalid filenames: {}\n".format(len(invalid_filenames), invalid_filenames))
+    print("Files to process: {}".format(filenames))
+    return filenames
+
+def process_input_file(filename, ti=None, params=None):
+    """Ingest and process one raw data file (see ingest_and_process_data), as a task mapped over the input files.
+
+    Each file is processed, recorded in the processing manifest and retried independently of the other files.
+
+    Args:
+        filename (str): name of the raw application data file in cfg.INPUT_DATA_DIR.
+        ti (TaskInstance): Airflow task instance (passed in by Airflow). Defaults to None.
+        params (dict): DAG run params (passed in by Airflow). Defaults to None.
+
+    Returns:
+        str: path of the validation summary of the file.
+    """
+    _prepare_run()
+
+    processing_manifest = manifest.Manifest(cfg.MANIFEST_PATH)
+    profile = cfg.PROFILE_MODE or bool((params or {}).get("profile", False))
+
+    file_metrics = _process_files([filename], processing_manifest, profile)
+    run_id = "{}_{}".format(ti.run_id, os.path.splitext(filename)[0]) if ti is not None else None
+    _report_metrics(file_metrics, ti, run_id)
+
+    return _summary_path(filename)
+
+def check_file_validity(summary_path, params=None):
+    """Check validity of the output data of one processed file (see check_output_data_validity).
+
+    The validation summary of the file is checked, or its output files are re-read and re-validated if
+    cfg.VALIDATION_MODE = "full" or the "full_rescan" DAG param is set.
+
+    Args:
+        summary_path (str): path of the validation summary of the file (returned by process_input_file).
+        params (dict): DAG run params (passed in by Airflow). Defaults to None.
+
+    Returns:
+        str: path of the validation summary, if the check passed.
+    """
+    full_rescan = cfg.VALIDATION_MODE == "full" or bool((params or {}).get("full_rescan", False))
+    if not full_rescan:
+        _check_summaries([summary_path])
+        return summary_path
+
+    pass_check = True
+    for output, summary_output in summaries.read_summary(summary_path)["outputs"].items():
+        if os.path.exists(summary_output["path"]):
+            pass_check = _check_output_file(summary_output["path"], output) and pass_check
+    print("Pass Validity Check:", pass_check)
+    if not pass_check:
+        raise AirflowFailException("Output data fail validity check")
+    return summary_path
+
 
 # =============================================
 # Private Functions
 # =============================================
-def _get_processed_list():
-    """Get list of processeded application input data files.
+def _prepare_run():
+    """Create the output directories (if they do not exist) and clear the date of birth caches."""
+    for datair in [cfg.SUCCESS_DATA_DIR, cfg.FAIL_DATA_DIR, cfg.SUMMARY_DATA_DIR]:
+        # exist_ok: mapped tasks of the same run may create them concurrently
+        os.makedirs(datair, exist_ok=True)
+
+    DOB_CACHE.clear()
+    DOB_HASH_CACHE.clear()
+
+def _pending_input_files(processing_manifest, params=None, filenames=None):
+    """Get the raw data files to process: those not processed before or changed since (or all, if forced).
+
+    Args:
+        processing_manifest (manifest.Manifest): processing manifest.
+        params (dict): DAG run params, for "force_reprocess". Defaults to None.
+        filenames (list): names of the input files to consider. Defaults to None (all files in cfg.INPUT_DATA_DIR).
+
+    Returns:
+        tuple: names of the .csv files to process (list) and the invalid (non-.csv) filenames (list).
+    """
+    force_reprocess = cfg.FORCE_REPROCESS or bool((params or {}).get("force_reprocess", False))
+    if force_reprocess:
+        print("Force reprocessing all files.\n")
+
+    pending, invalid_filenames = [], []
+    for filename in os.listdir(cfg.INPUT_DATA_DIR) if filenames is None else filenames:
+        # skip over filenames that have been processed before and have not changed since
+        filepath = os.path.join(cfg.INPUT_DATA_DIR,filename)
+        if not force_reprocess and processing_manifest.is_processed(filename, filepath):
+            print("{} already processed.\n".format(filename))
+            continue
+        if filename.endswith(".csv"):
+            pending.append(filename)
+        else:
+            print("invalid filename: {}".format(filename))
+            invalid_filenames.append(filename)
+    return pending, invalid_filenames
+
+def _process_files(filenames, processing_manifest, profile=False):
+    """Process raw application data files, one at a time or across a pool of cfg.NUM_WORKERS processes if it is > 1.
+
+    Args:
+        filenames (list): names of raw application data files in cfg.INPUT_DATA_DIR.
+        processing_manifest (manifest.Manifest): manifest in which processed and failed files are recorded.
+        profile (bool): profile each file with cProfile. Defaults to False.
+
+    Returns:
+        list: metrics of each processed file (see metrics.FileMetrics.to_dict).
+    """
+    if cfg.NUM_WORKERS > 1:
+        return _process_files_parallel(filenames, processing_manifest, profile)
+
+    file_metrics = []
+    for filename in filenames:
+        print("{}:".format(filename))
+        file_stat = manifest.stat_fingerprint(os.path.join(cfg.INPUT_DATA_DIR,filename))
+        try:
+            file_fingerprint, metrics_dict = _process_file_with_metrics(filename, profile)
+        except Exception:
+            _record_failed(processing_manifest, filename, file_stat, traceback.format_exc())
+            raise
+        file_metrics.append(metrics_dict)
+        _record_processed(processing_manifest, filename, file_fingerprint)
+        print("- Done!\n")
+    _print_cache_stats()
+    return file_metrics
+
+def _process_files_parallel(filenames, processing_manifest, profile=False):
+    """Process raw application data files in parallel across a pool of cfg.NUM_WORKERS processes.
+
+    Each file is processed by one worker. If cfg.PARALLEL_CHUNKS is set, files of at least
+    cfg.LARGE_FILE_BYTES are instead split into chunks of cfg.CHUNK_SIZE rows that are spread across
+    the workers. Failed files do not stop the other files from being processed.
+
+    Args:
+        filenames (list): names of raw application data files in cfg.INPUT_DATA_DIR.
+        processing_manifest (manifest.Manifest): manifest in which processed and failed files are recorded.
+        profile (bool): profile each file with cProfile. Defaults to False.
+
+    Returns:
+        list: metrics of each processed file (see metrics.FileMetrics.to_dict).
+
+    Raises:
+        AirflowFailException: if any of the files failed to be processed.
+    """
+    chunked_filenames = [
+        filename for filename in filenames
+        if cfg.PARALLEL_CHUNKS and os.path.getsize(os.path.join(cfg.INPUT_DATA_DIR,filename)) >= cfg.LARGE_FILE_BYTES
+    ]
+    file_stats = {filename: manifest.stat_fingerprint(os.path.join(cfg.INPUT_DATA_DIR,filename)) for filename in filenames}
+    failures = {}
+    file_metrics = []
+    print("Processing {:d} files with {:d} workers...\n".format(len(filenames), cfg.NUM_WORKERS))
+    with ProcessPoolExecutor(max_workers=cfg.NUM_WORKERS) as pool:
+        futures = [pool.submit(_process_file_worker, filename, profile) for filename in filenames if filename not in chunked_filenames]
+
+        for filename in chunked_filenames:
+            try:
+                chunk_metrics = metrics.FileMetrics(filename)
+                with metrics.profiled(_profile_path(filename) if profile else None):
+                    file_fingerprint = _process_file_chunks_parallel(filename, pool, chunk_metrics)
+                file_metrics.append(chunk_metrics.to_dict())
+                _record_processed(processing_manifest, filename, file_fingerprint)
+            except Exception:
+                failures[filename] = traceback.format_exc()
+                print("- Failed!\n")
+
+        for future in as_completed(futures):
+            result = future.result()
+            print(result["log"])
+            if result["error"] is not None:
+                failures[result["filename"]] = result["error"]
+            else:
+                file_metrics.append(result["metrics"])
+                _record_processed(processing_manifest, result["filename"], result["fingerprint"])
+
+    if failures:
+        for filename, error in failures.items():
+            print("{} failed:\n{}".format(filename, error))
+            _record_failed(processing_manifest, filename, file_stats[filename], error)
+        raise AirflowFailException("Failed to process {:d} of {:d} files: {}".format(len(failures), len(filenames), sorted(failures)))
+    return file_metrics
+
+def _process_file_worker(filename, profile=False):
+    """Process a single raw application data file in a worker process.
+
+    Args:
+        filename (str): name of the raw application data file in cfg.INPUT_DATA_DIR.
+        profile (bool): profile the file with cProfile. Defaults to False.
+
+    Returns:
+        dict: filename, input file fingerprint ("fingerprint"), metrics of the file ("metrics"), captured log of
+            the file ("log"), and traceback if it failed, else None ("error").
+    """
+    log = io.StringIO()
+    file_fingerprint = None
+    file_metrics = None
+    error = None
+    with contextlib.redirect_stdout(log):
+        print("{}:".format(filename))
+        try:
+            file_fingerprint, file_metrics = _process_file_with_metrics(filename, profile)
+            _print_cache_stats()
+            print("- Done!")
+        except Exception:
+            error = traceback.format_exc()
+            print("- Failed!")
+    return {"filename": filename, "fingerprint": file_fingerprint, "metrics": file_metrics, "log": log.getvalue(), "error": error}
+
+def _process_file_chunks_parallel(filename, pool, file_metrics):
+    """Process a large raw application data file by spreading its chunks across the worker pool.
+
+    Chunks are read and written in order by this process, with at most 2 chunks per worker in flight
+    to bound memory. Duplicates across chunks are dropped here, from the row hashes returned by the workers,
+    and member IDs are issued here once the whole file has been read (see _write_or_stage_chunk).
+
+    Args:
+        filename (str): name of the raw application data file in cfg.INPUT_DATA_DIR.
+        pool (ProcessPoolExecutor): worker pool.
+        file_metrics (metrics.FileMetrics): metrics of the file (chunk stages are recorded by the workers).
+
+    Returns:
+        dict: fingerprint of the input file before it was processed (see manifest.fingerprint).
+    """
+    print("{}:".format(filename))
+    filepath = os.path.join(cfg.INPUT_DATA_DIR,filename)
+    file_fingerprint = manifest.fingerprint(filepath)
+    print("- stream data from {} in chunks of {:d} rows across {:d} workers...".format(filepath, cfg.CHUNK_SIZE, cfg.NUM_WORKERS))
+    success_path, fail_path = _output_paths(filename)
+    deduplicator = streaming.RowDeduplicator()
+    summary = summaries.ValidationSummary(filename, success_path, fail_path)
+
+    with outputs.OutputWriter(success_path, SUCCESS_COLUMNS) as success_writer, \
+            outputs.OutputWriter(fail_path, FAIL_COLUMNS) as fail_writer, \
+            _member_id_staging() as (batch, spill):
+        pending = collections.deque()
+        for df in file_metrics.iter_stage("read", _read_input(filepath, chunksize=cfg.CHUNK_SIZE)):
+            pending.append(pool.submit(_process_chunk, df))
+            if len(pending) >= 2*cfg.NUM_WORKERS:
+                _write_chunk(*pending.popleft().result(), deduplicator, batch, spill, success_writer, fail_writer, summary, file_metrics)
+        while pending:
+            _write_chunk(*pending.popleft().result(), deduplicator, batch, spill, success_writer, fail_writer, summary, file_metrics)
+        if batch is not None:
+            _write_staged(batch, spill, success_writer, summary, file_metrics)
+
+    print("- output {:d} successful and {:d} failed applications".format(success_writer.num_rows, fail_writer.num_rows))
+    _write_summary(summary)
+    print("- Done!\n")
+    return file_fingerprint
+
+def _process_chunk(df):
+    """Clean, validate and generate base member IDs for a chunk of raw application data (in a worker process).
+
+    Args:
+        df (pandas dataframe): chunk of raw application data.
+
+    Returns:
+        tuple: processed chunk (pandas dataframe), the hash of each of its rows before cleaning (numpy array),
+            and stage metrics of the chunk (dict).
+    """
+    deduplicator = streaming.RowDeduplicator()
+    chunk_metrics = metrics.FileMetrics(None)
+    with metrics.traced():
+        df = _process_chunk_stages(df, deduplicator, chunk_metrics)
+    return df, deduplicator.kept_hashes, chunk_metrics.stages
+
+def _process_chunk_stages(df, deduplicator, file_metrics):
+    """Clean, validate and generate base member IDs for a chunk of raw application data, timing each stage.
+
+    Collisions of the base member IDs are resolved once the whole file has been read (see _write_staged).
+
+    Args:
+        df (pandas dataframe): chunk of raw application data.
+        deduplicator (streaming.RowDeduplicator): drops rows seen in earlier chunks of the file.
+        file_metrics (metrics.FileMetrics): metrics of the file.
+
+    Returns:
+        pandas dataframe: processed chunk (empty if all its rows were duplicates).
+    """
+    with file_metrics.stage("clean", rows_in=len(df)) as run:
+        df = _clean_data(df, deduplicator)
+        run.rows_out = len(df)
+    if len(df) > 0:
+        with file_metrics.stage("validate", rows_in=len(df)):
+            df = _validate_data(df)
+        with file_metrics.stage("member_id", rows_in=len(df)) as run:
+            df = _add_base_member_id(df)
+            run.rows_out = int(df["member_id"].notnull().sum())
+    return df
+
+def _write_chunk(df, hashes, chunk_stages, deduplicator, batch, spill, success_writer, fail_writer, summary, file_metrics):
+    """Drop rows seen in earlier chunks and append a processed chunk to the outputs (see _write_or_stage_chunk).
+
+    Args:
+        df (pandas dataframe): processed chunk of application data.
+        hashes (numpy array): hash of each row of df before cleaning.
+        chunk_stages (dict): stage metrics of the chunk.
+        deduplicator (streaming.RowDeduplicator): row hashes seen in earlier chunks of the file.
+        batch (member_index.MemberIdBatch): member ID batch of the file (None without cfg.MEMBER_ID_INDEX).
+        spill (streaming.ChunkSpill): staged successful applications of the file (None without cfg.MEMBER_ID_INDEX).
+        success_writer (outputs.OutputWriter): successful applications output.
+        fail_writer (outputs.OutputWriter): failed applications output.
+        summary (summaries.ValidationSummary): validation summary of the file.
+        file_metrics (metrics.FileMetrics): metrics of the file.
+    """
+    file_metrics.merge_stages(chunk_stages)
+    df = df[deduplicator.new_rows_mask(hashes)]
+    if len(df) > 0:
+        with file_metrics.stage("write", rows_in=len(df)):
+            _write_or_stage_chunk(df, batch, spill, success_writer, fail_writer, summary)
+
+@contextlib.contextmanager
+def _member_id_staging():
+    """Member ID batch of a file processed in chunks, and a spill of its successful applications.
+
+    Yields:
+        tuple: member_index.MemberIdBatch and streaming.ChunkSpill, or (None, None) without cfg.MEMBER_ID_INDEX.
+    """
+    if not cfg.MEMBER_ID_INDEX:
+        yield None, None
+        return
+    with member_index.MemberIndex(cfg.MEMBER_INDEX_PATH).batch() as batch, \
+            streaming.ChunkSpill(cfg.SUCCESS_DATA_DIR) as spill:
+        yield batch, spill
+
+def _write_or_stage_chunk(df, batch, spill, success_writer, fail_writer, summary):
+    """Append a processed chunk to the outputs, staging its successful applications if member IDs are indexed.
+
+    With cfg.MEMBER_ID_INDEX, the member IDs of a file are issued once its applicants of all chunks are
+    known (see member_index.MemberIdBatch), so that they are the same as when the file is processed whole.
+    Until then, the successful applications are added to the batch and kept in the spill (on disk), and
+    only the failed applications are written.
+
+    Args:
+        df (pandas dataframe): processed chunk of application data, with base member IDs.
+        batch (member_index.MemberIdBatch): member ID batch of the file (None without cfg.MEMBER_ID_INDEX).
+        spill (streaming.ChunkSpill): staged successful applications of the file (None without cfg.MEMBER_ID_INDEX).
+        success_writer (outputs.OutputWriter): successful applications output.
+        fail_writer (outputs.OutputWriter): failed applications output.
+        summary (summaries.ValidationSummary): validation summary of the file.
+    """
+    if batch is None:
+        _write_outputs(df, success_writer, fail_writer, summary)
+        return
+    success_mask = df["success"]==True
+    _write_output(df.loc[~success_mask], "failed", fail_writer, summary)
+    if success_mask.any():
+        successful = df.loc[success_mask, SUCCESS_COLUMNS]
+        batch.add(successful, successful["member_id"])
+        spill.append(successful)
+
+def _write_staged(batch, spill, success_writer, summary, file_metrics):
+    """Issue the member IDs of the staged successful applications of a file, and write them.
+
+    Args:
+        batch (member_index.MemberIdBatch): member ID batch of the file.
+        spill (streaming.ChunkSpill): staged successful applications of the file.
+        success_writer (outputs.OutputWriter): successful applications output.
+        summary (summaries.ValidationSummary): validation summary of the file.
+        file_metrics (metrics.FileMetrics): metrics of the file.
+    """
+    with file_metrics.stage("member_id"):
+        summary.member_id_stats.update(batch.assign())
+    for df in spill:
+        with file_metrics.stage("member_id"):
+            df["member_id"] = batch.member_ids(df)
+        with file_metrics.stage("write", rows_in=len(df)):
+            _write_output(df, "successful", success_writer, summary)
+
+def _process_file_with_metrics(filename, profile=False):
+    """Process a single raw application data file (see _process_file), recording its metrics.
+
+    Args:
+        filename (str): name of the raw application data file in cfg.INPUT_DATA_DIR.
+        profile (bool): profile the file with cProfile. Defaults to False.
+
+    Returns:
+        tuple: fingerprint of the input file before it was processed (dict), and metrics of the file (dict).
+    """
+    file_metrics = metrics.FileMetrics(filename)
+    with metrics.traced(), metrics.profiled(_profile_path(filename) if profile else None):
+        file_fingerprint = _process_file(filename, file_metrics)
+    return file_fingerprint, file_metrics.to_dict()
+
+def _process_file(filename, file_metrics):
+    """Ingest, clean, validate and output a single raw application data file.
+
+    Whole files are loaded into memory, unless cfg.STREAMING_MODE is set (see _process_file_streaming).
+
+    Args:
+        filename (str): name of the raw application data file in cfg.INPUT_DATA_DIR.
+        file_metrics (metrics.FileMetrics): metrics of the file.
+
+    Returns:
+        dict: fingerprint of the input file before it was processed (see manifest.fingerprint).
+    """
+    filepath = os.path.join(cfg.INPUT_DATA_DIR,filename)
+    file_fingerprint = manifest.fingerprint(filepath)
+    success_path, fail_path = _output_paths(filename)
+    summary = summaries.ValidationSummary(filename, success_path, fail_path)
+    if cfg.STREAMING_MODE:
+        _process_file_streaming(filepath, success_path, fail_path, summary, file_metrics)
+        _write_summary(summary)
+        return file_fingerprint
+
+    print("- ingest data from {}...".format(filepath))
+    with file_metrics.stage("read") as run:
+        df = _read_input(filepath)
+        run.rows_out = len(df)
+
+    print("- clean data...")
+    with file_metrics.stage("clean", rows_in=len(df)) as run:
+        df = _clean_data(df)
+        run.rows_out = len(df)
+
+    print("- validate data...")
+    with file_metrics.stage("validate", rows_in=len(df)):
+        df = _validate_data(df)
+
+    print("- generate member id for successful applications")
+    with file_metrics.stage("member_id", rows_in=len(df)) as run:
+        df = _add_member_id(df, summary.member_id_stats)
+        run.rows_out = int(df["member_id"].notnull().sum())
+
+    print("- output successful and failed applications...")
+    with file_metrics.stage("write", rows_in=len(df)), \
+            outputs.OutputWriter(success_path, SUCCESS_COLUMNS) as success_writer, \
+            outputs.OutputWriter(fail_path, FAIL_COLUMNS) as fail_writer:
+        _write_outputs(df, success_writer, fail_writer, summary)
+
+    _write_summary(summary)
+    return file_fingerprint
+
+def _process_file_streaming(filepath, success_path, fail_path, summary, file_metrics):
+    """Ingest, clean, validate and output a raw application data file in chunks of cfg.CHUNK_SIZE rows.
+
+    Each chunk is appended to the outputs as soon as it is processed, so peak memory is bounded by the
+    chunk size. Duplicates are dropped across chunk boundaries, and member IDs are issued once the whole
+    file has been read (see _write_or_stage_chunk), giving the same outputs as processing the whole file
+    at once.
+
+    Args:
+        filepath (str): path of the raw application data file.
+        success_path (str): path of the successful applications output file.
+        fail_path (str): path of the failed applications output file.
+        summary (summaries.ValidationSummary): validation summary of the file.
+        file_metrics (metrics.FileMetrics): metrics of the file.
+    """
+    print("- stream data from {} in chunks of {:d} rows...".format(filepath, cfg.CHUNK_SIZE))
+    deduplicator = streaming.RowDeduplicator()
+
+    with outputs.OutputWriter(success_path, SUCCESS_COLUMNS) as success_writer, \
+            outputs.OutputWriter(fail_path, FAIL_COLUMNS) as fail_writer, \
+            _member_id_staging() as (batch, spill):
+        chunks = _read_input(filepath, chunksize=cfg.CHUNK_SIZE)
+        for i, df in enumerate(file_metrics.iter_stage("read", chunks)):
+            num_rows = len(df)
+            df = _process_chunk_stages(df, deduplicator, file_metrics)
+            if len(df) > 0:
+                with file_metrics.stage("write", rows_in=len(df)):
+                    _write_or_stage_chunk(df, batch, spill, success_writer, fail_writer, summary)
+            print("  - chunk {:d}: {:d} rows in, {:d} unique, {:d} successful".format(
+                i, num_rows, len(df), int(df["success"].sum()) if len(df) > 0 else 0))
+        if batch is not None:
+            _write_staged(batch, spill, success_writer, summary, file_metrics)
+
+    print("- output {:d} successful and {:d} failed applications".format(success_writer.num_rows, fail_writer.num_rows))
+
+def _read_input(filepath, chunksize=None):
+    """Read a raw application data file with the declared input schema (cfg.INPUT_SCHEMA).
+
+    Only the columns of the schema are read, with their declared dtypes, so that dtypes are the same
+    for every file and chunk.
+
+    Args:
+        filepath (str): path of the raw application data file.
+        chunksize (int): number of rows per chunk. Defaults to None (whole file).
+
+    Returns:
+        pandas dataframe (or iterator of dataframe chunks if chunksize is set): raw application data.
+    """
+    return pd.read_csv(filepath, usecols=list(cfg.INPUT_SCHEMA), dtype=cfg.INPUT_SCHEMA, chunksize=chunksize)
+
+def _write_outputs(df, success_writer, fail_writer, summary):
+    """Write successful and failed applications to the outputs, and add them to the validation summary.
+
+    The written rows are re-validated with the dtypes and values they are read back with (see
+    outputs.OutputWriter.write), as check_output_data_validity would after reading the outputs, so the
+    summary can be checked without re-reading the outputs. Only the output columns of each output are
+    copied out of df.
+
+    Args:
+        df (pandas dataframe): validated application data with member IDs.
+        success_writer (outputs.OutputWriter): successful applications output.
+        fail_writer (outputs.OutputWriter): failed applications output.
+        summary (summaries.ValidationSummary): validation summary of the file.
+    """
+    success_mask = df["success"]==True
+    _write_output(df.loc[success_mask], "successful", success_writer, summary)
+    _write_output(df.loc[~success_mask], "failed", fail_writer, summary)
+
+def _write_output(df, output, writer, summary):
+    """Write applications to one output, and add them to the validation summary (see _write_outputs).
+
+    Args:
+        df (pandas dataframe): applications of the output, with its output columns.
+        output (str): "successful" or "failed".
+        writer (outputs.OutputWriter): output of the applications.
+        summary (summaries.ValidationSummary): validation summary of the file.
+    """
+    written_df = writer.write(df[writer.columns], read_back=True)
+    if len(written_df) > 0:
+        member_id_not_null = written_df["member_id"].notnull().all() if output == "successful" else True
+        revalidated = _validate_data(written_df)
+        summary.update(output, len(revalidated), revalidated["success"].sum(), member_id_not_null)
+
+def _write_summary(summary):
+    """Write the validation summary of a processed file to cfg.SUMMARY_DATA_DIR.
+
+    Args:
+        summary (summaries.ValidationSummary): validation summary of the file.
+    """
+    summary_path = _summary_path(summary.filename)
+    if summary.member_id_stats:
+        print("- member id collisions: {}".format(dict(summary.member_id_stats)))
+    summary.write(summary_path)
+    print("- validation summary written to {}".format(summary_path))
+
+def _check_summaries(summary_paths):
+    """Check validity of output data from the validation summaries of the files processed in a run.
+
+    Args:
+        summary_paths (list): paths of the validation summaries.
+
+    Returns:
+        int: 0 if function is completed successfully.
+    """
+    pass_check = True
+    for summary_path in summary_paths:
+        summary = summaries.read_summary(summary_path)
+        print("{}:".format(summary["filename"]))
+        successful, failed = summary["outputs"]["successful"], summary["outputs"]["failed"]
+        print("  - Successful applications = {0:d} out of {1:d} ({2:.2f}%)".format(successful["num_rows"], summary["num_rows"], summary["fract_success"]*100))
+        for check, passed in summary["checks"].items():
+            print("  - {} = {}".format(check, passed))
+        pass_check = pass_check and summary["pass_check"]
+    print("")
+    print("Checked {:d} validation summaries from this run.".format(len(summary_paths)))
+    print("Pass Validity Check:", pass_check)
+    if pass_check:
+        return 0
+    else:
+        raise AirflowFailException("Output data fail validity check")
+
+def _check_output_file(filepath, output):
+    """Re-read and re-validate an output file.
+
+    Args:
+        filepath (str): path of the output file.
+        output (str): "successful" or "failed".
+
+    Returns:
+        bool: True if all applications of a successful output are valid (or all of a failed output are not).
+    """
+    print("- ingest and check {}...".format(filepath))
+    df = outputs.read_output(filepath)
+    df = _validate_data(df)
+
+    if output == "successful":
+        num_success = df["success"].sum()
+        fract_success = num_success/len(df)
+        print("  - Successful applications = {0:d} out of {1:d} ({2:.2f}%)".format(num_success, len(df), fract_success*100))
+        print("  - All successful = {}".format(df["success"].all()==True))
+        return bool(df["success"].all()==True)
+    else:
+        num_fail = (~df["success"]).sum()
+        print("  - Failed applications = {0:d} out of {1:d} ({2:.2f}%)".format(num_fail, len(df), num_fail/len(df)*100))
+        print("  - All failed = {}".format(df["success"].all()==False))
+        return bool(df["success"].all()==False)
+
+def _record_processed(processing_manifest, filename, file_fingerprint):
+    """Record a processed file and its output files in the processing manifest.
+
+    Args:
+        processing_manifest (manifest.Manifest): processing manifest.
+        filename (str): name of the raw application data file.
+        file_fingerprint (dict): fingerprint of the input file before it was processed.
+    """
+    processing_manifest.record(filename, file_fingerprint, [*_output_paths(filename), _summary_path(filename)])
+
+def _record_failed(processing_manifest, filename, file_stat, error):
+    """Record a file that failed to be processed in the processing manifest (see file_watch.pending_files).
+
+    Args:
+        processing_manifest (manifest.Manifest): processing manifest.
+        filename (str): name of the raw application data file.
+        file_stat (dict): size and mtime of the input file before it was processed.
+        error (str): traceback of the failure.
+    """
+    processing_manifest.record_failure(filename, file_stat, error)
+
+def _output_paths(filename):
+    """Get paths of the successful and failed applications output files for an input file.
+
+    Args:
+        filename (str): name of the raw application data file.
 
     Returns:
-        list: list of processed application input data filenames.
+        tuple: paths of the successful and failed applications output files.
     """
-    processed_list1 = set([fname.lstrip("successful").lstrip("_") for fname in os.listdir(cfg.SUCCESS_DATA_DIR)])
-    processed_list2 = set([fname.lstrip("failed").lstrip("_") for fname in os.listdir(cfg.FAIL_DATA_DIR)])
-    processed_list = list(processed_list1.union(processed_list2))
-    return processed_list
+    success_path = os.path.join(cfg.SUCCESS_DATA_DIR,outputs.output_filename("successful",filename))
+    fail_path = os.path.join(cfg.FAIL_DATA_DIR,outputs.output_filename("failed",filename))
+    return success_path, fail_path
+
+def _summary_path(filename):
+    """Get path of the validation summary for an input file.
+
+    Args:
+        filename (str): name of the raw application data file.
+
+    Returns:
+        str: path of the validation summary.
+    """
+    return os.path.join(cfg.SUMMARY_DATA_DIR,os.path.splitext(filename)[0]+".json")
 
 def _clean_dob(dob_string):
     """Cleans input data of birth string and sets it to YYYYMMDD format.
@@ -185,11 +851,13 @@ def _validate_email(email_string):
     """Validates input email string is valid (i.e. ends with @emailprovider.com or @emailprovider.net). 
 
     Args:
-        email_string (str): email address of applicant
+        email_string (str): email address of applicant (NaN if missing, e.g. empty in a re-read csv output)
 
     Returns:
         bool: True if email string is valid, else False.
     """
+    if not isinstance(email_string, str):
+        return False
     field = email_string.split("@")
     if (len(field[-1].split("."))==2) and (field[-1].endswith(".com") or field[-1].endswith(".net")):
         return True
@@ -200,17 +868,19 @@ def _validate_mobile_number(mobile_string):
     """Validates if input mobile number is valid (i.e. 8 digits)
 
     Args:
-        mobile_string (str): mobile number of applicant
+        mobile_string (str): mobile number of applicant (NaN if missing, e.g. empty in a re-read csv output)
 
     Returns:
         bool: True if mobile number is valid, else False.
     """
+    if not isinstance(mobile_string, str):
+        return False
     if (len(mobile_string) == 8) and (mobile_string.isdigit()):
         return True
     else:
         return False    
 
-def _clean_data(df):
+def _clean_data(df, deduplicator=None):
     """Function to clean raw application data.
 
     Cleaning steps incldue
@@ -222,6 +892,7 @@ def _clean_data(df):
 
     Args:
         df (pandas dataframe): raw application data
+        deduplicator (streaming.RowDeduplicator): drops duplicates across chunks when streaming. Defaults to None.
 
     Returns:
         pandas dataframe: cleaned application data
@@ -235,7 +906,12 @@ def _clean_data(df):
                 print("{}: # null = {}".format(col, num_nulls))
     
     # drop duplicates
-    df = df.drop_duplicates()
+    if deduplicator is None:
+        df = df.drop_duplicates()
+    else:
+        df = deduplicator.drop_duplicates(df)
+        if len(df) == 0:
+            return df
 
     # split name into first and last name
     df[["first_name","last_name"]] = df["name"].str.split(pat=" ",n=1,expand=True)
@@ -243,8 +919,8 @@ def _clean_data(df):
     # clean mobile number: remove white space within number
     df["mobile_no"] = df["mobile_no"].str.replace(' ', '')
 
-    # clean dob and set to YYYYMMDD
-    df["date_of_birth"] = df["date_of_birth"].apply(_clean_dob)
+    # clean dob and set to YYYYMMDD (once per distinct dob string)
+    df["date_of_birth"] = memo.memoized_map(df["date_of_birth"], lambda dob: dob.apply(_clean_dob), DOB_CACHE)
 
     return df
 
@@ -256,6 +932,8 @@ def _validate_data(df):
         - email is valid (i.e. ends with @emailprovider.com or @emailprovider.net)
         - age (as of cfg.REF_DATE 2022-01-01) is > 18 years old
 
+    Only the above_18 and success columns are added; intermediate results are not kept as columns.
+
     Args:
         df (pandas dataframe): cleaned application data
 
@@ -263,18 +941,59 @@ def _validate_data(df):
         pandas dataframe: validated application data
     """
     # validate mobile no and email
-    df["valid_mobile_no"] = df["mobile_no"].apply(_validate_mobile_number)
-    df["valid_email"] = df["email"].apply(_validate_email)
+    valid_mobile_no = df["mobile_no"].apply(_validate_mobile_number)
+    valid_email = df["email"].apply(_validate_email)
 
     # compute age as of REF_DATE and validate > 18 years old
-    df["age"] = (pd.to_datetime(cfg.REF_DATE,format="%Y%m%d") - pd.to_datetime(df["date_of_birth"],format="%Y%m%d"))/pd.Timedelta(365,"days")
-    df["above_18"] = df["age"] > 18.0
+    age = (pd.to_datetime(cfg.REF_DATE,format="%Y%m%d") - pd.to_datetime(df["date_of_birth"],format="%Y%m%d"))/pd.Timedelta(365,"days")
+    df["above_18"] = age > 18.0
+
+    # name is not null (output data has no name column: it is null if first or last name is null)
+    if "name" in df.columns:
+        name_not_null = df["name"].notnull()
+    else:
+        name_not_null = df["first_name"].notnull() & df["last_name"].notnull()
+
+    df["success"] = name_not_null & valid_mobile_no & df["above_18"] & valid_email
+    return df
+
+def _add_member_id(df, member_id_stats=None):
+    """Add member ID column generated from last name and date of birth (see _generate_member_id).
+
+    Member IDs are only generated for successful applications (None for failed applications), and
+    each distinct date of birth is only hashed once per run. If cfg.MEMBER_ID_INDEX is set, member IDs
+    that collide with one issued to a different applicant are resolved by the member ID index at
+    cfg.MEMBER_INDEX_PATH (see member_index.MemberIndex).
+
+    Args:
+        df (pandas dataframe): validated application data
+        member_id_stats (collections.Counter): updated with member ID collision statistics. Defaults to None.
+
+    Returns:
+        pandas dataframe: validated application data with member_id column
+    """
+    df = _add_base_member_id(df)
+    success_mask = df["success"]==True
+    if cfg.MEMBER_ID_INDEX and success_mask.any():
+        member_ids, stats = member_index.MemberIndex(cfg.MEMBER_INDEX_PATH).assign(df.loc[success_mask], df.loc[success_mask,"member_id"])
+        if member_id_stats is not None:
+            member_id_stats.update(stats)
+        df.loc[success_mask,"member_id"] = member_ids
+    return df
+
+def _add_base_member_id(df):
+    """Add member ID column with the base member IDs, before collisions are resolved (see _add_member_id).
 
-    # create name column if it does not exist
-    if "name" not in df.columns:
-        df["name"] = df["first_name"] + " " + df["last_name"]
+    Args:
+        df (pandas dataframe): validated application data
 
-    df["success"] = (~df["name"].isnull()) & df["valid_mobile_no"] & df["above_18"] & df["valid_email"]
+    Returns:
+        pandas dataframe: validated application data with member_id column (None for failed applications)
+    """
+    success_mask = df["success"]==True
+    dob_hash = memo.memoized_map(df.loc[success_mask,"date_of_birth"], _hash_dobs, DOB_HASH_CACHE)
+    df["member_id"] = None
+    df.loc[success_mask,"member_id"] = df.loc[success_mask,"last_name"] + "_" + dob_hash
     return df
 
 def _generate_member_id(last_name, dob_string):
@@ -287,6 +1006,66 @@ def _generate_member_id(last_name, dob_string):
     Returns:
         str: member ID given by <last_name>_<hash(dob_string)> where the second part is the first 5 digits of the SHA256 hash of the dob_string.
     """
-    dob_hash = hashlib.sha256(dob_string.encode()).hexdigest()[0:5]
+    dob_hash = _hash_dob(dob_string)
     member_id = last_name + "_" + dob_hash
     return member_id
+
+def _hash_dob(dob_string):
+    """Hash date of birth for member id.
+
+    Args:
+        dob_string (str): date of birth of applicant
+
+    Returns:
+        str: first 5 digits of the SHA256 hash of the dob_string.
+    """
+    return hashlib.sha256(dob_string.encode()).hexdigest()[0:5]
+
+def _hash_dobs(dob):
+    """Hash dates of birth for member ids (see _hash_dob).
+
+    Args:
+        dob (pandas series): dates of birth of applicants
+
+    Returns:
+        pandas series: first 5 digits of the SHA256 hash of each date of birth.
+    """
+    return dob.map(_hash_dob)
+
+def _report_metrics(file_metrics, ti=None, run_id=None):
+    """Write the metrics of the files processed in a run, print the stage totals and export them.
+
+    Args:
+        file_metrics (list): metrics of each processed file (see metrics.FileMetrics.to_dict).
+        ti (TaskInstance): Airflow task instance, to push the metrics to XCom (key "metrics"). Defaults to None.
+        run_id (str): ID of the metrics file. Defaults to None (the DAG run ID of ti, else the current time).
+    """
+    run_id = run_id or (ti.run_id if ti is not None else None)
+    metrics_path, run_metrics = metrics.write_run_metrics(file_metrics, run_id)
+    print("Stage metrics ({:d} files, {:d} rows, peak RSS {:.1f} MB):".format(
+        run_metrics["num_files"], run_metrics["rows_in"], run_metrics["peak_rss_mb"]))
+    for name, stage in run_metrics["stages"].items():
+        print("- {}: {:.3f} s, {:d} rows in, {:d} rows out, {} rows/sec{}".format(
+            name, stage["wall_time_s"], stage["rows_in"], stage["rows_out"],
+            "{:.0f}".format(stage["rows_per_sec"]) if stage["rows_per_sec"] is not None else "-",
+            ", peak traced {:.1f} MB".format(stage["peak_traced_mb"]) if stage["peak_traced_mb"] is not None else ""))
+    print("- metrics written to {}\n".format(metrics_path))
+    metrics.send_stats(run_metrics)
+    if ti is not None:
+        ti.xcom_push(key="metrics", value=run_metrics)
+
+def _profile_path(filename):
+    """Get path of the cProfile stats of an input file.
+
+    Args:
+        filename (str): name of the raw application data file.
+
+    Returns:
+        str: path of the cProfile stats file.
+    """
+    return os.path.join(cfg.METRICS_DATA_DIR,os.path.splitext(filename)[0]+".prof")
+
+def _print_cache_stats():
+    """Print hit/miss counters of the date of birth caches."""
+    print("- date of birth cache: {}".format(DOB_CACHE))
+    print("- date of birth hash cache: {}".format(DOB_HASH_CACHE))
@@ -0,0 +1,115 @@
+"""Streaming Ingestion Helpers
+
+Helpers for processing raw application data files in chunks, so that peak memory is bounded by the
+chunk size rather than the size of the input file.
+
+Classes (used in preprocess module):
+    - RowDeduplicator: drops rows already seen in earlier chunks of the same file.
+    - ChunkSpill: keeps processed chunks in a temporary file until they can be written.
+
+Public Functions:
+    - row_hashes
+"""
+import pickle
+import tempfile
+import numpy as np
+import pandas as pd
+
+
+class RowDeduplicator:
+    """Drops duplicate rows across all chunks of a file, equivalent to drop_duplicates on the whole file.
+
+    Each row is reduced to a 64-bit hash of its values, and the hashes of rows kept so far are held
+    in memory as a sorted uint64 array, looked up with binary search. Memory therefore grows with the
+    number of distinct rows (8 bytes each, twice that while the hashes of a chunk are merged in)
+    instead of with the size of the file. The hashes of the rows kept by the last call are available
+    as kept_hashes.
+    """
+    def __init__(self):
+        self._seen = np.array([], dtype=np.uint64)
+        self.kept_hashes = np.array([], dtype=np.uint64)
+
+    def drop_duplicates(self, df):
+        """Drop rows that are duplicates within df or of rows seen in earlier chunks (keeps first occurrence).
+
+        Args:
+            df (pandas dataframe): chunk of application data.
+
+        Returns:
+            pandas dataframe: chunk without duplicate rows.
+        """
+        return df[self.new_rows_mask(row_hashes(df))]
+
+    def new_rows_mask(self, hashes):
+        """Mark the first occurrence of each row hash not seen before, and remember them.
+
+        Args:
+            hashes (numpy array): uint64 hash of each row in a chunk.
+
+        Returns:
+            numpy array: boolean mask of rows to keep.
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        mask = ~pd.Series(hashes).duplicated().to_numpy()
+        # look up the hashes in sorted order, so that the binary searches walk the seen array forwards
+        order = np.argsort(hashes, kind="stable")
+        sorted_hashes = hashes[order]
+        positions = np.searchsorted(self._seen, sorted_hashes)
+        found = np.zeros(len(hashes), dtype=bool)
+        if len(self._seen) > 0:
+            found[order] = self._seen[np.minimum(positions, len(self._seen) - 1)] == sorted_hashes
+        mask &= ~found
+        self.kept_hashes = hashes[mask]
+        new_in_order = mask[order]
+        self._seen = np.insert(self._seen, positions[new_in_order], sorted_hashes[new_in_order])
+        return mask
+
+class ChunkSpill:
+    """Temporary file of processed chunks, read back in order once the whole file has been read.
+
+    Chunks are pickled, so they are read back with the same dtypes and values. The file is deleted when
+    the spill is closed.
+
+    Args:
+        directory (str): directory of the temporary file. Defaults to None (the system temporary directory).
+    """
+    def __init__(self, directory=None):
+        self._file = tempfile.TemporaryFile(dir=directory)
+        self.num_chunks = 0
+
+    def append(self, df):
+        """Append a chunk.
+
+        Args:
+            df (pandas dataframe): processed chunk.
+        """
+        pickle.dump(df, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.num_chunks += 1
+
+    def __iter__(self):
+        """Read the chunks back, in the order they were appended."""
+        self._file.seek(0)
+        for _ in range(self.num_chunks):
+            yield pickle.load(self._file)
+
+    def close(self):
+        """Delete the temporary file."""
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+
+def row_hashes(df):
+    """Hash the values of each row of a dataframe (ignoring the index).
+
+    Args:
+        df (pandas dataframe): application data.
+
+    Returns:
+        numpy array: uint64 hash of each row.
+    """
+    return pd.util.hash_pandas_object(df, index=False).to_numpy()
@@ -0,0 +1,102 @@
+"""Validation Summaries
+
+Per-file validation summaries emitted while a raw application data file is processed, so that the
+validity check only needs to read the summaries of the files produced in a run instead of re-reading
+every output file.
+
+Classes (used in preprocess module):
+    - ValidationSummary
+
+Public Functions:
+    - read_summary
+"""
+import os
+import json
+import collections
+from datetime import datetime, timezone
+
+
+class ValidationSummary:
+    """Accumulates validation counts of the successful and failed outputs of one input file.
+
+    Member ID collision statistics (see member_index.MemberIndex.assign) are accumulated in member_id_stats.
+
+    Args:
+        filename (str): name of the raw application data file.
+        success_path (str): path of the successful applications output file.
+        fail_path (str): path of the failed applications output file.
+    """
+    def __init__(self, filename, success_path, fail_path):
+        self.filename = filename
+        self.outputs = {
+            "successful": {"path": success_path, "num_rows": 0, "num_valid": 0},
+            "failed": {"path": fail_path, "num_rows": 0, "num_valid": 0},
+        }
+        self.member_id_not_null = True
+        self.member_id_stats = collections.Counter()
+
+    def update(self, output, num_rows, num_valid, member_id_not_null=True):
+        """Add the validation counts of a chunk of output data.
+
+        Args:
+            output (str): "successful" or "failed".
+            num_rows (int): number of rows written to the output.
+            num_valid (int): number of those rows that pass validation when re-validated.
+            member_id_not_null (bool): all rows have a member ID (successful output only). Defaults to True.
+        """
+        self.outputs[output]["num_rows"] += int(num_rows)
+        self.outputs[output]["num_valid"] += int(num_valid)
+        self.member_id_not_null = self.member_id_not_null and bool(member_id_not_null)
+
+    def to_dict(self):
+        """Get the summary, including its invariant checks.
+
+        Checks that:
+            - all in successful output are valid applications (all_successful).
+            - all in failed output are non-valid applications (all_failed).
+            - all in successful output have a member ID (member_id_not_null).
+
+        Returns:
+            dict: validation summary.
+        """
+        successful, failed = self.outputs["successful"], self.outputs["failed"]
+        num_rows = successful["num_rows"] + failed["num_rows"]
+        checks = {
+            "all_successful": successful["num_valid"] == successful["num_rows"],
+            "all_failed": failed["num_valid"] == 0,
+            "member_id_not_null": self.member_id_not_null,
+        }
+        return {
+            "filename": self.filename,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "num_rows": num_rows,
+            "fract_success": successful["num_rows"]/num_rows if num_rows else 0.0,
+            "outputs": self.outputs,
+            "member_id_stats": dict(self.member_id_stats),
+            "checks": checks,
+            "pass_check": all(checks.values()),
+        }
+
+    def write(self, filepath):
+        """Write the summary as JSON.
+
+        Args:
+            filepath (str): path of the summary file.
+        """
+        tmp_filepath = filepath + ".tmp"
+        with open(tmp_filepath, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp_filepath, filepath)
+
+
+def read_summary(filepath):
+    """Read a validation summary.
+
+    Args:
+        filepath (str): path of the summary file.
+
+    Returns:
+        dict: validation summary (see ValidationSummary.to_dict).
+    """
+    with open(filepath) as f:
+        return json.load(f)
@@ -0,0 +1,5 @@
+"""Makes the plugins modules importable in the tests, as they are in Airflow (plugins folder on sys.path)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "plugins"))
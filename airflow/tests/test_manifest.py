@@ -0,0 +1,62 @@
+"""Processing manifest: failed files are skipped by the watcher until they change."""
+import os
+
+import manifest
+from file_watch import pending_files
+
+
+def _write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def test_failed_file_skipped_until_changed(tmp_path):
+    input_dir = tmp_path / "raw"
+    input_dir.mkdir()
+    filepath = str(input_dir / "applications.csv")
+    _write(filepath, "first_name,last_name\n")
+    processing_manifest = manifest.Manifest(str(tmp_path / "manifest.json"))
+    assert list(pending_files(str(input_dir), processing_manifest)) == ["applications.csv"]
+
+    processing_manifest.record_failure("applications.csv", manifest.stat_fingerprint(filepath), "Traceback ...")
+    processing_manifest = manifest.Manifest(processing_manifest.filepath)
+    assert processing_manifest.is_failed("applications.csv", filepath)
+    assert not processing_manifest.is_processed("applications.csv", filepath)
+    assert pending_files(str(input_dir), processing_manifest) == {}
+
+    # touched (e.g. fixed and copied again): retried
+    stat = os.stat(filepath)
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert not processing_manifest.is_failed("applications.csv", filepath)
+    assert list(pending_files(str(input_dir), processing_manifest)) == ["applications.csv"]
+
+def test_processed_replaces_failure(tmp_path):
+    filepath = str(tmp_path / "applications.csv")
+    output_path = str(tmp_path / "successful_applications.csv")
+    _write(filepath, "first_name,last_name\n")
+    _write(output_path, "")
+    processing_manifest = manifest.Manifest(str(tmp_path / "manifest.json"))
+    processing_manifest.record_failure("applications.csv", manifest.stat_fingerprint(filepath), "Traceback ...")
+    processing_manifest.record("applications.csv", manifest.fingerprint(filepath), [output_path])
+
+    processing_manifest = manifest.Manifest(processing_manifest.filepath)
+    assert processing_manifest.is_processed("applications.csv", filepath)
+    assert not processing_manifest.is_failed("applications.csv", filepath)
+
+def test_touched_file_hashed_once(tmp_path, monkeypatch):
+    filepath = str(tmp_path / "applications.csv")
+    output_path = str(tmp_path / "successful_applications.csv")
+    _write(filepath, "first_name,last_name\n")
+    _write(output_path, "")
+    processing_manifest = manifest.Manifest(str(tmp_path / "manifest.json"))
+    processing_manifest.record("applications.csv", manifest.fingerprint(filepath), [output_path])
+    stat = os.stat(filepath)
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    hashed = []
+    fingerprint = manifest.fingerprint
+    monkeypatch.setattr(manifest, "fingerprint", lambda path: hashed.append(path) or fingerprint(path))
+    assert processing_manifest.is_processed("applications.csv", filepath)
+    processing_manifest = manifest.Manifest(processing_manifest.filepath)
+    assert processing_manifest.is_processed("applications.csv", filepath)
+    assert hashed == [filepath]
@@ -0,0 +1,30 @@
+"""Member ID index: collision suffixes, row-order independence and stability on reprocessing."""
+import pandas as pd
+
+from member_index import MemberIndex
+
+APPLICANTS = pd.DataFrame({
+    "last_name": ["Tan", "Tan", "Tan", "Lee"],
+    "date_of_birth": ["19900102", "19900102", "19900102", "19850101"],
+    "first_name": ["Amy", "Ben", "Cal", "Dan"],
+    "email": ["amy@a.com", "ben@a.com", "cal@a.com", "dan@a.com"],
+})
+BASE_IDS = pd.Series(["Tan_abcde", "Tan_abcde", "Tan_abcde", "Lee_12345"])
+
+
+def test_suffixes(tmp_path):
+    member_ids, stats = MemberIndex(str(tmp_path / "index.db")).assign(APPLICANTS, BASE_IDS)
+    assert member_ids.tolist() == ["Tan_abcde", "Tan_abcde-1", "Tan_abcde-2", "Lee_12345"]
+    assert stats == {"num_rows": 4, "num_existing": 0, "num_new": 4, "num_collisions": 2}
+
+def test_row_order_independent(tmp_path):
+    reversed_ids, _ = MemberIndex(str(tmp_path / "index.db")).assign(APPLICANTS[::-1], BASE_IDS[::-1])
+    assert reversed_ids.sort_index().tolist() == ["Tan_abcde", "Tan_abcde-1", "Tan_abcde-2", "Lee_12345"]
+
+def test_reprocessing_returns_issued_ids(tmp_path):
+    index = MemberIndex(str(tmp_path / "index.db"))
+    first, _ = index.assign(APPLICANTS.iloc[[1]], BASE_IDS.iloc[[1]])
+    member_ids, stats = index.assign(APPLICANTS, BASE_IDS)
+    assert member_ids.tolist() == ["Tan_abcde-1", "Tan_abcde", "Tan_abcde-2", "Lee_12345"]
+    assert stats["num_existing"] == 1
+    assert index.assign(APPLICANTS, BASE_IDS)[0].tolist() == member_ids.tolist()
@@ -0,0 +1,24 @@
+"""Pipeline metrics: memory is attributed to a stage from tracemalloc, the process peak RSS only per file and run."""
+import dataproc_config as cfg
+import metrics
+
+
+def test_stage_memory_is_traced_per_stage(tmp_path, monkeypatch):
+    monkeypatch.setattr(cfg, "METRICS_TRACEMALLOC", True)
+    monkeypatch.setattr(cfg, "METRICS_DATA_DIR", str(tmp_path))
+    file_metrics = metrics.FileMetrics("applications.csv")
+    with metrics.traced():
+        with file_metrics.stage("clean", rows_in=10):
+            allocated = bytearray(20*1024**2)
+            del allocated
+        with file_metrics.stage("validate", rows_in=10):
+            pass
+
+    stages = file_metrics.to_dict()["stages"]
+    assert all("peak_rss_mb" not in stage for stage in stages.values())
+    assert stages["clean"]["peak_traced_mb"] >= 20
+    assert stages["validate"]["peak_traced_mb"] < 1
+
+    _, run_metrics = metrics.write_run_metrics([file_metrics.to_dict()], "run")
+    assert run_metrics["peak_rss_mb"] > 0
+    assert run_metrics["stages"]["clean"]["peak_traced_mb"] >= 20
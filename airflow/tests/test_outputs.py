@@ -0,0 +1,29 @@
+"""Output files: the rows returned by OutputWriter.write(read_back=True) are the rows read_output reads back."""
+import pandas as pd
+import pytest
+
+import outputs
+
+COLUMNS = ["first_name","last_name","email","date_of_birth","mobile_no","above_18"]
+
+
+@pytest.mark.parametrize("output_format", ["csv", "parquet"])
+def test_read_back_matches_read_output(tmp_path, output_format):
+    df = pd.DataFrame({
+        "first_name": ["Ann", "John", "Jane"],
+        "last_name": ["Lee", "Smith", "Doe"],
+        "email": ["a@l.com", "", "j@d.com"],
+        "date_of_birth": ["19800101", "19900202", "20000303"],
+        "mobile_no": ["87654321", "12345678", ""],
+        "above_18": [True, True, False],
+    }, index=[3, 5, 8])
+    filepath = str(tmp_path / outputs.output_filename("failed", "applications.csv", output_format))
+    with outputs.OutputWriter(filepath, COLUMNS, output_format) as writer:
+        written = writer.write(df, read_back=True)
+        assert writer.write(df.iloc[:0], read_back=True).empty
+
+    read = outputs.read_output(filepath)
+    pd.testing.assert_frame_equal(written.reset_index(drop=True), read)
+    if output_format == "csv":
+        # empty strings are written as empty fields, and read back as missing values
+        assert written["email"].isna().tolist() == [False, True, False]
@@ -0,0 +1,54 @@
+"""Preprocessing: whole-file, streaming and parallel-chunk runs give the same outputs and member IDs."""
+import pandas as pd
+import pytest
+
+import dataproc_config as cfg
+import outputs
+import preprocess
+
+# applicants sharing a base member ID (same last name and date of birth) in different chunks, in reverse
+# identity order, and an exact duplicate row in a later chunk
+RAW = pd.DataFrame({
+    "name": ["Cal Tan", "Dan Lee", "Ben Tan", "Eve Tan", "Amy Tan", "Cal Tan", "Fay Lee", "Gus Ong"],
+    "email": ["cal@a.com", "dan@a.com", "ben@a.com", "eve@a.net", "amy@a.com", "cal@a.com", "fay@a.com", "gus"],
+    "date_of_birth": ["1990-01-02", "1985-01-01", "1990-01-02", "1990/01/02", "02-01-1990", "1990-01-02",
+                      "1985-01-01", "1970-05-05"],
+    "mobile_no": ["81234567", "91234567", "81234568", "8123 4569", "81234570", "81234567", "91234568", "912"],
+})
+
+
+def _run(tmp_path, monkeypatch, mode):
+    input_dir = tmp_path / "input"
+    input_dir.mkdir(exist_ok=True)
+    RAW.to_csv(input_dir / "applications_dataset_1.csv", index=False)
+    out_dir = tmp_path / mode
+    monkeypatch.setattr(cfg, "INPUT_DATA_DIR", str(input_dir))
+    for name in ["SUCCESS_DATA_DIR", "FAIL_DATA_DIR", "SUMMARY_DATA_DIR", "METRICS_DATA_DIR"]:
+        monkeypatch.setattr(cfg, name, str(out_dir / name))
+    monkeypatch.setattr(cfg, "MANIFEST_PATH", str(out_dir / "manifest.json"))
+    monkeypatch.setattr(cfg, "MEMBER_INDEX_PATH", str(out_dir / "member_index.db"))
+    monkeypatch.setattr(cfg, "OUTPUT_FORMAT", "csv")
+    monkeypatch.setattr(cfg, "CHUNK_SIZE", 2)
+    monkeypatch.setattr(cfg, "STREAMING_MODE", mode == "streaming")
+    monkeypatch.setattr(cfg, "PARALLEL_CHUNKS", mode == "parallel_chunks")
+    monkeypatch.setattr(cfg, "LARGE_FILE_BYTES", 0)
+    monkeypatch.setattr(cfg, "NUM_WORKERS", 2 if mode == "parallel_chunks" else 1)
+    preprocess.ingest_and_process_data()
+
+    results = []
+    for output, output_dir in [("successful", cfg.SUCCESS_DATA_DIR), ("failed", cfg.FAIL_DATA_DIR)]:
+        filename = outputs.output_filename(output, "applications_dataset_1.csv", "csv")
+        df = outputs.read_output(str(out_dir / output_dir / filename))
+        results.append(df.sort_values(list(df.columns)).reset_index(drop=True))
+    return results
+
+
+@pytest.mark.parametrize("mode", ["streaming", "parallel_chunks"])
+def test_chunked_run_matches_whole_file(tmp_path, monkeypatch, mode):
+    successful, failed = _run(tmp_path, monkeypatch, "whole_file")
+    assert len(successful) == 6 and len(failed) == 1
+    assert successful["member_id"].str.endswith(("-1", "-2")).sum() == 3
+
+    chunked_successful, chunked_failed = _run(tmp_path, monkeypatch, mode)
+    pd.testing.assert_frame_equal(chunked_successful, successful)
+    pd.testing.assert_frame_equal(chunked_failed, failed)
@@ -0,0 +1,15 @@
+"""Streaming helpers: deduplicating across chunks matches drop_duplicates on the whole file."""
+import numpy as np
+import pandas as pd
+
+import streaming
+
+
+def test_row_deduplicator_matches_drop_duplicates():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"name": rng.choice(["Ann", "Ben", "Cal"], 1000), "mobile_no": rng.integers(0, 50, 1000)})
+    deduplicator = streaming.RowDeduplicator()
+    chunks = [deduplicator.drop_duplicates(df.iloc[start:start+70]) for start in range(0, len(df), 70)]
+    pd.testing.assert_frame_equal(pd.concat(chunks), df.drop_duplicates())
+    assert deduplicator.drop_duplicates(df).empty
+    assert len(deduplicator.kept_hashes) == 0
@@ -1,5 +1,8 @@
 """Flask App Config
 """
+import os
+import tempfile
+
 class Config:
     """ Base config. """
 
@@ -7,6 +10,23 @@ class Config:
     # --------------------------
     FLASK_APP = "wsgi.py"
 
+    # Cache (shared by gunicorn workers)
+    # --------------------------
+    CACHE_TYPE = "FileSystemCache"
+    CACHE_DIR = os.environ.get("DASHBOARD_CACHE_DIR", os.path.join(tempfile.gettempdir(), "dashboard_cache"))
+    CACHE_DEFAULT_TIMEOUT = 15*60   # TTL (seconds)
+    CACHE_THRESHOLD = 500           # max number of entries
+
+    # Time series store (SQLite)
+    # --------------------------
+    SERIES_DB = os.environ.get("DASHBOARD_SERIES_DB", os.path.join(tempfile.gettempdir(), "dashboard_series.db"))
+
+    # Background refresh of time series
+    # --------------------------
+    REFRESH_INTERVAL = 30*60        # seconds between refreshes
+    REFRESH_LOCK_RETRY_INTERVAL = 30    # seconds between attempts of the other workers to take over refreshing
+    REFRESH_LOCK_FILE = os.path.join(tempfile.gettempdir(), "dashboard_refresh.lock")   # not in CACHE_DIR
+
 
 class ProdConfig(Config):
     """ Production config """
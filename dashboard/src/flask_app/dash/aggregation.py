@@ -0,0 +1,132 @@
+"""Server-side aggregation and downsampling of daily-case time series for charts.
+
+Charts send at most MAX_CHART_POINTS points to the browser, whatever the length of the history:
+the series is cut to the selected date range, aggregated to the selected resolution, and then
+downsampled with Largest-Triangle-Three-Buckets (LTTB), which keeps the peaks and troughs.
+    RESOLUTIONS: pandas resample rule of each resolution.
+    prepare_series: cut, aggregate and downsample a daily-case series.
+    prepare_series_many: cut, aggregate and downsample the daily-case series of several countries/statuses.
+    lttb: LTTB downsampling of a series.
+"""
+import numpy as np
+import pandas as pd
+
+MAX_CHART_POINTS = 500
+MIN_POINTS_PER_SERIES = 3       # LTTB keeps at least the first, last and one point in between
+
+RESOLUTIONS = {
+    "daily": None,
+    "weekly": "W-MON",
+    "monthly": "MS",
+}
+
+def prepare_series(df, start_date=None, end_date=None, resolution="daily", max_points=MAX_CHART_POINTS):
+    """Cuts a daily-case series to a date range, aggregates it to a resolution and downsamples it.
+
+    Args:
+        df (pandas dataframe): with columns "Date" (ISO date strings) and "Daily Cases".
+        start_date (str): first date to include ("YYYY-MM-DD"). Defaults to None (from the start).
+        end_date (str): last date to include ("YYYY-MM-DD"). Defaults to None (to the end).
+        resolution (str): one of RESOLUTIONS. Defaults to "daily".
+        max_points (int): maximum number of points returned. Defaults to MAX_CHART_POINTS.
+
+    Returns:
+        pandas dataframe: with columns "Date" (datetime) and "Daily Cases" (summed per period).
+    """
+    return _downsample(_aggregate(df, start_date, end_date, resolution), max_points)
+
+def prepare_series_many(df, start_date=None, end_date=None, resolution="daily", max_points=MAX_CHART_POINTS):
+    """Cuts, aggregates and downsamples each series of a long dataframe (see prepare_series).
+
+    The points are shared between the series, so the result has at most max_points points in total:
+    each series gets an equal share, and series shorter than their share pass the rest on to the longer
+    ones. At most max_points // MIN_POINTS_PER_SERIES series are kept (the first ones, in order of
+    country and status), so that each series keeps at least MIN_POINTS_PER_SERIES points.
+
+    Args:
+        df (pandas dataframe): with columns "Country", "Status", "Date" (ISO date strings) and "Daily Cases".
+        start_date (str): first date to include ("YYYY-MM-DD"). Defaults to None (from the start).
+        end_date (str): last date to include ("YYYY-MM-DD"). Defaults to None (to the end).
+        resolution (str): one of RESOLUTIONS. Defaults to "daily".
+        max_points (int): maximum number of points returned. Defaults to MAX_CHART_POINTS.
+
+    Returns:
+        pandas dataframe: with columns "Country", "Status", "Date" (datetime) and "Daily Cases" (summed per period).
+    """
+    groups = list(df.groupby(["Country","Status"], sort=True))[:max(1, max_points // MIN_POINTS_PER_SERIES)]
+    aggregated = [_aggregate(group, start_date, end_date, resolution) for _, group in groups]
+
+    # shortest series first, so that the points they do not use are shared by the longer ones
+    points = [0]*len(aggregated)
+    remaining = max_points
+    for i, position in enumerate(sorted(range(len(aggregated)), key=lambda position: len(aggregated[position]))):
+        points[position] = min(len(aggregated[position]), remaining // (len(aggregated) - i))
+        remaining -= points[position]
+
+    prepared = [
+        _downsample(cases, num_points).assign(Country=country, Status=status)
+        for ((country, status), _), cases, num_points in zip(groups, aggregated, points)
+    ]
+    if not prepared:
+        return pd.DataFrame(columns=["Country","Status","Date","Daily Cases"])
+    return pd.concat(prepared, ignore_index=True)[["Country","Status","Date","Daily Cases"]]
+
+def lttb(x, y, threshold):
+    """Selects the points of a series to keep with Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept. The points in between are split into threshold - 2
+    buckets, and from each bucket the point forming the largest triangle with the previously kept
+    point and the average of the next bucket is kept.
+
+    Args:
+        x (numpy array): x values, in increasing order.
+        y (numpy array): y values.
+        threshold (int): number of points to keep.
+
+    Returns:
+        numpy array: positions of the points kept, in increasing order.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    buckets = np.array_split(np.arange(1, n-1), threshold-2)
+    kept = np.empty(threshold, dtype="int64")
+    kept[0], kept[-1] = 0, n-1
+    for i, bucket in enumerate(buckets):
+        following = buckets[i+1] if i+1 < len(buckets) else np.array([n-1])
+        avg_x, avg_y = x[following].mean(), y[following].mean()
+        prev = kept[i]
+        areas = np.abs((x[prev]-avg_x)*(y[bucket]-y[prev]) - (x[prev]-x[bucket])*(avg_y-y[prev]))
+        kept[i+1] = bucket[np.argmax(areas)]
+    return kept
+
+def _aggregate(df, start_date, end_date, resolution):
+    """Cuts a daily-case series to a date range and aggregates it to a resolution (see prepare_series).
+
+    Returns:
+        pandas series: daily cases (summed per period), indexed by date.
+    """
+    cases = pd.Series(df["Daily Cases"].to_numpy(dtype="float64"),
+                      index=pd.to_datetime(df["Date"]).dt.tz_localize(None).dt.normalize())
+    if start_date:
+        cases = cases[cases.index >= pd.Timestamp(start_date)]
+    if end_date:
+        cases = cases[cases.index <= pd.Timestamp(end_date)]
+
+    rule = RESOLUTIONS[resolution]
+    if rule is not None:
+        # periods are labelled by their first day
+        cases = cases.resample(rule, label="left", closed="left").sum(min_count=1)
+    return cases
+
+def _downsample(cases, max_points):
+    """Downsamples an aggregated series with LTTB (see prepare_series).
+
+    Returns:
+        pandas dataframe: with columns "Date" (datetime) and "Daily Cases".
+    """
+    cases = cases.iloc[lttb(cases.index.to_numpy(dtype="int64"), cases.fillna(0).to_numpy(), max_points)]
+    return pd.DataFrame({"Date": cases.index, "Daily Cases": cases.to_numpy()})
@@ -0,0 +1,106 @@
+"""Data access layer for the COVID-19 API.
+
+All requests share one pooled keep-alive requests.Session per worker, with connect/read timeouts and
+bounded retries with exponential backoff for connection errors and transient HTTP errors. Concurrent
+identical requests (e.g. from threads of the same gunicorn worker) are coalesced into one upstream call.
+    CovidApiClient: client for the COVID-19 API.
+    client: shared CovidApiClient used by the callbacks.
+"""
+import threading
+from concurrent.futures import Future
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# ===========================
+# Initialize globals
+HOST = "https://api.covid19api.com"
+CONNECT_TIMEOUT = 3.05          # seconds to establish a connection
+READ_TIMEOUT = 20               # seconds to wait for data between bytes
+MAX_RETRIES = 3                 # retries of a failed request
+BACKOFF_FACTOR = 0.5            # sleep 0.5s, 1s, 2s, ... between retries
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+POOL_MAXSIZE = 10               # keep-alive connections per host
+
+
+class CovidApiClient:
+    """Client for the COVID-19 API.
+
+    Args:
+        host (str): base URL of the API. Defaults to HOST.
+        timeout (tuple): connect and read timeouts (seconds). Defaults to (CONNECT_TIMEOUT, READ_TIMEOUT).
+        max_retries (int): retries of a failed request. Defaults to MAX_RETRIES.
+        backoff_factor (float): backoff factor between retries. Defaults to BACKOFF_FACTOR.
+    """
+    def __init__(self, host=HOST, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+                 max_retries=MAX_RETRIES, backoff_factor=BACKOFF_FACTOR):
+        self.host = host
+        self.timeout = timeout
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def get_json(self, path):
+        """GET a path of the API and decode the JSON response.
+
+        If the same path is already being fetched, waits for that request and returns its result.
+
+        Args:
+            path (str): path of the API endpoint, e.g. "/country/singapore/status/confirmed".
+
+        Returns:
+            list or dict: decoded JSON response.
+
+        Raises:
+            requests.RequestException: if the request fails, times out or returns an error status.
+        """
+        with self._lock:
+            future = self._in_flight.get(path)
+            is_leader = future is None
+            if is_leader:
+                future = self._in_flight[path] = Future()
+        if not is_leader:
+            return future.result()
+
+        try:
+            url_string = f"{self.host}{path}"
+            print(f"Making API request to {url_string}")
+            response = self.session.get(url=url_string, timeout=self.timeout)
+            response.raise_for_status()
+            future.set_result(response.json())
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._in_flight[path]
+        return future.result()
+
+    def get_country_status(self, country, status, date_from=None, date_to=None):
+        """Get the cumulative cases of a country and case status, optionally for a date range only.
+
+        Args:
+            country (str): country slug of the API, e.g. "singapore".
+            status (str): case status of the API, e.g. "confirmed".
+            date_from (str): first date of the range (inclusive), e.g. "2022-12-01T00:00:00Z". Defaults to None.
+            date_to (str): last date of the range (inclusive), required with date_from. Defaults to None.
+
+        Returns:
+            list: one dictionary per day, with keys including "Date" and "Cases".
+        """
+        path = f"/country/{country}/status/{status}"
+        if date_from is not None:
+            path += f"?from={date_from}&to={date_to}"
+        return self.get_json(path)
+
+
+client = CovidApiClient()
@@ -0,0 +1,10 @@
+"""Server-side cache for the Dash app.
+
+The cache is a Flask-Caching FileSystemCache (configured in config.py), so cached API responses and
+figures are shared by all gunicorn workers. Entries expire after CACHE_DEFAULT_TIMEOUT seconds, and
+the oldest entries are evicted once CACHE_THRESHOLD entries are stored.
+    cache: Flask-Caching object, bound to the Flask app in dashboard.create_dashboard.
+"""
+from flask_caching import Cache
+
+cache = Cache()
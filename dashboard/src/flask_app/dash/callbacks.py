@@ -1,12 +1,16 @@
 """ Callbacks for Dash app. """
 import requests
-from dash import Input, Output, dcc
+from dash import Input, Output, dcc, html
 import plotly.express as px
-import pandas as pd
+from .cache import cache
+from . import series
+from .aggregation import prepare_series, prepare_series_many
+from .layouts import country_options, status_options
 
 # ===========================
 # Initialize globals
-HOST = "https://api.covid19api.com"
+COUNTRY_LABELS = {option["value"]: option["label"] for option in country_options}
+STATUS_LABELS = {option["value"]: option["label"] for option in status_options}
 
 # ===========================
 # Initialize callbacks
@@ -25,38 +29,142 @@ def init_callbacks(app):
         [
             Input("selected-country", "value"),
             Input("selected-status", "value"),
+            Input("selected-date-range", "start_date"),
+            Input("selected-date-range", "end_date"),
+            Input("selected-resolution", "value"),
         ],
     )
-    def get_covid_19_graph(selected_country="singapore", selected_status="confirmed"):
-        """Retrieves covid-19 data via API call to HOST and generates histogram of cases over time.
+    def get_covid_19_graph(selected_country="singapore", selected_status="confirmed",
+                           start_date=None, end_date=None, selected_resolution="daily"):
+        """Generates histogram of covid-19 cases over time from the local series store (see series.py).
 
         Args:
-            selected_country (str): _description_. Defaults to "singapore".
-            selected_status (str): _description_. Defaults to "confirmed".
+            selected_country (str): country slug of the API. Defaults to "singapore".
+            selected_status (str): case status of the API. Defaults to "confirmed".
+            start_date (str): first date shown ("YYYY-MM-DD"). Defaults to None (from the start).
+            end_date (str): last date shown ("YYYY-MM-DD"). Defaults to None (to the end).
+            selected_resolution (str): "daily", "weekly" or "monthly". Defaults to "daily".
 
         Returns:
             dcc.Graph component: that contains the histogram figure to be visualized
+                (or a message if the API is unavailable)
         """
-        # Make API request to host
-        # - response is a list of dictionaries of covid-data
-        # - each dictonary is a single row of data
-        url_string = f"{HOST}/country/{selected_country}/status/{selected_status}"
-        print(f"Making API request to {url_string}")
-        response = requests.get(url=url_string).json()
-
-        # Create pandas dataframe from response data where 
-        # only interested columns "Date" and "Cases" are loaded
-        df = pd.DataFrame.from_records(data=response, columns=["Date","Cases"])
-
-        # Compute daily cases from "Cases"
-        df["Daily Cases"] = df["Cases"].diff()
-        
-        # Generate histogram
-        fig = px.bar(
-            df, x="Date", y="Daily Cases", title="Covid-19 Daily Case Count - Singapore", 
-            template="plotly_white", range_y = [0, df["Daily Cases"].max()+2000])
-        fig.update_traces(marker_color='red')
-        fig.update_layout(bargap=0, yaxis_title="")
+        try:
+            refreshed_at = series.get_refreshed_at([(selected_country, selected_status)])
+            fig = get_covid_19_figure(selected_country, selected_status, refreshed_at,
+                                      start_date, end_date, selected_resolution)
+        except requests.RequestException as e:
+            print(f"API request failed: {e}")
+            return html.Div("Covid-19 data is currently unavailable. Please try again later.")
         child = dcc.Graph(figure=fig)
 
         return child
+
+    # ==========================
+    # COUNTRY COMPARISON
+    @app.callback(
+        Output("covid19_comparison_graph", "children"),
+        [
+            Input("compare-countries", "value"),
+            Input("compare-statuses", "value"),
+            Input("selected-date-range", "start_date"),
+            Input("selected-date-range", "end_date"),
+            Input("selected-resolution", "value"),
+        ],
+    )
+    def get_covid_19_comparison_graph(selected_countries=None, selected_statuses=None,
+                                      start_date=None, end_date=None, selected_resolution="daily"):
+        """Generates line chart comparing covid-19 cases over time of several countries/statuses.
+
+        Args:
+            selected_countries (list): country slugs of the API. Defaults to None (no chart).
+            selected_statuses (list): case statuses of the API. Defaults to None (no chart).
+            start_date (str): first date shown ("YYYY-MM-DD"). Defaults to None (from the start).
+            end_date (str): last date shown ("YYYY-MM-DD"). Defaults to None (to the end).
+            selected_resolution (str): "daily", "weekly" or "monthly". Defaults to "daily".
+
+        Returns:
+            dcc.Graph component: that contains the comparison figure to be visualized
+                (or a message if nothing is selected or the API is unavailable)
+        """
+        if not selected_countries or not selected_statuses:
+            return html.Div("Select countries and statuses to compare.")
+
+        # sorted, so that the same selection in any order hits the same cached figure
+        combinations = [(country, status) for country in sorted(selected_countries) for status in sorted(selected_statuses)]
+        try:
+            refreshed_at = series.get_refreshed_at(combinations)
+            fig = get_covid_19_comparison_figure(combinations, refreshed_at, start_date, end_date, selected_resolution)
+        except requests.RequestException as e:
+            print(f"API request failed: {e}")
+            return html.Div("Covid-19 data is currently unavailable. Please try again later.")
+        child = dcc.Graph(figure=fig)
+
+        return child
+
+# ===========================
+# Cached figures
+@cache.memoize()
+def get_covid_19_figure(selected_country, selected_status, refreshed_at,
+                        start_date=None, end_date=None, selected_resolution="daily"):
+    """Generates histogram figure of covid-19 cases over time from the stored series (see series.py).
+
+    The series is aggregated and downsampled on the server (see aggregation.py), so the figure has a
+    bounded number of points. Figures are cached per (country, status, refresh time of the series,
+    date range, resolution), so they are not rebuilt for repeated identical queries, and are rebuilt
+    once the series is refreshed.
+
+    Args:
+        selected_country (str): country slug of the API.
+        selected_status (str): case status of the API.
+        refreshed_at (float): refresh time of the stored series.
+        start_date (str): first date shown ("YYYY-MM-DD"). Defaults to None (from the start).
+        end_date (str): last date shown ("YYYY-MM-DD"). Defaults to None (to the end).
+        selected_resolution (str): "daily", "weekly" or "monthly". Defaults to "daily".
+
+    Returns:
+        plotly figure: histogram of cases per day, week or month.
+    """
+    df = series.get_daily_cases([(selected_country, selected_status)])
+    df = prepare_series(df, start_date, end_date, selected_resolution)
+
+    # Generate histogram
+    fig = px.bar(
+        df, x="Date", y="Daily Cases",
+        title=f"Covid-19 {selected_resolution.capitalize()} Case Count - {COUNTRY_LABELS.get(selected_country, selected_country)}",
+        template="plotly_white", range_y = [0, df["Daily Cases"].max()+2000])
+    fig.update_traces(marker_color='red')
+    fig.update_layout(bargap=0, yaxis_title="")
+
+    return fig
+
+@cache.memoize()
+def get_covid_19_comparison_figure(combinations, refreshed_at, start_date=None, end_date=None, selected_resolution="daily"):
+    """Generates line chart figure comparing covid-19 cases over time of several countries/statuses.
+
+    All series are read from the store as one long dataframe (see series.py), and aggregated and
+    downsampled on the server to a bounded number of points in total (see aggregation.py).
+
+    Args:
+        combinations (list): (country, status) tuples, sorted.
+        refreshed_at (float): latest refresh time of the stored series.
+        start_date (str): first date shown ("YYYY-MM-DD"). Defaults to None (from the start).
+        end_date (str): last date shown ("YYYY-MM-DD"). Defaults to None (to the end).
+        selected_resolution (str): "daily", "weekly" or "monthly". Defaults to "daily".
+
+    Returns:
+        plotly figure: one line of cases per day, week or month for each country/status.
+    """
+    df = series.get_daily_cases(combinations)
+    df = prepare_series_many(df, start_date, end_date, selected_resolution)
+    df["Country"] = df["Country"].map(COUNTRY_LABELS).fillna(df["Country"])
+    df["Status"] = df["Status"].map(STATUS_LABELS).fillna(df["Status"])
+
+    # Generate line chart
+    fig = px.line(
+        df, x="Date", y="Daily Cases", color="Country", line_dash="Status",
+        title=f"Covid-19 {selected_resolution.capitalize()} Case Count - Comparison",
+        template="plotly_white")
+    fig.update_layout(yaxis_title="")
+
+    return fig
@@ -1,8 +1,10 @@
 """Module to create Plotly Dash dashboard application."""
 import dash
 from dash import html
-from .layouts import html_index_string, header_main, layout_main
+from .layouts import html_index_string, header_main, layout_main, country_options, status_options
 from .callbacks import init_callbacks
+from .cache import cache
+from .refresher import start_refresher
 
 def create_dashboard(server):
     """Create and initialize a Plotly Dash dashboard object for binding to input server.
@@ -35,6 +37,9 @@ def create_dashboard(server):
     dash_app.css.config.serve_locally = True
     dash_app.scripts.config.serve_locally = True
 
+    # initialize server-side cache
+    cache.init_app(server)
+
     # initialize index_string
     dash_app.index_string = html_index_string
 
@@ -47,4 +52,11 @@ def create_dashboard(server):
     # initialize callbacks
     init_callbacks(dash_app)
 
+    # start background refresh of the time series of every dropdown option
+    start_refresher(
+        server,
+        [option["value"] for option in country_options],
+        [option["value"] for option in status_options],
+    )
+
     return dash_app.server
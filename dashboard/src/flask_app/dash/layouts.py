@@ -2,6 +2,7 @@
     html_index_string: index string
     header_main: top-most header of dashboard.
     layout_main: main components of dashboard.
+    country_options, status_options: dropdown options (also refreshed in the background, see refresher.py).
 """
 from dash import html, dcc
 from datetime import datetime as dt
@@ -58,6 +59,41 @@ className="main-header"
 #===============================#
 main_tab_style={'display':'inline-block','width':'95%','padding':'15px'}
 
+country_options = [
+    {"label": "Singapore", "value": "singapore"},
+    {"label": "Australia", "value": "australia"},
+    {"label": "Brazil", "value": "brazil"},
+    {"label": "Canada", "value": "canada"},
+    {"label": "China", "value": "china"},
+    {"label": "France", "value": "france"},
+    {"label": "Germany", "value": "germany"},
+    {"label": "India", "value": "india"},
+    {"label": "Indonesia", "value": "indonesia"},
+    {"label": "Italy", "value": "italy"},
+    {"label": "Japan", "value": "japan"},
+    {"label": "Korea (South)", "value": "korea-south"},
+    {"label": "Malaysia", "value": "malaysia"},
+    {"label": "Mexico", "value": "mexico"},
+    {"label": "New Zealand", "value": "new-zealand"},
+    {"label": "Philippines", "value": "philippines"},
+    {"label": "South Africa", "value": "south-africa"},
+    {"label": "Spain", "value": "spain"},
+    {"label": "Thailand", "value": "thailand"},
+    {"label": "United Kingdom", "value": "united-kingdom"},
+    {"label": "United States of America", "value": "united-states"},
+    {"label": "Viet Nam", "value": "vietnam"},
+]
+status_options = [
+    {"label": "Confirmed", "value": "confirmed"},
+    {"label": "Deaths", "value": "deaths"},
+    {"label": "Recovered", "value": "recovered"},
+]
+resolution_options = [
+    {"label": "Daily", "value": "daily"},
+    {"label": "Weekly", "value": "weekly"},
+    {"label": "Monthly", "value": "monthly"},
+]
+
 layout_main = html.Div([
     html.Div(
     children=[
@@ -77,9 +113,7 @@ layout_main = html.Div([
         ),
         dcc.Dropdown(
             id="selected-country",
-            options=[
-                {"label": "Singapore", "value": "singapore"},
-            ],
+            options=country_options,
             value="singapore",
             style={
                 "width": "30%",
@@ -100,9 +134,7 @@ layout_main = html.Div([
         ),
         dcc.Dropdown(
             id="selected-status",
-            options=[
-                {"label": "Confirmed", "value": "confirmed"},
-            ],
+            options=status_options,
             value="confirmed",
             style={
                 "width": "30%",
@@ -111,11 +143,104 @@ layout_main = html.Div([
             },
         ),
 
+        html.Br(),
+
+        #====================
+        # (C) DATE RANGE
+        html.Label(
+            "Dates:",
+            style={
+                "width": "8%",
+                "font-weight": "bold",
+                "font-size": "18px",},
+        ),
+        dcc.DatePickerRange(
+            id="selected-date-range",
+            min_date_allowed=dt(2020, 1, 1),
+            display_format="YYYY-MM-DD",
+            clearable=True,
+        ),
+        html.Br(),
+
+        #====================
+        # (D) RESOLUTION
+        html.Label(
+            "Resolution:",
+            style={
+                "width": "8%",
+                "font-weight": "bold",
+                "font-size": "18px",},
+        ),
+        dcc.RadioItems(
+            id="selected-resolution",
+            options=resolution_options,
+            value="daily",
+            inline=True,
+            style={
+                "display": "inline-block",
+                "verticalAlign": "middle",
+            },
+        ),
+
         #==========================
-        # (C) COVID19 CASES GRAPH
+        # (E) COVID19 CASES GRAPH
         html.Div(id='covid19_graph', style={"width":"75%"}),
         html.Br(),
         html.Br(),
+
+        #======================================#
+        #                                      #
+        # COUNTRY COMPARISON                   #
+        #                                      #
+        #======================================#
+        #====================
+        # (F) COUNTRIES
+        html.Label(
+            "Compare countries:",
+            style={
+                "width": "15%",
+                "font-weight": "bold",
+                "font-size": "18px",},
+        ),
+        dcc.Dropdown(
+            id="compare-countries",
+            options=country_options,
+            value=["singapore", "malaysia"],
+            multi=True,
+            style={
+                "width": "60%",
+                "display": "inline-block",
+                "verticalAlign": "middle",
+            },
+        ),
+        html.Br(),
+
+        #====================
+        # (G) STATUSES
+        html.Label(
+            "Compare statuses:",
+            style={
+                "width": "15%",
+                "font-weight": "bold",
+                "font-size": "18px",},
+        ),
+        dcc.Dropdown(
+            id="compare-statuses",
+            options=status_options,
+            value=["confirmed"],
+            multi=True,
+            style={
+                "width": "60%",
+                "display": "inline-block",
+                "verticalAlign": "middle",
+            },
+        ),
+
+        #==========================
+        # (H) COMPARISON GRAPH
+        html.Div(id='covid19_comparison_graph', style={"width":"75%"}),
+        html.Br(),
+        html.Br(),
     ],
     style=main_tab_style),
 ],
@@ -0,0 +1,67 @@
+"""Background refresher of the daily-case time series.
+
+Every gunicorn worker starts a refresher thread, but only the one holding an exclusive lock on the
+refresh lock file pulls from the API; the others retry the lock every REFRESH_LOCK_RETRY_INTERVAL
+seconds, so refreshing continues soon after that worker exits.
+    start_refresher: start the background refresher thread for a Flask app.
+"""
+import os
+import time
+import fcntl
+import itertools
+import threading
+from .series import refresh_daily_cases
+
+def start_refresher(server, countries, statuses):
+    """Starts a daemon thread that periodically refreshes the series of every country/status combination.
+
+    Uses the Flask config values REFRESH_INTERVAL (seconds between refreshes), REFRESH_LOCK_RETRY_INTERVAL
+    (seconds between attempts to take the refresh lock) and REFRESH_LOCK_FILE.
+
+    Args:
+        server (Flask app): Flask app whose config sets the series store (see series.py).
+        countries (list): country slugs of the API.
+        statuses (list): case statuses of the API.
+
+    Returns:
+        threading.Thread: the refresher thread.
+    """
+    thread = threading.Thread(
+        target=_refresh_forever,
+        args=(server, list(itertools.product(countries, statuses))),
+        name="series-refresher",
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+def _refresh_forever(server, combinations):
+    """Refreshes every combination once per REFRESH_INTERVAL while holding the refresh lock.
+
+    Workers that do not hold the lock retry it every REFRESH_LOCK_RETRY_INTERVAL, and only the lock
+    holder waits the full REFRESH_INTERVAL between refreshes.
+
+    Args:
+        server (Flask app): Flask app whose config sets the series store (see series.py).
+        combinations (list): (country, status) tuples.
+    """
+    interval = server.config["REFRESH_INTERVAL"]
+    retry_interval = server.config["REFRESH_LOCK_RETRY_INTERVAL"]
+    lock_file = server.config["REFRESH_LOCK_FILE"]
+    os.makedirs(os.path.dirname(lock_file), exist_ok=True)
+    with open(lock_file, "a") as f:
+        while True:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # another worker is refreshing
+                time.sleep(retry_interval)
+                continue
+
+            started_at = time.time()
+            with server.app_context():
+                try:
+                    refresh_daily_cases(combinations)
+                except Exception as e:
+                    print(f"Refresh failed: {e}")
+            time.sleep(max(0, interval - (time.time() - started_at)))
@@ -0,0 +1,226 @@
+"""Local time-series store of daily cases.
+
+The history of each (country, status) is kept in a SQLite database at SERIES_DB (see config.py), and
+is kept up to date by the background refresher (see refresher.py), so callbacks read it locally
+instead of waiting on the API. A refresh only fetches the dates from the last stored date on (using the
+date-range form of the API), as the count of the last stored date may have been revised since, and
+computes their daily cases from the stored cumulative count of the date before.
+
+Several countries/statuses are refreshed as one batch: they are fetched concurrently, and their new
+dates are kept in a single long dataframe, whose daily cases are computed in one grouped diff.
+    get_refreshed_at: refresh time of the stored series of country/status combinations (fetched if not stored yet).
+    get_daily_cases: read the stored series of country/status combinations.
+    refresh_daily_cases: fetch and store the new (and revised last) dates of the series of country/status combinations.
+"""
+import time
+import sqlite3
+import contextlib
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from flask import current_app
+from .api import client
+
+MAX_FETCH_WORKERS = 8           # concurrent API requests of a batch refresh
+
+SERIES_DDL = [
+    """CREATE TABLE IF NOT EXISTS daily_cases (
+        country text NOT NULL,
+        status text NOT NULL,
+        date text NOT NULL,
+        cases integer NOT NULL,
+        daily_cases integer,
+        PRIMARY KEY (country, status, date)
+    )""",
+    """CREATE TABLE IF NOT EXISTS refreshes (
+        country text NOT NULL,
+        status text NOT NULL,
+        refreshed_at real NOT NULL,
+        PRIMARY KEY (country, status)
+    )""",
+]
+
+SERIES_KEYS = ["Country","Status"]
+
+def get_refreshed_at(combinations):
+    """Gets the latest refresh time of the stored daily cases of country/status combinations.
+
+    Series that are not stored yet (e.g. before the first refresh) are fetched from the API first.
+
+    Args:
+        combinations (list): (country, status) tuples.
+
+    Returns:
+        float: latest refresh time (epoch seconds).
+    """
+    refreshed_at = _read_refreshes(combinations)
+    missing = [combination for combination in combinations if combination not in refreshed_at]
+    if missing:
+        refreshed_at.update(refresh_daily_cases(missing))
+    return max(refreshed_at.values(), default=0.0)
+
+def get_daily_cases(combinations):
+    """Reads the stored daily cases of country/status combinations.
+
+    Args:
+        combinations (list): (country, status) tuples.
+
+    Returns:
+        pandas dataframe: with columns "Country", "Status", "Date", "Cases" and "Daily Cases", in order
+            of country, status and date.
+    """
+    with contextlib.closing(_connect()) as conn:
+        return pd.read_sql_query(
+            """SELECT country AS "Country", status AS "Status", date AS "Date", cases AS "Cases",
+                daily_cases AS "Daily Cases"
+            FROM daily_cases WHERE (country, status) IN ({})
+            ORDER BY country, status, date""".format(",".join(["(?, ?)"]*len(combinations))),
+            conn, params=list(itertools.chain.from_iterable(combinations)))
+
+def refresh_daily_cases(combinations):
+    """Retrieves the new covid-19 data of country/status combinations via the API client (see api.py) and stores it.
+
+    Only the dates from the last stored date of each series on are fetched (the full history on its first
+    refresh). The last stored date is replaced, in case its count was revised, and the daily cases are
+    computed from the stored cumulative count of the date before it. Combinations whose request fails
+    are skipped, and refreshed on the next call.
+
+    Args:
+        combinations (list): (country, status) tuples.
+
+    Returns:
+        dict: refresh time (epoch seconds) of each (country, status) refreshed.
+
+    Raises:
+        requests.RequestException: if the requests of all combinations fail.
+    """
+    with contextlib.closing(_connect()) as conn:
+        last, previous = _read_last(conn, combinations)
+
+        # Make API requests to host concurrently
+        # - each response is a list of dictionaries of covid-data
+        # - each dictonary is a single row of data
+        date_to = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        def fetch(combination):
+            date_from = last.get(combination)
+            return client.get_country_status(*combination, date_from, date_to if date_from else None)
+
+        with ThreadPoolExecutor(max_workers=MAX_FETCH_WORKERS) as executor:
+            futures = [(combination, executor.submit(fetch, combination)) for combination in combinations]
+        responses, errors = {}, []
+        for combination, future in futures:
+            try:
+                responses[combination] = future.result()
+            except Exception as e:
+                print(f"API request of {combination[0]}/{combination[1]} failed: {e}")
+                errors.append(e)
+        if errors and not responses:
+            raise errors[0]
+
+        df = _new_daily_cases(responses, last, previous)
+
+        refreshed_at = time.time()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO daily_cases VALUES (?, ?, ?, ?, ?)",
+                zip(df["Country"], df["Status"], df["Date"], df["Cases"].astype(int).tolist(),
+                    df["Daily Cases"].astype(object).where(df["Daily Cases"].notna(), None).tolist()))
+            conn.executemany(
+                "INSERT OR REPLACE INTO refreshes VALUES (?, ?, ?)",
+                [(*combination, refreshed_at) for combination in responses])
+    print(f"Stored {len(df)} new or revised dates of {len(responses)} series")
+    return {combination: refreshed_at for combination in responses}
+
+def _new_daily_cases(responses, last, previous):
+    """Computes the daily cases of the new dates of fetched series, as one long dataframe.
+
+    Rows of the same date (e.g. one per province) are summed, and dates before the last stored date are
+    dropped (the last stored date is kept, to replace it with its possibly revised count). The daily
+    cases of all series are computed in one grouped diff, continuing from the stored cumulative count
+    of the date before the last stored date of each series.
+
+    Args:
+        responses (dict): API response of each (country, status).
+        last (dict): last stored date of each (country, status).
+        previous (dict): stored (date, cases) of the date before the last stored date of each (country, status).
+
+    Returns:
+        pandas dataframe: with columns "Country", "Status", "Date", "Cases" and "Daily Cases".
+    """
+    combinations = list(responses)
+    lengths = [len(responses[combination]) for combination in combinations]
+    df = pd.DataFrame.from_records(
+        itertools.chain.from_iterable(responses[combination] for combination in combinations),
+        columns=["Date","Cases"])
+    df["Country"] = np.repeat([country for country, _ in combinations], lengths)
+    df["Status"] = np.repeat([status for _, status in combinations], lengths)
+    df = df.groupby(SERIES_KEYS + ["Date"], as_index=False)["Cases"].sum()
+
+    # the last stored date is fetched again, in case it was revised
+    last_date = df[SERIES_KEYS].merge(
+        pd.DataFrame([(country, status, date) for (country, status), date in last.items()],
+                     columns=SERIES_KEYS + ["Date"]),
+        on=SERIES_KEYS, how="left")["Date"]
+    df = df[last_date.isna().to_numpy() | (df["Date"] >= last_date).to_numpy()]
+
+    # stored row before the last stored date of each series, to continue the diff from
+    stored = pd.DataFrame(
+        [(country, status, date, cases) for (country, status), (date, cases) in previous.items()
+         if (country, status) in responses],
+        columns=SERIES_KEYS + ["Date","Cases"])
+
+    df = pd.concat([stored.assign(stored=True), df.assign(stored=False)], ignore_index=True)
+    df = df.sort_values(SERIES_KEYS + ["Date"], ignore_index=True)
+    df["Daily Cases"] = df.groupby(SERIES_KEYS)["Cases"].diff()
+    return df[~df["stored"]].drop(columns="stored")
+
+def _read_refreshes(combinations):
+    """Reads the refresh times of stored series.
+
+    Args:
+        combinations (list): (country, status) tuples.
+
+    Returns:
+        dict: refresh time of each stored (country, status).
+    """
+    with contextlib.closing(_connect()) as conn:
+        rows = conn.execute(
+            "SELECT country, status, refreshed_at FROM refreshes WHERE (country, status) IN ({})".format(
+                ",".join(["(?, ?)"]*len(combinations))),
+            list(itertools.chain.from_iterable(combinations))).fetchall()
+    return {(country, status): refreshed_at for country, status, refreshed_at in rows}
+
+def _read_last(conn, combinations):
+    """Reads the last stored date of series, and the stored date and cumulative count before it.
+
+    Args:
+        conn (sqlite3 connection): connection to the series store.
+        combinations (list): (country, status) tuples.
+
+    Returns:
+        tuple: dict of the last stored date of each stored (country, status), and dict of the stored
+            (date, cases) before the last stored date of each (country, status) with at least two dates.
+    """
+    rows = conn.execute(
+        """SELECT country, status, date, cases, rank FROM (
+            SELECT country, status, date, cases,
+                ROW_NUMBER() OVER (PARTITION BY country, status ORDER BY date DESC) AS rank
+            FROM daily_cases WHERE (country, status) IN ({})
+        ) WHERE rank <= 2""".format(",".join(["(?, ?)"]*len(combinations))),
+        list(itertools.chain.from_iterable(combinations))).fetchall()
+    last = {(country, status): date for country, status, date, _, rank in rows if rank == 1}
+    previous = {(country, status): (date, cases) for country, status, date, cases, rank in rows if rank == 2}
+    return last, previous
+
+def _connect():
+    """Opens a connection to the series store, creating its tables if needed.
+
+    Returns:
+        sqlite3 connection: connection to SERIES_DB.
+    """
+    conn = sqlite3.connect(current_app.config["SERIES_DB"], timeout=30)
+    for ddl in SERIES_DDL:
+        conn.execute(ddl)
+    return conn
@@ -0,0 +1,5 @@
+"""Makes the flask_app package importable in the tests, as it is from the working directory of wsgi.py (src)."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
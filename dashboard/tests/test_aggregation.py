@@ -0,0 +1,31 @@
+"""Chart aggregation: the points of several series are bounded by MAX_CHART_POINTS in total."""
+import numpy as np
+import pandas as pd
+
+from flask_app.dash.aggregation import MAX_CHART_POINTS, MIN_POINTS_PER_SERIES, prepare_series_many
+
+
+def _series(country, num_days):
+    dates = pd.date_range("2020-01-22", periods=num_days, freq="D")
+    return pd.DataFrame({
+        "Country": country,
+        "Status": "confirmed",
+        "Date": dates.strftime("%Y-%m-%dT00:00:00Z"),
+        "Daily Cases": np.random.default_rng(0).integers(0, 1000, num_days),
+    })
+
+
+def test_many_series_bounded():
+    df = pd.concat([_series("country{:03d}".format(i), 1000) for i in range(200)], ignore_index=True)
+    prepared = prepare_series_many(df)
+    assert len(prepared) <= MAX_CHART_POINTS
+    assert prepared.groupby("Country").size().min() >= MIN_POINTS_PER_SERIES
+    assert prepared["Country"].nunique() == MAX_CHART_POINTS // MIN_POINTS_PER_SERIES
+
+def test_short_series_pass_points_on():
+    df = pd.concat([_series("long", 1000)] + [_series("short{}".format(i), 5) for i in range(10)], ignore_index=True)
+    prepared = prepare_series_many(df)
+    sizes = prepared.groupby("Country").size()
+    assert len(prepared) == MAX_CHART_POINTS
+    assert sizes["long"] == MAX_CHART_POINTS - 10*5
+    assert (sizes.drop("long") == 5).all()
@@ -0,0 +1,92 @@
+"""Caching of the dashboard: repeated views are served without calling the COVID-19 API."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from flask import Flask
+
+from flask_app.config import ProdConfig
+from flask_app.dash import api, dashboard
+
+CASES = [
+    {"Date": "2022-12-01T00:00:00Z", "Cases": 100},
+    {"Date": "2022-12-02T00:00:00Z", "Cases": 150},
+    {"Date": "2022-12-03T00:00:00Z", "Cases": 160},
+]
+
+
+class StubApiHandler(BaseHTTPRequestHandler):
+    """Answers every GET with the same cumulative cases, and records the requested paths."""
+    paths = []
+
+    def do_GET(self):
+        self.paths.append(self.path)
+        body = json.dumps(CASES).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_api(monkeypatch):
+    StubApiHandler.paths = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubApiHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(api.client, "host", f"http://127.0.0.1:{server.server_port}")
+    yield StubApiHandler.paths
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # the refresher would pull every country/status from the API in the background
+    monkeypatch.setattr(dashboard, "start_refresher", lambda *args: None)
+    server = Flask(__name__)
+    server.config.from_object(ProdConfig)
+    server.config["CACHE_DIR"] = str(tmp_path / "cache")
+    server.config["SERIES_DB"] = str(tmp_path / "series.db")
+    return dashboard.create_dashboard(server)
+
+
+def test_second_view_does_not_call_api(app, stub_api):
+    client = app.test_client()
+    first = _view_graph(client, "singapore", "confirmed")
+    assert stub_api == ["/country/singapore/status/confirmed"]
+
+    second = _view_graph(client, "singapore", "confirmed")
+    assert stub_api == ["/country/singapore/status/confirmed"]
+    assert second == first
+
+def test_other_view_calls_api(app, stub_api):
+    client = app.test_client()
+    _view_graph(client, "singapore", "confirmed")
+    _view_graph(client, "malaysia", "confirmed")
+    assert stub_api == ["/country/singapore/status/confirmed", "/country/malaysia/status/confirmed"]
+
+
+def _view_graph(client, country, status):
+    """Requests the covid19_graph callback as the browser does, and returns its output."""
+    inputs = [
+        {"id": "selected-country", "property": "value", "value": country},
+        {"id": "selected-status", "property": "value", "value": status},
+        {"id": "selected-date-range", "property": "start_date", "value": None},
+        {"id": "selected-date-range", "property": "end_date", "value": None},
+        {"id": "selected-resolution", "property": "value", "value": "daily"},
+    ]
+    response = client.post("/dashboard/_dash-update-component", json={
+        "output": "covid19_graph.children",
+        "outputs": {"id": "covid19_graph", "property": "children"},
+        "inputs": inputs,
+        "changedPropIds": ["selected-country.value"],
+        "state": [],
+    })
+    assert response.status_code == 200
+    output = response.get_json()["response"]["covid19_graph"]["children"]
+    assert output["type"] == "Graph"
+    return output
@@ -0,0 +1,24 @@
+"""Background refresher: a worker waiting for the refresh lock takes over soon after it is released."""
+import fcntl
+import threading
+from flask import Flask
+
+from flask_app.config import ProdConfig
+from flask_app.dash import refresher
+
+
+def test_waiting_worker_takes_over_lock(tmp_path, monkeypatch):
+    refreshed = threading.Event()
+    monkeypatch.setattr(refresher, "refresh_daily_cases", lambda combinations: refreshed.set())
+    server = Flask(__name__)
+    server.config.from_object(ProdConfig)
+    server.config["REFRESH_LOCK_FILE"] = str(tmp_path / "refresh.lock")
+    server.config["REFRESH_LOCK_RETRY_INTERVAL"] = 0.05
+
+    # another worker holds the lock
+    with open(server.config["REFRESH_LOCK_FILE"], "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        refresher.start_refresher(server, ["singapore"], ["confirmed"])
+        assert not refreshed.wait(0.3)
+    # ... and exits: the lock is taken over within the retry interval, not REFRESH_INTERVAL (30 minutes)
+    assert refreshed.wait(2)
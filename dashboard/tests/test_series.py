@@ -0,0 +1,61 @@
+"""Time-series store: incremental refreshes from the last stored date."""
+import pytest
+from flask import Flask
+
+from flask_app.config import ProdConfig
+from flask_app.dash import series
+
+
+@pytest.fixture
+def app(tmp_path):
+    server = Flask(__name__)
+    server.config.from_object(ProdConfig)
+    server.config["SERIES_DB"] = str(tmp_path / "series.db")
+    with server.app_context():
+        yield server
+
+def _stub_api(monkeypatch, rows):
+    """Makes the API client answer every request with rows, and returns the list of requested date_from."""
+    requested = []
+    def get_country_status(country, status, date_from=None, date_to=None):
+        requested.append(date_from)
+        return rows
+    monkeypatch.setattr(series.client, "get_country_status", get_country_status)
+    return requested
+
+
+def test_refresh_replaces_revised_last_date(app, monkeypatch):
+    requested = _stub_api(monkeypatch, [
+        {"Date": "2022-12-01T00:00:00Z", "Cases": 100},
+        {"Date": "2022-12-02T00:00:00Z", "Cases": 150},
+        {"Date": "2022-12-03T00:00:00Z", "Cases": 160},
+    ])
+    series.refresh_daily_cases([("singapore", "confirmed")])
+
+    # the count of 2022-12-03 was revised after the first refresh
+    requested = _stub_api(monkeypatch, [
+        {"Date": "2022-12-03T00:00:00Z", "Cases": 170},
+        {"Date": "2022-12-04T00:00:00Z", "Cases": 200},
+    ])
+    series.refresh_daily_cases([("singapore", "confirmed")])
+
+    assert requested == ["2022-12-03T00:00:00Z"]
+    df = series.get_daily_cases([("singapore", "confirmed")])
+    assert df["Date"].tolist() == ["2022-12-01T00:00:00Z", "2022-12-02T00:00:00Z",
+                                   "2022-12-03T00:00:00Z", "2022-12-04T00:00:00Z"]
+    assert df["Cases"].tolist() == [100, 150, 170, 200]
+    assert df["Daily Cases"].tolist()[1:] == [50, 20, 30]
+
+def test_refresh_of_single_stored_date(app, monkeypatch):
+    _stub_api(monkeypatch, [{"Date": "2022-12-01T00:00:00Z", "Cases": 100}])
+    series.refresh_daily_cases([("singapore", "confirmed")])
+    _stub_api(monkeypatch, [
+        {"Date": "2022-12-01T00:00:00Z", "Cases": 110},
+        {"Date": "2022-12-02T00:00:00Z", "Cases": 150},
+    ])
+    series.refresh_daily_cases([("singapore", "confirmed")])
+
+    df = series.get_daily_cases([("singapore", "confirmed")])
+    assert df["Cases"].tolist() == [110, 150]
+    assert df["Daily Cases"].isna().tolist() == [True, False]
+    assert df["Daily Cases"].tolist()[1] == 40
@@ -0,0 +1,248 @@
+"""Partitioned Transactions Load Test
+
+Grows synthetic sales data one month at a time, and shows that the latency of scans of recent transactions stays
+bounded with the monthly partitions of setup.sql, while it grows with the data in unpartitioned tables.
+
+The tables of setup.sql (with their indexes) are created in a separate "loadtest" schema of the database (dropped
+at the end, unless --keep), along with unpartitioned copies of transactions and txn_details that have the same
+rows and indexes (i.e. the tables before partitioning, with txn_timestamp added). Each month of transactions (and
+DETAILS_PER_TXN txn_details rows per transaction) is seeded server-side with generate_series, then the queries of
+QUERIES are timed on both as of the end of that month (median of the repeats):
+    - open_orders (logistics): transactions of the last 7 days that are not delivered yet, and their weight.
+    - month_top_members (analytics): top 10 members by spending in the current month.
+    - month_top_items (analytics): top 3 items by quantity sold in the current month.
+Finally, the retention of the oldest month is timed: detaching and dropping its partitions, against deleting its
+rows from the unpartitioned tables.
+
+Execute this command inside the airflow-scheduler container (from /opt/airflow):
+    python database/load_test_partitions.py [--months 12] [--transactions-per-month 200000] [--dsn <postgresql://...>]
+"""
+import time
+import argparse
+import datetime
+import statistics
+from bench_queries import SETUP_SQL_PATH, DEFAULT_DSN, DETAILS_PER_TXN, read_statements, select_statements, month_range
+
+SCHEMA = "loadtest"
+TABLES = {
+    "partitioned": {"transactions": "transactions", "txn_details": "txn_details"},
+    "unpartitioned": {"transactions": "transactions_unpartitioned", "txn_details": "txn_details_unpartitioned"},
+}
+
+SEED_SQL = [
+    """INSERT INTO members (member_id, first_name, last_name, date_of_birth, email, mobile_no)
+    SELECT 'M' || i, 'First' || i, 'Last' || i, '19900101', 'member' || i || '@example.com', lpad(i::text, 8, '0')
+    FROM generate_series(1, {members}) i""",
+    """INSERT INTO items (item_id, item_name, manufacturer_name, cost, weight_kg)
+    SELECT 'I' || i, 'Item ' || i, 'Manufacturer ' || (i % 100), round((1 + random()*99)::numeric, 2), round((0.1 + random()*10)::numeric, 2)
+    FROM generate_series(1, {items}) i""",
+]
+# one month of transactions: the timestamp of transaction k of the month is start + (k-1)*seconds_per_txn
+SEED_MONTH_SQL = [
+    """INSERT INTO transactions (txn_id, txn_timestamp, member_id, total_items_price, total_items_weight, txn_status)
+    SELECT 'T' || ({offset} + i), '{start}'::timestamptz + (i-1) * interval '1 second' * {seconds_per_txn},
+        'M' || (1 + floor(random()*{members}))::int, round((1 + random()*500)::numeric, 2), round((0.1 + random()*30)::numeric, 2),
+        (enum_range(NULL::transaction_status))[1 + floor(random()*6)::int]
+    FROM generate_series(1, {transactions}) i""",
+    """INSERT INTO txn_details (id, txn_id, txn_timestamp, item_id, quantity)
+    SELECT {offset}*{details_per_txn} + i, 'T' || ({offset} + 1 + (i-1)/{details_per_txn}),
+        '{start}'::timestamptz + ((i-1)/{details_per_txn}) * interval '1 second' * {seconds_per_txn},
+        'I' || (1 + floor(power(random(), 3)*{items}))::int, 1 + floor(random()*5)::int
+    FROM generate_series(1, {transactions}*{details_per_txn}) i""",
+    "INSERT INTO transactions_unpartitioned SELECT * FROM transactions WHERE txn_timestamp >= '{start}'",
+    "INSERT INTO txn_details_unpartitioned SELECT * FROM txn_details WHERE txn_timestamp >= '{start}'",
+]
+UNPARTITIONED_DDL = [
+    "CREATE TABLE transactions_unpartitioned (LIKE transactions INCLUDING DEFAULTS, PRIMARY KEY (txn_id))",
+    "CREATE TABLE txn_details_unpartitioned (LIKE txn_details INCLUDING DEFAULTS, PRIMARY KEY (id))",
+    "CREATE INDEX ON transactions_unpartitioned (member_id) INCLUDE (total_items_price)",
+    "CREATE INDEX ON txn_details_unpartitioned (txn_id)",
+    "CREATE INDEX ON txn_details_unpartitioned (item_id) INCLUDE (quantity)",
+]
+
+# queries on recent transactions, as of %(now)s (the current month starts at %(month_start)s)
+QUERIES = {
+    "open_orders": """
+        SELECT count(*), sum(total_items_weight)
+        FROM {transactions}
+        WHERE txn_timestamp >= %(now)s - interval '7 days' AND txn_timestamp < %(now)s
+        AND txn_status IN ('ordered-and-paid', 'preparing', 'in-transit')""",
+    "month_top_members": """
+        SELECT member_id, sum(total_items_price) as total_spending
+        FROM {transactions}
+        WHERE txn_timestamp >= %(month_start)s AND txn_timestamp < %(now)s
+        GROUP BY member_id
+        ORDER BY total_spending DESC
+        LIMIT 10""",
+    "month_top_items": """
+        SELECT item_id, sum(quantity) as total_quantity
+        FROM {txn_details}
+        WHERE txn_timestamp >= %(month_start)s AND txn_timestamp < %(now)s
+        GROUP BY item_id
+        ORDER BY total_quantity DESC
+        LIMIT 3""",
+}
+
+
+# =============================================
+# Main
+# =============================================
+def main(dsn=DEFAULT_DSN, months=12, transactions_per_month=200_000, members=200_000, items=10_000, repeat=5, keep=False):
+    """Grow the data of the loadtest schema month by month, and time the queries after each month.
+
+    Args:
+        dsn (str): PostgreSQL DSN of the sales database. Defaults to DEFAULT_DSN.
+        months (int): number of months of transactions (up to the current month). Defaults to 12.
+        transactions_per_month (int): number of transactions per month. Defaults to 200,000.
+        members (int): number of members. Defaults to 200,000.
+        items (int): number of items. Defaults to 10,000.
+        repeat (int): number of timed runs of each query. Defaults to 5.
+        keep (bool): keep the loadtest schema (and its data) at the end. Defaults to False.
+
+    Returns:
+        dict: number of transactions and median time (ms) of each query on each table layout, per month, and the
+            time (ms) of the retention of the oldest month on each table layout.
+    """
+    import psycopg2
+
+    statements = read_statements(SETUP_SQL_PATH)
+    views_start = statements.index(select_statements(statements, "CREATE MATERIALIZED VIEW")[0])
+    start, _ = month_range(months)
+    results = {"months": [], "retention_ms": {}}
+
+    conn = psycopg2.connect(dsn, options="-c TimeZone=UTC")
+    conn.autocommit = True
+    cur = conn.cursor()
+    try:
+        cur.execute("DROP SCHEMA IF EXISTS {} CASCADE".format(SCHEMA))
+        cur.execute("CREATE SCHEMA {}".format(SCHEMA))
+        cur.execute("SET search_path TO {}".format(SCHEMA))
+        for statement in select_statements(statements, "CREATE TYPE", "CREATE TABLE", "CREATE FUNCTION"):
+            cur.execute(statement)
+        for statement in select_statements(statements[:views_start], "CREATE INDEX") + UNPARTITIONED_DDL:
+            cur.execute(statement)
+        cur.execute("SELECT create_monthly_partitions(%s, %s)", (start.date(), months))
+        for statement in SEED_SQL:
+            cur.execute(statement.format(members=members, items=items))
+
+        print("{:<9}{:>14}".format("month", "transactions") + "".join("{:>34}".format(name + " (ms)") for name in QUERIES))
+        print("{:<9}{:>14}".format("", "") + "".join("{:>34}".format("partitioned / unpartitioned") for _ in QUERIES))
+        for month in range(months):
+            month_start, month_end = _month_bounds(start, month)
+            sizes = {"members": members, "items": items, "transactions": transactions_per_month, "details_per_txn": DETAILS_PER_TXN,
+                     "offset": month*transactions_per_month, "start": month_start.isoformat(),
+                     "seconds_per_txn": (month_end-month_start).total_seconds()/transactions_per_month}
+            for statement in SEED_MONTH_SQL:
+                cur.execute(statement.format(**sizes))
+            cur.execute("VACUUM ANALYZE")
+
+            timings = {layout: {} for layout in TABLES}
+            args = {"now": month_end, "month_start": month_start}
+            for name, sql in QUERIES.items():
+                for layout, tables in TABLES.items():
+                    timings[layout][name] = _time_query(cur, sql.format(**tables), args, repeat)
+            results["months"].append({"month": month_start.strftime("%Y-%m"), "transactions": (month+1)*transactions_per_month, **timings})
+            print("{:<9}{:>14,d}".format(month_start.strftime("%Y-%m"), (month+1)*transactions_per_month) + "".join(
+                "{:>34}".format("{:.2f} / {:.2f}".format(timings["partitioned"][name], timings["unpartitioned"][name])) for name in QUERIES))
+
+        results["retention_ms"] = _time_retention(cur, start)
+    finally:
+        if not keep:
+            cur.execute("DROP SCHEMA IF EXISTS {} CASCADE".format(SCHEMA))
+        cur.close()
+        conn.close()
+
+    _report(results)
+    return results
+
+
+# =============================================
+# Private Functions
+# =============================================
+def _month_bounds(start, month):
+    """Get the start and end of a month.
+
+    Args:
+        start (datetime): start of the first month.
+        month (int): index of the month from the first month.
+
+    Returns:
+        tuple: start and end of the month (UTC datetimes).
+    """
+    first = start.year*12 + start.month-1 + month
+    return (datetime.datetime(first//12, first%12 + 1, 1, tzinfo=datetime.timezone.utc),
+            datetime.datetime((first+1)//12, (first+1)%12 + 1, 1, tzinfo=datetime.timezone.utc))
+
+def _time_query(cur, sql, args, repeat):
+    """Run a query repeat times (after a warm-up run).
+
+    Returns:
+        float: median elapsed time (ms).
+    """
+    timings = []
+    for i in range(repeat+1):
+        started_at = time.perf_counter()
+        cur.execute(sql, args)
+        cur.fetchall()
+        timings.append((time.perf_counter() - started_at)*1000)
+    return statistics.median(timings[1:])
+
+def _time_retention(cur, start):
+    """Time the retention of the oldest month: detach and drop its partitions, and delete its unpartitioned rows.
+
+    Args:
+        cur (cursor): psycopg2 cursor, with the search_path set to the loadtest schema (autocommit).
+        start (datetime): start of the oldest month.
+
+    Returns:
+        dict: elapsed time (ms) of the retention on each table layout.
+    """
+    month_start, month_end = _month_bounds(start, 0)
+    suffix = month_start.strftime("_y%Ym%m")
+    retention = {
+        "partitioned": [
+            "BEGIN",
+            "ALTER TABLE txn_details DETACH PARTITION txn_details" + suffix,
+            "ALTER TABLE transactions DETACH PARTITION transactions" + suffix,
+            "DROP TABLE txn_details{0}, transactions{0}".format(suffix),
+            "COMMIT",
+        ],
+        "unpartitioned": [
+            "BEGIN",
+            "DELETE FROM txn_details_unpartitioned WHERE txn_timestamp < %(month_end)s",
+            "DELETE FROM transactions_unpartitioned WHERE txn_timestamp < %(month_end)s",
+            "COMMIT",
+        ],
+    }
+    timings = {}
+    for layout, sqls in retention.items():
+        started_at = time.perf_counter()
+        for sql in sqls:
+            cur.execute(sql, {"month_end": month_end})
+        timings[layout] = (time.perf_counter() - started_at)*1000
+    return timings
+
+def _report(results):
+    """Print the growth of the latency of each query from the first to the last month, and the retention times."""
+    first, last = results["months"][0], results["months"][-1]
+    print("\nFrom {} to {} ({:,d} to {:,d} transactions), median latency (ms):".format(
+        first["month"], last["month"], first["transactions"], last["transactions"]))
+    for name in QUERIES:
+        print("- {}: partitioned {:.2f} -> {:.2f}, unpartitioned {:.2f} -> {:.2f}".format(
+            name, first["partitioned"][name], last["partitioned"][name], first["unpartitioned"][name], last["unpartitioned"][name]))
+    if results["retention_ms"]:
+        print("Retention of the oldest month: partitioned (detach and drop) {:.2f} ms, unpartitioned (delete) {:.2f} ms".format(
+            results["retention_ms"]["partitioned"], results["retention_ms"]["unpartitioned"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the monthly partitions of the transactions tables on growing data.")
+    parser.add_argument("--dsn", default=DEFAULT_DSN, help="PostgreSQL DSN of the sales database")
+    parser.add_argument("--months", type=int, default=12, help="months of transactions")
+    parser.add_argument("--transactions-per-month", type=int, default=200_000, help="transactions per month")
+    parser.add_argument("--members", type=int, default=200_000, help="number of members")
+    parser.add_argument("--items", type=int, default=10_000, help="number of items")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs of each query")
+    parser.add_argument("--keep", action="store_true", help="keep the loadtest schema and its data")
+    args = parser.parse_args()
+    main(args.dsn, args.months, args.transactions_per_month, args.members, args.items, args.repeat, args.keep)
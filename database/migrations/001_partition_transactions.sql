@@ -0,0 +1,117 @@
+/* *********************
+Migration 001: Partition transactions and txn_details by month
+
+Migrates a sales database created with an earlier setup.sql (unpartitioned transactions and txn_details tables,
+without txn_timestamp), with or without the foreign key indexes and materialized views added later, to the monthly
+range partitioned tables of the current setup.sql. Run it once as dbadmin,
+in a single transaction (the tables are unavailable to other sessions while it runs):
+    psql -d sales -U dbadmin -v ON_ERROR_STOP=1 -f /database/migrations/001_partition_transactions.sql
+
+Existing transactions have no timestamp, so they are given the time of the migration (current month partition).
+***********************/
+BEGIN;
+
+-- The materialized views (if the database has them) depend on the tables; they are created again below
+DROP MATERIALIZED VIEW IF EXISTS member_spending;
+DROP MATERIALIZED VIEW IF EXISTS item_sales;
+
+-- Keep the unpartitioned tables aside (with their index names freed) until their rows are copied
+ALTER TABLE txn_details RENAME TO txn_details_unpartitioned;
+ALTER TABLE transactions RENAME TO transactions_unpartitioned;
+ALTER INDEX transactions_pkey RENAME TO transactions_unpartitioned_pkey;
+ALTER INDEX txn_details_pkey RENAME TO txn_details_unpartitioned_pkey;
+ALTER INDEX IF EXISTS transactions_member_id_idx RENAME TO transactions_unpartitioned_member_id_idx;
+ALTER INDEX IF EXISTS txn_details_txn_id_idx RENAME TO txn_details_unpartitioned_txn_id_idx;
+ALTER INDEX IF EXISTS txn_details_item_id_idx RENAME TO txn_details_unpartitioned_item_id_idx;
+
+-- Partitioned tables, partition function and indexes (as in setup.sql)
+CREATE TABLE transactions (
+    txn_id text NOT NULL,
+    txn_timestamp timestamptz NOT NULL DEFAULT now(),
+    member_id text REFERENCES members (member_id),
+    total_items_price numeric NOT NULL,
+    total_items_weight numeric NOT NULL,
+    txn_status transaction_status NOT NULL,
+    PRIMARY KEY (txn_id, txn_timestamp)
+) PARTITION BY RANGE (txn_timestamp);
+
+CREATE TABLE txn_details (
+    id bigint NOT NULL,
+    txn_id text,
+    txn_timestamp timestamptz NOT NULL,
+    item_id text REFERENCES items (item_id),
+    quantity numeric NOT NULL,
+    PRIMARY KEY (id, txn_timestamp),
+    FOREIGN KEY (txn_id, txn_timestamp) REFERENCES transactions (txn_id, txn_timestamp)
+) PARTITION BY RANGE (txn_timestamp);
+
+CREATE FUNCTION create_monthly_partitions(from_month date, num_months integer)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start timestamp;
+    partition_name text;
+    parent_name text;
+    num_created integer := 0;
+BEGIN
+    FOR i IN 0 .. num_months-1 LOOP
+        month_start := date_trunc('month', from_month::timestamp) + make_interval(months => i);
+        FOREACH parent_name IN ARRAY ARRAY['transactions', 'txn_details'] LOOP
+            partition_name := parent_name || to_char(month_start, '"_y"YYYY"m"MM');
+            IF to_regclass(quote_ident(partition_name)) IS NULL THEN
+                EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)', partition_name, parent_name,
+                               month_start AT TIME ZONE 'UTC', (month_start + interval '1 month') AT TIME ZONE 'UTC');
+                num_created := num_created + 1;
+            END IF;
+        END LOOP;
+    END LOOP;
+    RETURN num_created;
+END;
+$$;
+
+SELECT create_monthly_partitions(current_date, 4);
+
+-- Copy the rows (now() is the start time of the migration transaction, so details match their transaction)
+INSERT INTO transactions (txn_id, txn_timestamp, member_id, total_items_price, total_items_weight, txn_status)
+SELECT txn_id, now(), member_id, total_items_price, total_items_weight, txn_status
+FROM transactions_unpartitioned;
+
+INSERT INTO txn_details (id, txn_id, txn_timestamp, item_id, quantity)
+SELECT id, txn_id, now(), item_id, quantity
+FROM txn_details_unpartitioned;
+
+DROP TABLE txn_details_unpartitioned;
+DROP TABLE transactions_unpartitioned;
+
+CREATE INDEX transactions_member_id_idx ON transactions (member_id) INCLUDE (total_items_price);
+CREATE INDEX txn_details_txn_id_idx ON txn_details (txn_id);
+CREATE INDEX txn_details_item_id_idx ON txn_details (item_id) INCLUDE (quantity);
+
+-- Materialized views (as in setup.sql)
+CREATE MATERIALIZED VIEW member_spending AS
+SELECT transactions.member_id, members.first_name, members.last_name, sum(transactions.total_items_price) as total_spending, count(*) as num_transactions
+FROM transactions
+INNER JOIN members
+ON transactions.member_id = members.member_id
+GROUP BY (transactions.member_id, members.first_name, members.last_name);
+
+CREATE UNIQUE INDEX member_spending_member_id_idx ON member_spending (member_id);
+CREATE INDEX member_spending_total_spending_idx ON member_spending (total_spending DESC);
+
+CREATE MATERIALIZED VIEW item_sales AS
+SELECT txn_details.item_id, items.item_name, sum(txn_details.quantity) as total_quantity
+FROM txn_details
+INNER JOIN items
+ON txn_details.item_id = items.item_id
+GROUP BY (txn_details.item_id, items.item_name);
+
+CREATE UNIQUE INDEX item_sales_item_id_idx ON item_sales (item_id);
+CREATE INDEX item_sales_total_quantity_idx ON item_sales (total_quantity DESC);
+
+-- Permissions of the group roles on the new tables and views (as in setup.sql)
+GRANT SELECT on txn_details, transactions to logistics_user;
+GRANT INSERT, UPDATE on transactions to logistics_user;
+GRANT SELECT on transactions, txn_details, member_spending, item_sales to analytics_user;
+
+COMMIT;
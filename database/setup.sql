@@ -36,26 +36,100 @@ CREATE TYPE transaction_status as ENUM (
     'completed'
 );
 
+-- Transactions and their details are range partitioned by month of txn_timestamp, so that scans of recent
+-- transactions only read the partitions of their months, and old months can be archived and dropped whole.
+-- The primary keys include txn_timestamp (a requirement of partitioning), and the details of a transaction
+-- carry its txn_timestamp, so that they are in the partition of the same month.
 CREATE TABLE transactions (
-    txn_id text PRIMARY KEY,
+    txn_id text NOT NULL,
+    txn_timestamp timestamptz NOT NULL DEFAULT now(),
     member_id text REFERENCES members (member_id),
     total_items_price numeric NOT NULL,
     total_items_weight numeric NOT NULL,
-    txn_status transaction_status NOT NULL
-);
+    txn_status transaction_status NOT NULL,
+    PRIMARY KEY (txn_id, txn_timestamp)
+) PARTITION BY RANGE (txn_timestamp);
 
 CREATE TABLE txn_details (
-    id bigint PRIMARY KEY,
-    txn_id text REFERENCES transactions (txn_id),
+    id bigint NOT NULL,
+    txn_id text,
+    txn_timestamp timestamptz NOT NULL,
     item_id text REFERENCES items (item_id),
-    quantity numeric NOT NULL
-);
+    quantity numeric NOT NULL,
+    PRIMARY KEY (id, txn_timestamp),
+    FOREIGN KEY (txn_id, txn_timestamp) REFERENCES transactions (txn_id, txn_timestamp)
+) PARTITION BY RANGE (txn_timestamp);
+
+-- Create the monthly partitions (e.g. transactions_y2023m01, txn_details_y2023m01) of num_months months from
+-- the month of from_month (UTC) that do not exist yet. Partitions are created ahead of time by the
+-- "sales_partition_maintenance_dag" Airflow DAG, which also archives and drops partitions past their retention.
+CREATE FUNCTION create_monthly_partitions(from_month date, num_months integer)
+RETURNS integer
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start timestamp;
+    partition_name text;
+    parent_name text;
+    num_created integer := 0;
+BEGIN
+    FOR i IN 0 .. num_months-1 LOOP
+        month_start := date_trunc('month', from_month::timestamp) + make_interval(months => i);
+        FOREACH parent_name IN ARRAY ARRAY['transactions', 'txn_details'] LOOP
+            partition_name := parent_name || to_char(month_start, '"_y"YYYY"m"MM');
+            IF to_regclass(quote_ident(partition_name)) IS NULL THEN
+                EXECUTE format('CREATE TABLE %I PARTITION OF %I FOR VALUES FROM (%L) TO (%L)', partition_name, parent_name,
+                               month_start AT TIME ZONE 'UTC', (month_start + interval '1 month') AT TIME ZONE 'UTC');
+                num_created := num_created + 1;
+            END IF;
+        END LOOP;
+    END LOOP;
+    RETURN num_created;
+END;
+$$;
+
+-- Indexes on foreign keys, for joins and lookups by member, transaction and item
+-- (INCLUDE columns let the aggregates of the analytics queries below use index-only scans)
+CREATE INDEX transactions_member_id_idx ON transactions (member_id) INCLUDE (total_items_price);
+CREATE INDEX txn_details_txn_id_idx ON txn_details (txn_id);
+CREATE INDEX txn_details_item_id_idx ON txn_details (item_id) INCLUDE (quantity);
+
+-- Materialized aggregates for analytics (spending per member, quantity sold per item), refreshed with
+-- REFRESH MATERIALIZED VIEW CONCURRENTLY by the "sales_analytics_refresh_dag" Airflow DAG
+-- (the unique indexes are required for concurrent refreshes, which do not block readers)
+CREATE MATERIALIZED VIEW member_spending AS
+SELECT transactions.member_id, members.first_name, members.last_name, sum(transactions.total_items_price) as total_spending, count(*) as num_transactions
+FROM transactions
+INNER JOIN members
+ON transactions.member_id = members.member_id
+GROUP BY (transactions.member_id, members.first_name, members.last_name);
+
+CREATE UNIQUE INDEX member_spending_member_id_idx ON member_spending (member_id);
+CREATE INDEX member_spending_total_spending_idx ON member_spending (total_spending DESC);
+
+CREATE MATERIALIZED VIEW item_sales AS
+SELECT txn_details.item_id, items.item_name, sum(txn_details.quantity) as total_quantity
+FROM txn_details
+INNER JOIN items
+ON txn_details.item_id = items.item_id
+GROUP BY (txn_details.item_id, items.item_name);
+
+CREATE UNIQUE INDEX item_sales_item_id_idx ON item_sales (item_id);
+CREATE INDEX item_sales_total_quantity_idx ON item_sales (total_quantity DESC);
 
 -- Transfer ownership of tables to admin user
 ALTER TABLE members OWNER TO dbadmin;
 ALTER TABLE items OWNER TO dbadmin;
 ALTER TABLE transactions OWNER TO dbadmin;
 ALTER TABLE txn_details OWNER TO dbadmin;
+ALTER MATERIALIZED VIEW member_spending OWNER TO dbadmin;
+ALTER MATERIALIZED VIEW item_sales OWNER TO dbadmin;
+ALTER FUNCTION create_monthly_partitions(date, integer) OWNER TO dbadmin;
+
+-- Create the partitions of the current month and the next 3 months (as admin user, so that it owns them)
+SET ROLE dbadmin;
+SELECT create_monthly_partitions(current_date, 4);
+RESET ROLE;
 
 
 /*************************************************
@@ -71,7 +145,7 @@ CREATE ROLE sales_user;
 -- Grant specific permissions for each role
 GRANT SELECT on items, txn_details, transactions to logistics_user;
 GRANT INSERT, UPDATE on transactions to logistics_user;
-GRANT SELECT on members, items, transactions, txn_details to analytics_user;
+GRANT SELECT on members, items, transactions, txn_details, member_spending, item_sales to analytics_user;
 GRANT SELECT, INSERT, UPDATE, DELETE on items to sales_user;
 
 -- Create new users and assign roles to them
@@ -97,6 +171,12 @@ GROUP BY (transactions.member_id, members.first_name, members.last_name)
 ORDER BY total_spending DESC
 LIMIT 10;
 
+-- Q1 from the materialized view (as of its last refresh)
+SELECT member_id, first_name, last_name, total_spending
+FROM member_spending
+ORDER BY total_spending DESC
+LIMIT 10;
+
 -- Q2. Which are the top 3 items that are frequently brought by members?
 SELECT txn_details.item_id, items.item_name, sum(txn_details.quantity) as total_quantity
 FROM txn_details
@@ -106,3 +186,9 @@ GROUP BY (txn_details.item_id, items.item_name)
 ORDER BY total_quantity DESC
 LIMIT 3;
 
+-- Q2 from the materialized view (as of its last refresh)
+SELECT item_id, item_name, total_quantity
+FROM item_sales
+ORDER BY total_quantity DESC
+LIMIT 3;
+
@@ -0,0 +1,276 @@
+"""Data profiling of dataframes and (larger than memory) CSV files.
+
+Summarizes each column in one pass over the data, from a single value_counts of each column per chunk:
+    - count, nulls and dtype.
+    - distinct values: exact while the number of distinct values is at most max_tracked, else estimated with
+      HyperLogLog (relative error about 1.04/sqrt(2**precision), i.e. ~0.8% for the default precision 14), and
+      bounded by the count of non-null values.
+    - top-k values: exact counts while the distinct values are tracked exactly, else heavy hitters kept with a
+      Misra-Gries summary (each count is undercounted by at most the reported "top_error"). Approximate top
+      values are only reported if their count is above top_error, i.e. if they are more frequent than any value
+      that is not tracked, so the list can be shorter than k, and is empty if no value stands out (e.g. a column
+      of unique values such as emails).
+    - min, max and mean of numeric columns; min and max length of string columns.
+
+Memory is bounded by max_tracked values and the HyperLogLog registers per column, whatever the size of the data,
+so CSV files are profiled in chunks (e.g. the application data files in data/raw):
+    python data_profile.py ../../data/raw/applications_dataset_1.csv [--chunksize 100000] [--top-k 10] [--json]
+
+Functions:
+    - profile_dataframe: profile of a dataframe.
+    - profile_csv: profile of a CSV file, read in chunks.
+    - profile_to_frame: one row per column of a profile, for display.
+"""
+import json
+import argparse
+import numpy as np
+import pandas as pd
+
+DEFAULT_TOP_K = 10
+DEFAULT_MAX_TRACKED = 10000
+DEFAULT_PRECISION = 14
+
+
+class HyperLogLog:
+    """HyperLogLog distinct count estimator over 64-bit hashes (vectorized with NumPy).
+
+    Args:
+        precision (int): number of index bits, i.e. 2**precision registers. Defaults to DEFAULT_PRECISION.
+    """
+    def __init__(self, precision=DEFAULT_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(2**precision, dtype=np.uint8)
+
+    def add(self, hashes):
+        """Add 64-bit hashes of values.
+
+        Args:
+            hashes (numpy array): uint64 hash of each value.
+        """
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        rest = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        # rank = position of the leftmost 1 bit in the remaining 64-p bits (64-p+1 if they are all 0)
+        rank = (64 - self.precision + 1) - _bit_length(rest)
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other):
+        """Merge the registers of another estimator of the same precision."""
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self):
+        """Estimate the number of distinct values added.
+
+        Returns:
+            float: estimated distinct count.
+        """
+        m = len(self.registers)
+        alpha = 0.7213/(1 + 1.079/m)
+        estimate = alpha*m*m/np.sum(np.ldexp(1.0, -self.registers.astype(int)))
+        num_zero = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5*m and num_zero > 0:
+            # small range correction (linear counting)
+            estimate = m*np.log(m/num_zero)
+        return float(estimate)
+
+
+class ColumnProfile:
+    """Profile of one column, updated with each chunk of the column (see module docstring).
+
+    Args:
+        name (str): column name.
+        top_k (int): number of most frequent values reported. Defaults to DEFAULT_TOP_K.
+        max_tracked (int): maximum number of distinct values counted exactly. Defaults to DEFAULT_MAX_TRACKED.
+        precision (int): HyperLogLog precision. Defaults to DEFAULT_PRECISION.
+    """
+    def __init__(self, name, top_k=DEFAULT_TOP_K, max_tracked=DEFAULT_MAX_TRACKED, precision=DEFAULT_PRECISION):
+        self.name = name
+        self.top_k = top_k
+        self.max_tracked = max(max_tracked, top_k)
+        self.dtypes = set()
+        self.num_rows = 0
+        self.count = 0
+        self.counts = pd.Series(dtype="int64")
+        self.top_error = 0
+        self.hll = HyperLogLog(precision)
+        self.numeric = None
+        self.length = None
+
+    def update(self, series):
+        """Add a chunk of the column.
+
+        Args:
+            series (pandas series): values of the column in the chunk.
+        """
+        value_counts = series.value_counts(dropna=True, sort=False)
+        self.dtypes.add(str(series.dtype))
+        self.num_rows += len(series)
+        self.count += int(value_counts.sum())
+        if len(value_counts) == 0:
+            return
+
+        values = value_counts.index
+        # values are keyed by their string form, so chunks read with different dtypes are counted together
+        keys = values if values.dtype == object else values.astype(str)
+        self.hll.add(pd.util.hash_array(keys.to_numpy(dtype=object)))
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            numbers = values.to_numpy(dtype=float)
+            stats = (numbers.min(), numbers.max(), float(np.dot(numbers, value_counts.to_numpy(dtype=float))))
+            self.numeric = stats if self.numeric is None else (
+                min(self.numeric[0], stats[0]), max(self.numeric[1], stats[1]), self.numeric[2] + stats[2])
+        elif values.dtype == object:
+            lengths = keys.str.len()
+            stats = (int(lengths.min()), int(lengths.max()))
+            self.length = stats if self.length is None else (min(self.length[0], stats[0]), max(self.length[1], stats[1]))
+
+        value_counts.index = keys
+        if len(self.counts) > 0 or values.dtype != object:
+            # unsorted groupby: merges the counts without sorting the (high-cardinality) values
+            value_counts = pd.concat([self.counts, value_counts]).groupby(level=0, sort=False).sum()
+        counts = value_counts.astype("int64")
+        if len(counts) > self.max_tracked:
+            # Misra-Gries: subtract the (max_tracked+1)-th largest count from every count and drop those left <= 0
+            threshold = int(np.partition(counts.to_numpy(), -(self.max_tracked+1))[-(self.max_tracked+1)])
+            counts = counts[counts > threshold] - threshold
+            self.top_error += threshold
+        self.counts = counts
+
+    @property
+    def approximate(self):
+        """True if the distinct count and top-k counts are approximate (more than max_tracked distinct values)."""
+        return self.top_error > 0
+
+    def to_dict(self):
+        """Get the profile of the column.
+
+        Returns:
+            dict: dtype, rows, count, nulls, distinct (and whether it is approximate), top-k values with counts
+                (and their maximum undercount), and numeric or string length statistics.
+        """
+        if self.approximate:
+            # the values still tracked are distinct, and there are no more distinct values than non-null values
+            distinct = min(max(int(round(self.hll.estimate())), len(self.counts)), self.count)
+            # only the values more frequent than any untracked value (whose count is at most top_error)
+            top = self.counts[self.counts > self.top_error].nlargest(self.top_k)
+        else:
+            distinct = len(self.counts)
+            top = self.counts.nlargest(self.top_k)
+        profile = {
+            "dtype": "/".join(sorted(self.dtypes)),
+            "rows": self.num_rows,
+            "count": self.count,
+            "nulls": self.num_rows - self.count,
+            "distinct": distinct,
+            "approximate": self.approximate,
+            "top": [[value, int(count)] for value, count in top.items()],
+            "top_error": self.top_error,
+        }
+        if self.numeric is not None:
+            profile.update(min=self.numeric[0], max=self.numeric[1], mean=self.numeric[2]/self.count)
+        if self.length is not None:
+            profile.update(min_length=self.length[0], max_length=self.length[1])
+        return profile
+
+
+# =============================================
+# Public Functions
+# =============================================
+def profile_dataframe(df, exclude_list=[], top_k=DEFAULT_TOP_K, max_tracked=DEFAULT_MAX_TRACKED, precision=DEFAULT_PRECISION):
+    """Profile each column of a dataframe.
+
+    Args:
+        df (pandas dataframe): input data.
+        exclude_list (list): column names to exclude from the profile.
+        top_k (int): number of most frequent values reported per column. Defaults to DEFAULT_TOP_K.
+        max_tracked (int): maximum number of distinct values counted exactly per column. Defaults to DEFAULT_MAX_TRACKED.
+        precision (int): HyperLogLog precision. Defaults to DEFAULT_PRECISION.
+
+    Returns:
+        dict: profile of each column (see ColumnProfile.to_dict).
+    """
+    return _profile_chunks([df], exclude_list, top_k, max_tracked, precision)
+
+def profile_csv(filepath, chunksize=100000, exclude_list=[], top_k=DEFAULT_TOP_K, max_tracked=DEFAULT_MAX_TRACKED,
+                precision=DEFAULT_PRECISION, **read_csv_kwargs):
+    """Profile each column of a CSV file, read in chunks so that files larger than memory can be profiled.
+
+    Args:
+        filepath (str): path of the CSV file.
+        chunksize (int): number of rows read per chunk. Defaults to 100000.
+        exclude_list (list): column names to exclude from the profile.
+        top_k (int): number of most frequent values reported per column. Defaults to DEFAULT_TOP_K.
+        max_tracked (int): maximum number of distinct values counted exactly per column. Defaults to DEFAULT_MAX_TRACKED.
+        precision (int): HyperLogLog precision. Defaults to DEFAULT_PRECISION.
+        **read_csv_kwargs: passed to pd.read_csv (e.g. header=None, names=[...] for car.data).
+
+    Returns:
+        dict: profile of each column (see ColumnProfile.to_dict).
+    """
+    chunks = pd.read_csv(filepath, chunksize=chunksize, **read_csv_kwargs)
+    return _profile_chunks(chunks, exclude_list, top_k, max_tracked, precision)
+
+def profile_to_frame(profile):
+    """Convert a profile into a dataframe with one row per column, for display.
+
+    Args:
+        profile (dict): profile of each column (see profile_dataframe).
+
+    Returns:
+        pandas dataframe: profile of each column, with the top values as "value (count)" strings.
+    """
+    rows = []
+    for name, column in profile.items():
+        row = dict(column, column=name)
+        row["top"] = ", ".join("{} ({})".format(value, count) for value, count in column["top"])
+        rows.append(row)
+    return pd.DataFrame(rows).set_index("column")
+
+
+# =============================================
+# Private Functions
+# =============================================
+def _profile_chunks(chunks, exclude_list, top_k, max_tracked, precision):
+    """Profile each column over chunks of a dataframe.
+
+    Returns:
+        dict: profile of each column (see ColumnProfile.to_dict).
+    """
+    columns = {}
+    for chunk in chunks:
+        for col in chunk.columns:
+            if col in exclude_list:
+                continue
+            if col not in columns:
+                columns[col] = ColumnProfile(col, top_k, max_tracked, precision)
+            columns[col].update(chunk[col])
+    return {col: column.to_dict() for col, column in columns.items()}
+
+def _bit_length(values):
+    """Number of bits needed to represent each uint64 value (0 for 0), computed exactly with shifts."""
+    values = values.copy()
+    length = np.zeros(len(values), dtype=np.int64)
+    for shift in [32, 16, 8, 4, 2, 1]:
+        shifted = values >> np.uint64(shift)
+        mask = shifted > 0
+        length[mask] += shift
+        values[mask] = shifted[mask]
+    return length + (values > 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile the columns of a CSV file.")
+    parser.add_argument("filepath", help="path of the CSV file")
+    parser.add_argument("--chunksize", type=int, default=100000, help="rows read per chunk")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K, help="most frequent values reported per column")
+    parser.add_argument("--max-tracked", type=int, default=DEFAULT_MAX_TRACKED, help="distinct values counted exactly per column")
+    parser.add_argument("--no-header", action="store_true", help="the file has no header row (e.g. car.data)")
+    parser.add_argument("--json", action="store_true", help="print the profile as JSON")
+    args = parser.parse_args()
+
+    profile = profile_csv(args.filepath, args.chunksize, top_k=args.top_k, max_tracked=args.max_tracked,
+                          header=None if args.no_header else "infer")
+    if args.json:
+        print(json.dumps(profile, indent=2, default=str))
+    else:
+        with pd.option_context("display.max_columns", None, "display.width", 200, "display.max_colwidth", 80):
+            print(profile_to_frame(profile))
@@ -1,17 +1,22 @@
 import numpy as np
 import pandas as pd
 
-def show_unique_values(df, exclude_list=[]):
+def show_unique_values(df, exclude_list=[], max_values=None):
     """ Show unique values in each column of input data.
 
+    For wide or high-cardinality data, use data_profile.profile_dataframe (or profile_csv for files larger
+    than memory) instead, which returns distinct counts and top values without listing every value.
+
     Args:
         df (pandas dataframe): input data with the required columns to show unique values.
         exclude_list (list): column names to exclude from showing unique values
+        max_values (int): maximum number of unique values shown per column. Defaults to None (all).
     """
     for col in df.columns:
         if col in exclude_list:
             continue
-        print('{}: {} unique values.\n{}\n'.format(col, len(df[col].unique()), df[col].unique()))
+        unique_values = df[col].unique()
+        print('{}: {} unique values.\n{}\n'.format(col, len(unique_values), unique_values[:max_values]))
 
 def custom_ordinal_encoder(df, ordinal_columns, value_dict):
     """Encodes ordinal columns based on custom category-value mappings.
@@ -33,4 +38,134 @@ def custom_ordinal_encoder(df, ordinal_columns, value_dict):
 
 def custom_onehot_encoder(df, onehot_columns, prefix_sep='_'):       
     dummy_df = pd.get_dummies(df[onehot_columns], prefix=onehot_columns, prefix_sep=prefix_sep)
-    return pd.concat([df, dummy_df], axis=1)
\ No newline at end of file
+    return pd.concat([df, dummy_df], axis=1)
+
+class OrdinalEncoder:
+    """Encodes ordinal columns based on custom category-value mappings (stateful version of custom_ordinal_encoder).
+
+    The category-to-value lookup of each column and the median value filled in for missing or unknown
+    categories are computed once in fit, so transform only looks up the Categorical codes of each batch.
+    The input frame is not modified.
+
+    Args:
+        ordinal_columns (list): names of categorical columns to be converted to ordinal values.
+        value_dict (dictionary): mapping of categories to values for each ordinal column.
+    """
+    def __init__(self, ordinal_columns, value_dict):
+        self.ordinal_columns = list(ordinal_columns)
+        self.value_dict = value_dict
+
+    def fit(self, df=None):
+        """Precompute the categories and value lookup of each ordinal column.
+
+        Args:
+            df (pandas dataframe): ignored (the mappings are fixed by value_dict). Defaults to None.
+
+        Returns:
+            OrdinalEncoder: the fitted encoder.
+        """
+        self.categories_ = {}
+        self.lookup_ = {}
+        for col in self.ordinal_columns:
+            mapping = self.value_dict[col]
+            values = np.array(list(mapping.values()))
+            median_value = int(np.median(values))
+            self.categories_[col] = pd.Index(list(mapping.keys()))
+            # last entry is looked up by code -1 (missing or unknown category)
+            self.lookup_[col] = np.append(values, median_value)
+        return self
+
+    def transform(self, df):
+        """Encode the ordinal columns of a batch.
+
+        Args:
+            df (pandas dataframe): data with the ordinal columns to be encoded.
+
+        Returns:
+            pandas dataframe: copy of df with ordinal columns encoded as ordinal values.
+        """
+        encoded = {}
+        for col in self.ordinal_columns:
+            if col in df.columns:
+                codes = pd.Categorical(df[col], categories=self.categories_[col]).codes
+                encoded[col] = self.lookup_[col][codes]
+        return df.assign(**encoded)
+
+    def fit_transform(self, df):
+        """Fit the encoder and encode df (see fit and transform)."""
+        return self.fit(df).transform(df)
+
+
+class OneHotEncoder:
+    """One-hot encodes categorical columns with a fixed output column layout (stateful version of custom_onehot_encoder).
+
+    The categories of each column are learned in fit (or given), so every batch is encoded into the same
+    columns in the same order, whichever categories it contains: categories not seen in fit (and missing
+    values) are encoded as all zeros. Columns are built from Categorical codes, as uint8 by default, and
+    optionally as sparse columns.
+
+    Args:
+        onehot_columns (list): names of categorical columns to be one-hot encoded.
+        prefix_sep (str): separator between column name and category in the output column names. Defaults to '_'.
+        categories (dictionary): categories of each column, in output order. Defaults to None (learned in fit).
+        sparse (bool): output sparse columns (pandas SparseDtype with fill value 0). Defaults to False.
+        dtype (numpy dtype): dtype of the output columns. Defaults to np.uint8.
+        drop_columns (bool): drop the original categorical columns from the output. Defaults to True.
+    """
+    def __init__(self, onehot_columns, prefix_sep='_', categories=None, sparse=False, dtype=np.uint8, drop_columns=True):
+        self.onehot_columns = list(onehot_columns)
+        self.prefix_sep = prefix_sep
+        self.categories = categories
+        self.sparse = sparse
+        self.dtype = dtype
+        self.drop_columns = drop_columns
+
+    def fit(self, df):
+        """Learn the categories of each column (sorted, as pd.get_dummies), unless they were given.
+
+        Args:
+            df (pandas dataframe): training data with the categorical columns.
+
+        Returns:
+            OneHotEncoder: the fitted encoder.
+        """
+        self.categories_ = {}
+        for col in self.onehot_columns:
+            if self.categories is not None and col in self.categories:
+                categories = list(self.categories[col])
+            else:
+                categories = sorted(df[col].dropna().unique())
+            self.categories_[col] = pd.Index(categories)
+        self.feature_names_ = [
+            "{}{}{}".format(col, self.prefix_sep, category)
+            for col in self.onehot_columns for category in self.categories_[col]
+        ]
+        return self
+
+    def transform(self, df):
+        """One-hot encode the categorical columns of a batch.
+
+        Args:
+            df (pandas dataframe): data with the categorical columns.
+
+        Returns:
+            pandas dataframe: df (without the categorical columns if drop_columns) followed by the one-hot
+                columns in the order of feature_names_.
+        """
+        onehot = {}
+        for col in self.onehot_columns:
+            codes = pd.Categorical(df[col], categories=self.categories_[col]).codes
+            for i, category in enumerate(self.categories_[col]):
+                values = (codes == i).astype(self.dtype)
+                if self.sparse:
+                    values = pd.arrays.SparseArray(values, fill_value=0)
+                onehot["{}{}{}".format(col, self.prefix_sep, category)] = values
+        onehot_df = pd.DataFrame(onehot, index=df.index, columns=self.feature_names_)
+
+        if self.drop_columns:
+            df = df.drop(columns=self.onehot_columns)
+        return pd.concat([df, onehot_df], axis=1)
+
+    def fit_transform(self, df):
+        """Fit the encoder and encode df (see fit and transform)."""
+        return self.fit(df).transform(df)
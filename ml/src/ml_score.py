@@ -0,0 +1,258 @@
+"""Batch scoring of the car-evaluation model.
+
+Trains the model of ml/notebooks/train_model.ipynb (ordinal and onehot encoding, KMeans clustering label as
+feature, gradient boosted regression of the buying price) and saves it with its encoders as one pipeline, then
+scores batches of rows in the car.data schema with it. The pipeline is loaded once, and each batch is encoded
+with vectorized encoders (see ml_preprocess.py) and predicted with one predict call per model.
+
+Usage (inside the ml container, from /home/jovyan/work/src):
+    python ml_score.py train [--data ../data/car.data] [--model ../data/car_model.pkl]
+    python ml_score.py score <input .csv/.json/.jsonl> [--output predictions.csv] [--batch-size 10000]
+
+Input CSV files are in the car.data format (with or without a header row); JSON files are an array of records,
+JSON Lines files one record per line. The "buying" and "persons" columns are optional. The throughput (rows/sec)
+and per-batch latency of scoring are reported, and the accuracy if the input has the actual buying price.
+"""
+import os
+import time
+import pickle
+import argparse
+import numpy as np
+import pandas as pd
+from ml_preprocess import OrdinalEncoder, OneHotEncoder
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_PATH = os.path.join(SRC_DIR, "..", "data", "car.data")
+MODEL_PATH = os.path.join(SRC_DIR, "..", "data", "car_model.pkl")
+
+CAR_COLUMNS = ["buying","maint","doors","persons","lug_boot","safety","class"]
+TARGET = "buying"
+ORDINAL_COLUMNS = ["buying", "maint", "lug_boot", "safety", "class"]
+CATEGORICAL_COLUMNS = ["doors"]
+
+# ordinal values to encode categorical variables (as in the notebook)
+VALUE_DICT = {
+    "buying": {"low":0, "med":1, "high":2, "vhigh":3},
+    "maint": {"low":0, "med":1, "high":2, "vhigh":3},
+    "lug_boot": {"small":0, "med":1, "big":2},
+    "safety": {"low":0, "med":1, "high":2},
+    "class": {"unacc":0, "acc":1, "good":2, "vgood":3},
+}
+
+
+class ScoringPipeline:
+    """Encoders and fitted models of the car-evaluation model, applied to batches of rows.
+
+    Args:
+        ordinal_encoder (OrdinalEncoder): fitted encoder of the ordinal columns.
+        onehot_encoder (OneHotEncoder): fitted encoder of the categorical columns.
+        kmeans (sklearn KMeans): fitted clustering model, whose label is a feature of the model.
+        model (sklearn regressor): fitted model of the encoded buying price.
+    """
+    def __init__(self, ordinal_encoder, onehot_encoder, kmeans, model):
+        self.ordinal_encoder = ordinal_encoder
+        self.onehot_encoder = onehot_encoder
+        self.kmeans = kmeans
+        self.model = model
+        self.features = ["maint", "lug_boot", "safety", "class"] + onehot_encoder.feature_names_
+        # buying price label of each encoded value
+        buying = VALUE_DICT[TARGET]
+        self.labels = np.array(sorted(buying, key=buying.get), dtype=object)
+
+    def encode(self, df):
+        """Encode a batch of rows into the feature matrix of the model (with the KMeans label as last feature).
+
+        Args:
+            df (pandas dataframe): rows in the car.data schema ("buying" and "persons" are optional).
+
+        Returns:
+            numpy array: features of each row.
+        """
+        df = self.ordinal_encoder.transform(df[[col for col in df.columns if col in self.ordinal_encoder.ordinal_columns + CATEGORICAL_COLUMNS]])
+        X = self.onehot_encoder.transform(df)[self.features].to_numpy(dtype=float)
+        return np.column_stack([X, self.kmeans.predict(X)])
+
+    def predict(self, df):
+        """Predict the encoded buying price of a batch of rows.
+
+        Args:
+            df (pandas dataframe): rows in the car.data schema.
+
+        Returns:
+            numpy array: predicted buying price of each row (0 = low, ..., 3 = vhigh).
+        """
+        y_pred = np.round(self.model.predict(self.encode(df)), 0)
+        return np.clip(y_pred, 0, len(self.labels)-1).astype(int)
+
+    def predict_labels(self, df):
+        """Predict the buying price label ("low", "med", "high" or "vhigh") of a batch of rows."""
+        return self.labels[self.predict(df)]
+
+    def save(self, filepath):
+        """Save the pipeline (pickle)."""
+        with open(filepath, "wb") as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(filepath):
+        """Load a saved pipeline."""
+        with open(filepath, "rb") as f:
+            return pickle.load(f)
+
+
+# =============================================
+# Main
+# =============================================
+def train(data_path=DATA_PATH, model_path=MODEL_PATH, random_state=42):
+    """Train the car-evaluation model as in the notebook, report its test scores and save the pipeline.
+
+    Args:
+        data_path (str): path of car.data. Defaults to DATA_PATH.
+        model_path (str): path of the saved pipeline. Defaults to MODEL_PATH.
+        random_state (int): random state of the train-test split. Defaults to 42.
+
+    Returns:
+        ScoringPipeline: the trained pipeline.
+    """
+    from sklearn.model_selection import train_test_split
+    from sklearn.cluster import KMeans
+    from sklearn.ensemble import GradientBoostingRegressor
+    from sklearn import metrics
+
+    data = read_rows(data_path)
+    X = [i for i in data.columns if i not in [TARGET,"persons"]]
+    train_df, test_df = train_test_split(data[X+[TARGET]], test_size=0.2, shuffle=True, random_state=random_state)
+
+    ordinal_encoder = OrdinalEncoder(ORDINAL_COLUMNS, VALUE_DICT).fit()
+    onehot_encoder = OneHotEncoder(CATEGORICAL_COLUMNS).fit(train_df)
+    pipeline = ScoringPipeline(ordinal_encoder, onehot_encoder, None, None)
+
+    encoded = onehot_encoder.transform(ordinal_encoder.transform(train_df))
+    X_train = encoded[pipeline.features].to_numpy(dtype=float)
+    y_train = encoded[TARGET].to_numpy()
+
+    # Fit KMeans clustering model with 3 clusters, whose label is added as a feature
+    pipeline.kmeans = KMeans(n_clusters=3, init="random", n_init=10, max_iter=300, tol=1e-04, random_state=0).fit(X_train)
+    X_train = np.column_stack([X_train, pipeline.kmeans.predict(X_train)])
+    pipeline.model = GradientBoostingRegressor().fit(X_train, y_train)
+
+    # Estimate of out-of-sample performance on unseen test partition
+    y_test = ordinal_encoder.transform(test_df)[TARGET].to_numpy()
+    y_pred = pipeline.predict(test_df)
+    print("metrics.r2_score =", metrics.r2_score(y_test, y_pred))
+    print("metrics.acc =", metrics.accuracy_score(y_test, y_pred))
+
+    pipeline.save(model_path)
+    print("Model saved to {}".format(model_path))
+    return pipeline
+
+def score(input_path, output_path=None, model_path=MODEL_PATH, batch_size=10000):
+    """Score rows in the car.data schema in batches, and report throughput and latency.
+
+    Args:
+        input_path (str): path of the .csv, .json or .jsonl input file.
+        output_path (str): path of the output CSV (input rows with the predicted "buying_pred"). Defaults to None (not written).
+        model_path (str): path of the saved pipeline. Defaults to MODEL_PATH.
+        batch_size (int): number of rows scored per batch. Defaults to 10000.
+
+    Returns:
+        dict: number of rows, total time, rows/sec, per-batch latency percentiles (ms) and accuracy (None if the
+            input has no buying price).
+    """
+    started_at = time.perf_counter()
+    pipeline = ScoringPipeline.load(model_path)
+    print("Model loaded in {:.3f} s".format(time.perf_counter()-started_at))
+
+    if output_path is not None and os.path.exists(output_path):
+        os.remove(output_path)
+    num_rows, num_correct, num_labelled, latencies = 0, 0, 0, []
+    scoring_time = 0.0
+    for batch in iter_batches(input_path, batch_size):
+        batch_started_at = time.perf_counter()
+        labels = pipeline.predict_labels(batch)
+        latency = time.perf_counter() - batch_started_at
+        latencies.append(latency)
+        scoring_time += latency
+
+        num_rows += len(batch)
+        if TARGET in batch.columns:
+            num_labelled += int(batch[TARGET].notnull().sum())
+            num_correct += int((batch[TARGET].to_numpy() == labels).sum())
+        if output_path is not None:
+            batch.assign(buying_pred=labels).to_csv(output_path, mode="a", index=False, header=not os.path.exists(output_path))
+
+    latencies_ms = np.array(latencies)*1000
+    report = {
+        "num_rows": num_rows,
+        "num_batches": len(latencies),
+        "wall_time_s": time.perf_counter() - started_at,
+        "rows_per_sec": num_rows/scoring_time if scoring_time else None,
+        "latency_ms_p50": float(np.percentile(latencies_ms, 50)) if len(latencies) else None,
+        "latency_ms_p95": float(np.percentile(latencies_ms, 95)) if len(latencies) else None,
+        "latency_ms_max": float(latencies_ms.max()) if len(latencies) else None,
+        "accuracy": num_correct/num_labelled if num_labelled else None,
+    }
+    print("Scored {:,d} rows in {:d} batches of up to {:,d} rows".format(num_rows, report["num_batches"], batch_size))
+    if report["rows_per_sec"] is not None:
+        print("- throughput: {:,.0f} rows/sec (encoding and predict)".format(report["rows_per_sec"]))
+        print("- batch latency: p50 {:.1f} ms, p95 {:.1f} ms, max {:.1f} ms".format(
+            report["latency_ms_p50"], report["latency_ms_p95"], report["latency_ms_max"]))
+    if report["accuracy"] is not None:
+        print("- accuracy: {:.3f} ({:,d} rows with buying price)".format(report["accuracy"], num_labelled))
+    if output_path is not None:
+        print("Predictions written to {}".format(output_path))
+    return report
+
+
+# =============================================
+# Input
+# =============================================
+def read_rows(filepath):
+    """Read all rows of an input file (see iter_batches)."""
+    return pd.concat(iter_batches(filepath, None), ignore_index=True)
+
+def iter_batches(filepath, batch_size):
+    """Read an input file in batches of rows in the car.data schema.
+
+    Args:
+        filepath (str): path of the .csv (car.data format, with or without a header row), .json (array of
+            records) or .jsonl (one record per line) file.
+        batch_size (int): number of rows per batch. None reads the whole file as one batch.
+
+    Yields:
+        pandas dataframe: batch of rows, with values as strings.
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext == ".json":
+        df = pd.read_json(filepath, orient="records", dtype=False)
+        batches = [df] if batch_size is None else (df.iloc[i:i+batch_size] for i in range(0, len(df), batch_size))
+    elif ext == ".jsonl":
+        batches = pd.read_json(filepath, orient="records", lines=True, dtype=False, chunksize=batch_size)
+        batches = [batches] if batch_size is None else batches
+    else:
+        with open(filepath) as f:
+            has_header = f.readline().strip().split(",")[0] in CAR_COLUMNS
+        batches = pd.read_csv(filepath, header=0 if has_header else None, names=None if has_header else CAR_COLUMNS,
+                              dtype=str, chunksize=batch_size)
+        batches = [batches] if batch_size is None else batches
+    for batch in batches:
+        yield batch.astype(str).where(batch.notnull())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train or batch-score the car-evaluation model.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    train_parser = subparsers.add_parser("train", help="train the model and save the pipeline")
+    train_parser.add_argument("--data", default=DATA_PATH, help="path of car.data")
+    train_parser.add_argument("--model", default=MODEL_PATH, help="path of the saved pipeline")
+    score_parser = subparsers.add_parser("score", help="score a .csv, .json or .jsonl file")
+    score_parser.add_argument("input", help="path of the input file")
+    score_parser.add_argument("--output", default=None, help="path of the output CSV with predictions")
+    score_parser.add_argument("--model", default=MODEL_PATH, help="path of the saved pipeline")
+    score_parser.add_argument("--batch-size", type=int, default=10000, help="rows scored per batch")
+    args = parser.parse_args()
+
+    if args.command == "train":
+        train(args.data, args.model)
+    else:
+        score(args.input, args.output, args.model, args.batch_size)
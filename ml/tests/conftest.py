@@ -0,0 +1,5 @@
+"""Makes the ml/src modules importable in the tests, as they are when run from ml/src."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
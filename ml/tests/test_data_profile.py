@@ -0,0 +1,33 @@
+"""Approximate column profiles: distinct counts are bounded, and top values are only listed if they stand out."""
+import pandas as pd
+
+from data_profile import ColumnProfile
+
+
+def _profile(values, chunksize=100, max_tracked=50):
+    profile = ColumnProfile("column", top_k=5, max_tracked=max_tracked)
+    series = pd.Series(values, dtype=object)
+    for start in range(0, len(series), chunksize):
+        profile.update(series.iloc[start:start+chunksize])
+    return profile.to_dict()
+
+
+def test_unique_values():
+    profile = _profile(["user{}@example.com".format(i) for i in range(2000)])
+    assert profile["approximate"]
+    assert profile["distinct"] <= profile["count"] == 2000
+    assert profile["top"] == []
+
+def test_heavy_hitters():
+    values = ["a"]*600 + ["b"]*300 + ["x{}".format(i) for i in range(1100)]
+    profile = _profile(values)
+    assert profile["approximate"]
+    assert [value for value, _ in profile["top"]] == ["a", "b"]
+    for value, count in profile["top"]:
+        assert count <= values.count(value) <= count + profile["top_error"]
+
+def test_exact():
+    profile = _profile(["a", "b", "b", None], max_tracked=50)
+    assert not profile["approximate"]
+    assert profile["distinct"] == 2
+    assert profile["top"] == [["b", 2], ["a", 1]]